@@ -0,0 +1,200 @@
+# achievement_store.py
+"""Write-behind persistence for achievement unlocks.
+
+Unlocks are appended to a journal (one JSON line each) by a background
+thread, which fsyncs once per batch. Every so often the journal is compacted
+into a snapshot written atomically (temp file, fsync, rename) and then
+truncated. Loading reads the snapshot and replays the journal on top; a
+torn last line from a crash is ignored, and replaying an unlock twice is
+harmless, so a crash at any point loses at most the batch in flight.
+
+The game thread only ever appends to an in-memory list.
+"""
+import atexit
+import json
+import os
+import threading
+
+from eventlog import log
+
+class AchievementStore:
+    def __init__(self, snapshot_path='achievements.json', journal_path='achievements.journal',
+                 flush_interval=0.5, compact_every=32):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.definitions = {}
+        self.unlocks = {}  # achievement id -> unlock date
+        self.pending = []
+        self.journal_entries = 0
+        self.lock = threading.Lock()
+        self.io_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.writer = None
+        self.closed = False
+
+    # ----------------- LOADING -----------------
+    def load(self, definitions):
+        """Return achievements built from definitions plus the saved unlock state"""
+        self.definitions = definitions
+        self.unlocks = {}
+        snapshot = self.read_snapshot()
+        for achievement_id, saved in snapshot.items():
+            if isinstance(saved, dict) and saved.get('unlocked'):
+                self.unlocks[achievement_id] = saved.get('unlock_date')
+        self.journal_entries = self.replay_journal()
+        return self.build_snapshot()
+
+    def read_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning('achievement_snapshot_unreadable', path=self.snapshot_path, error=str(e))
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def replay_journal(self):
+        """Apply journaled unlocks; returns how many entries were read"""
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            log.warning('achievement_journal_unreadable', path=self.journal_path, error=str(e))
+            return 0
+        count = 0
+        valid_end = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError('unterminated line')
+                entry = json.loads(line)
+                achievement_id = entry['id']
+            except (ValueError, KeyError, TypeError):
+                # A torn write can only be the last line; nothing after it is trusted
+                log.warning('achievement_journal_torn', line=count + 1)
+                break
+            self.unlocks.setdefault(achievement_id, entry.get('date'))
+            valid_end += len(line)
+            count += 1
+        if valid_end < len(data):
+            # Cut the torn tail so the next append starts on a clean line
+            try:
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(valid_end)
+            except OSError as e:
+                log.warning('achievement_journal_unrepaired', path=self.journal_path, error=str(e))
+        return count
+
+    def build_snapshot(self):
+        achievements = {}
+        for achievement_id, definition in self.definitions.items():
+            achievement = dict(definition)
+            achievement['unlocked'] = achievement_id in self.unlocks
+            achievement['unlock_date'] = self.unlocks.get(achievement_id)
+            achievements[achievement_id] = achievement
+        return achievements
+
+    # ----------------- WRITING -----------------
+    def record_unlock(self, achievement_id, unlock_date):
+        """Queue an unlock for the journal; never touches the disk"""
+        with self.lock:
+            if achievement_id in self.unlocks:
+                return
+            self.unlocks[achievement_id] = unlock_date
+            self.pending.append({'id': achievement_id, 'date': unlock_date})
+        if self.writer is None:
+            self.start()
+        self.wakeup.set()
+
+    def start(self):
+        with self.lock:
+            if self.writer is not None:
+                return
+            self.writer = threading.Thread(target=self.run, name='achievement-journal', daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def run(self):
+        while not self.closed:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            # Let a burst of unlocks (e.g. at game end) land in one batch
+            if not self.closed:
+                self.wakeup.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Append pending unlocks to the journal with one fsync"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return
+        lines = ''.join(json.dumps(entry) + '\n' for entry in batch)
+        with self.io_lock:
+            try:
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                log.error('achievement_journal_write_failed', error=str(e))
+                with self.lock:
+                    self.pending[:0] = batch
+                return
+            self.journal_entries += len(batch)
+            if self.journal_entries >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """Fold the journal into a new snapshot, then empty the journal"""
+        with self.lock:
+            snapshot = self.build_snapshot()
+        tmp_path = self.snapshot_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            fsync_directory(self.snapshot_path)
+            # A crash before this truncate just replays entries already in the snapshot
+            with open(self.journal_path, 'w', encoding='utf-8'):
+                pass
+        except OSError as e:
+            log.error('achievement_compaction_failed', error=str(e))
+            return
+        self.journal_entries = 0
+
+    def close(self):
+        """Write everything still pending and compact (called at exit)"""
+        if self.closed:
+            return
+        self.closed = True
+        self.wakeup.set()
+        if self.writer is not None and self.writer is not threading.current_thread():
+            self.writer.join(timeout=2)
+        self.flush()
+        with self.io_lock:
+            if self.journal_entries:
+                self.compact()
+
+def fsync_directory(path):
+    """Make a rename durable; not supported (or needed) on every platform"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -1,107 +1,169 @@
 # achievements.py
-import json
+"""Achievements: definitions, unlock rules and the manager that runs them.
+
+Rules are small predicates registered with @rule for the events they care
+about (game_end, move, undo, timer_expired). The manager indexes rules by
+event, so handling an event only runs the rules subscribed to it, and a
+rule is dropped from the index once its achievement is unlocked.
+"""
 import time
 from datetime import datetime
+from eventlog import log
+from achievement_store import AchievementStore
+from game import count_threats
+from notifications import NotificationQueue
+
+# Achievement definitions; unlock state is loaded from disk by AchievementStore
+ACHIEVEMENTS = {
+    'first_win': {
+        'name': 'First Victory',
+        'description': 'Win your first game against the AI',
+        'icon': '🏆'
+    },
+    'speed_demon': {
+        'name': 'Speed Demon',
+        'description': 'Win a game in Speed mode (3s timer)',
+        'icon': '⚡'
+    },
+    'perfectionist': {
+        'name': 'Perfectionist',
+        'description': 'Win without the AI making a single move',
+        'icon': '🎯'
+    },
+    'comeback_kid': {
+        'name': 'Comeback Kid',
+        'description': 'Win after being 1 move away from losing',
+        'icon': '🔥'
+    },
+    'streak_master': {
+        'name': 'Streak Master',
+        'description': 'Win 3 games in a row',
+        'icon': '⭐'
+    },
+    'undo_expert': {
+        'name': 'Second Chance',
+        'description': 'Use undo and still win the game',
+        'icon': '↶'
+    },
+    'difficulty_master': {
+        'name': 'Master Player',
+        'description': 'Win against Hard AI',
+        'icon': '👑'
+    },
+    'fast_thinker': {
+        'name': 'Fast Thinker',
+        'description': 'Win with more than 10 seconds left on timer',
+        'icon': '⏱️'
+    },
+    'draw_specialist': {
+        'name': 'Draw Specialist',
+        'description': 'Draw 3 games in one session',
+        'icon': '🤝'
+    },
+    'ai_annihilator': {
+        'name': 'AI Annihilator',
+        'description': 'Win 10 games total',
+        'icon': '💥'
+    }
+}
+
+# ----------------- RULES -----------------
+RULES = {}  # achievement id -> (events, check)
+
+# Per-game counters that belong to a position (restored on undo/redo)
+GAME_FLAGS = ('moves', 'human_moves', 'ai_moves', 'faced_threat', 'timeouts')
+
+def rule(achievement_id, *events):
+    """Register check(ctx) as the unlock condition for an achievement"""
+    def register(check):
+        RULES[achievement_id] = (events, check)
+        return check
+    return register
+
+@rule('first_win', 'game_end')
+def first_win(ctx):
+    return ctx['winner'] == 1
+
+@rule('speed_demon', 'game_end')
+def speed_demon(ctx):
+    return ctx['winner'] == 1 and ctx['timer_mode'] == 'speed'
+
+@rule('perfectionist', 'game_end')
+def perfectionist(ctx):
+    return ctx['winner'] == 1 and ctx['ai_moves'] == 0
+
+@rule('comeback_kid', 'game_end')
+def comeback_kid(ctx):
+    return ctx['winner'] == 1 and ctx['faced_threat']
+
+@rule('streak_master', 'game_end')
+def streak_master(ctx):
+    return ctx['consecutive_wins'] >= 3
+
+@rule('undo_expert', 'game_end')
+def undo_expert(ctx):
+    return ctx['winner'] == 1 and ctx['used_undo']
+
+@rule('difficulty_master', 'game_end')
+def difficulty_master(ctx):
+    return ctx['winner'] == 1 and ctx['difficulty'] == 'hard'
+
+@rule('fast_thinker', 'game_end')
+def fast_thinker(ctx):
+    return (ctx['winner'] == 1 and ctx['timer_mode'] != 'no_timer' and
+            ctx.get('time_left') is not None and ctx['time_left'] > 10)
+
+@rule('draw_specialist', 'game_end')
+def draw_specialist(ctx):
+    return ctx['session_draws'] >= 3
 
+@rule('ai_annihilator', 'game_end')
+def ai_annihilator(ctx):
+    # Lifetime wins from the stats store; session wins are the fallback
+    lifetime = ctx.get('lifetime')
+    wins = lifetime['wins'] if lifetime is not None else ctx['session_wins']
+    return wins >= 10
+
+# ----------------- MANAGER -----------------
 class AchievementManager:
-    def __init__(self):
+    def __init__(self, store=None):
+        self.store = store if store is not None else AchievementStore()
         self.achievements = self.load_achievements()
         self.current_game_stats = {
             'start_time': time.time(),
             'moves': 0,
             'human_moves': 0,
             'ai_moves': 0,
+            'used_undo': False,
+            'faced_threat': False,
+            'timeouts': 0,
             'consecutive_wins': 0,
-            'winning_moves': [],
+            'session_wins': 0,
+            'session_draws': 0,
             'timer_mode': 'no_timer',
             'difficulty': None
         }
-        self.active_notifications = []
+        self.notifications = NotificationQueue()
+        self.version = 0  # bumped on every unlock, for cached views
+        self.index = self.build_index()
     
     def load_achievements(self):
-        """Load achievements from file or create default ones"""
-        try:
-            with open('achievements.json', 'r') as f:
-                return json.load(f)
-        except:
-            # Create default achievements
-            return {
-                'first_win': {
-                    'unlocked': False,
-                    'name': 'First Victory',
-                    'description': 'Win your first game against the AI',
-                    'icon': '🏆',
-                    'unlock_date': None
-                },
-                'speed_demon': {
-                    'unlocked': False,
-                    'name': 'Speed Demon',
-                    'description': 'Win a game in Speed mode (3s timer)',
-                    'icon': '⚡',
-                    'unlock_date': None
-                },
-                'perfectionist': {
-                    'unlocked': False,
-                    'name': 'Perfectionist',
-                    'description': 'Win without the AI making a single move',
-                    'icon': '🎯',
-                    'unlock_date': None
-                },
-                'comeback_kid': {
-                    'unlocked': False,
-                    'name': 'Comeback Kid',
-                    'description': 'Win after being 1 move away from losing',
-                    'icon': '🔥',
-                    'unlock_date': None
-                },
-                'streak_master': {
-                    'unlocked': False,
-                    'name': 'Streak Master',
-                    'description': 'Win 3 games in a row',
-                    'icon': '⭐',
-                    'unlock_date': None
-                },
-                'undo_expert': {
-                    'unlocked': False,
-                    'name': 'Second Chance',
-                    'description': 'Use undo and still win the game',
-                    'icon': '↶',
-                    'unlock_date': None
-                },
-                'difficulty_master': {
-                    'unlocked': False,
-                    'name': 'Master Player',
-                    'description': 'Win against Hard AI',
-                    'icon': '👑',
-                    'unlock_date': None
-                },
-                'fast_thinker': {
-                    'unlocked': False,
-                    'name': 'Fast Thinker',
-                    'description': 'Win with more than 10 seconds left on timer',
-                    'icon': '⏱️',
-                    'unlock_date': None
-                },
-                'draw_specialist': {
-                    'unlocked': False,
-                    'name': 'Draw Specialist',
-                    'description': 'Achieve 3 draws in one session',
-                    'icon': '🤝',
-                    'unlock_date': None
-                },
-                'ai_annihilator': {
-                    'unlocked': False,
-                    'name': 'AI Annihilator',
-                    'description': 'Win 10 games total',
-                    'icon': '💥',
-                    'unlock_date': None
-                }
-            }
+        """Load achievements: definitions plus unlock state from snapshot and journal"""
+        return self.store.load(ACHIEVEMENTS)
     
     def save_achievements(self):
-        """Save achievements to file"""
-        with open('achievements.json', 'w') as f:
-            json.dump(self.achievements, f, indent=2)
+        """Write pending unlocks now (normally done in the background)"""
+        self.store.flush()
+    
+    def build_index(self):
+        """event -> {achievement id: check} for every rule still locked"""
+        index = {}
+        for achievement_id, (events, check) in RULES.items():
+            if achievement_id not in self.achievements or self.achievements[achievement_id]['unlocked']:
+                continue
+            for event in events:
+                index.setdefault(event, {})[achievement_id] = check
+        return index
     
     def update_game_stats(self, **kwargs):
         """Update current game statistics"""
@@ -109,102 +171,109 @@ class AchievementManager:
             if key in self.current_game_stats:
                 self.current_game_stats[key] = value
     
-    def check_achievements(self, winner, score, game_duration, time_left=None):
-        """Check and unlock achievements based on game results"""
+    def handle(self, event, **data):
+        """Update stats for an event, run its rules; returns newly unlocked ids"""
+        self.track(event, data)
         newly_unlocked = []
-        
-        # Track win streak
-        if winner == 1:  # Human won
-            self.current_game_stats['consecutive_wins'] += 1
-        else:
-            self.current_game_stats['consecutive_wins'] = 0
-        
-        # Check individual achievements
-        if winner == 1 and not self.achievements['first_win']['unlocked']:
-            self.unlock_achievement('first_win')
-            newly_unlocked.append('first_win')
-        
-        if (winner == 1 and self.current_game_stats['timer_mode'] == 'speed' and 
-            not self.achievements['speed_demon']['unlocked']):
-            self.unlock_achievement('speed_demon')
-            newly_unlocked.append('speed_demon')
-        
-        if (winner == 1 and self.current_game_stats['ai_moves'] == 0 and 
-            not self.achievements['perfectionist']['unlocked']):
-            self.unlock_achievement('perfectionist')
-            newly_unlocked.append('perfectionist')
-        
-        if (winner == 1 and self.current_game_stats['difficulty'] == 'hard' and 
-            not self.achievements['difficulty_master']['unlocked']):
-            self.unlock_achievement('difficulty_master')
-            newly_unlocked.append('difficulty_master')
-        
-        if (winner == 1 and time_left is not None and time_left > 10 and 
-            self.current_game_stats['timer_mode'] != 'no_timer' and
-            not self.achievements['fast_thinker']['unlocked']):
-            self.unlock_achievement('fast_thinker')
-            newly_unlocked.append('fast_thinker')
-        
-        if self.current_game_stats['consecutive_wins'] >= 3 and not self.achievements['streak_master']['unlocked']:
-            self.unlock_achievement('streak_master')
-            newly_unlocked.append('streak_master')
-        
-        if score[1] >= 10 and not self.achievements['ai_annihilator']['unlocked']:
-            self.unlock_achievement('ai_annihilator')
-            newly_unlocked.append('ai_annihilator')
-        
-        # Save achievements after checking
-        self.save_achievements()
-        
-        # Reset game stats for next game
-        self.current_game_stats = {
+        rules = self.index.get(event)
+        if rules:
+            ctx = dict(self.current_game_stats, **data)
+            for achievement_id, check in list(rules.items()):
+                if check(ctx):
+                    self.unlock_achievement(achievement_id)
+                    newly_unlocked.append(achievement_id)
+        if event == 'game_end':
+            self.reset_game()
+        return newly_unlocked
+    
+    def track(self, event, data):
+        """Keep the per-game and per-session counters the rules read"""
+        stats = self.current_game_stats
+        if event == 'move':
+            stats['moves'] += 1
+            if data.get('player') == 1:
+                stats['human_moves'] += 1
+            else:
+                stats['ai_moves'] += 1
+                # The AI is one move from winning
+                board = data.get('board')
+                if board is not None and count_threats(board, 2):
+                    stats['faced_threat'] = True
+        elif event == 'undo':
+            stats['used_undo'] = True
+        elif event == 'timer_expired':
+            stats['timeouts'] += 1
+        elif event == 'game_end':
+            winner = data.get('winner')
+            if winner == 1:
+                stats['consecutive_wins'] += 1
+                stats['session_wins'] += 1
+            else:
+                stats['consecutive_wins'] = 0
+            if winner == -1:
+                stats['session_draws'] += 1
+    
+    def game_flags(self):
+        """The per-game counters as a compact tuple, for saving with a position"""
+        stats = self.current_game_stats
+        return tuple(stats[key] for key in GAME_FLAGS)
+    
+    def restore_game_flags(self, flags):
+        """Put back counters saved by game_flags() (None: a fresh game)"""
+        if flags is None:
+            flags = (0, 0, 0, False, 0)
+        self.current_game_stats.update(zip(GAME_FLAGS, flags))
+    
+    def reset_game(self):
+        """Clear the per-game counters; session counters and settings stay"""
+        self.current_game_stats.update({
             'start_time': time.time(),
             'moves': 0,
             'human_moves': 0,
             'ai_moves': 0,
-            'consecutive_wins': self.current_game_stats['consecutive_wins'],
-            'winning_moves': [],
-            'timer_mode': self.current_game_stats['timer_mode'],
-            'difficulty': self.current_game_stats['difficulty']
-        }
-        
-        return newly_unlocked
+            'used_undo': False,
+            'faced_threat': False,
+            'timeouts': 0
+        })
+    
+    def check_achievements(self, winner, time_left=None, lifetime=None):
+        """Check achievements for a finished game"""
+        return self.handle('game_end', winner=winner, time_left=time_left, lifetime=lifetime)
     
     def unlock_achievement(self, achievement_id):
         """Unlock a specific achievement"""
         if achievement_id in self.achievements and not self.achievements[achievement_id]['unlocked']:
             self.achievements[achievement_id]['unlocked'] = True
             self.achievements[achievement_id]['unlock_date'] = datetime.now().isoformat()
+            self.store.record_unlock(achievement_id, self.achievements[achievement_id]['unlock_date'])
+            self.version += 1
+            
+            # Unlocked rules never need to run again
+            for rules in self.index.values():
+                rules.pop(achievement_id, None)
             
             # Add notification
             achievement = self.achievements[achievement_id]
-            self.active_notifications.append({
+            self.notifications.push({
                 'id': achievement_id,
                 'name': achievement['name'],
                 'icon': achievement['icon'],
                 'description': achievement['description'],
-                'time': time.time(),
                 'duration': 5  # seconds
             })
             
-            print(f"\n🎉 ACHIEVEMENT UNLOCKED: {achievement['icon']} {achievement['name']}")
-            print(f"   {achievement['description']}")
+            log.info('achievement_unlocked', id=achievement_id, name=achievement['name'])
     
     def add_notification(self, text, duration=3):
         """Add a custom notification"""
-        self.active_notifications.append({
+        self.notifications.push({
             'text': text,
-            'time': time.time(),
             'duration': duration
         })
     
-    def update_notifications(self):
-        """Update and remove expired notifications"""
-        current_time = time.time()
-        self.active_notifications = [
-            notif for notif in self.active_notifications
-            if current_time - notif['time'] < notif['duration']
-        ]
+    def update_notifications(self, now=None):
+        """Retire expired notifications; True if the visible set changed"""
+        return self.notifications.update(now)
     
     def get_unlocked_count(self):
         """Get count of unlocked achievements"""
@@ -213,6 +282,3 @@ class AchievementManager:
     def get_total_count(self):
         """Get total number of achievements"""
         return len(self.achievements)
-
-# Create a global instance
-achievement_manager = AchievementManager()
\ No newline at end of file
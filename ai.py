@@ -1,6 +1,6 @@
 # ai.py
 import random
-from game import check_winner
+from game import check_winner, make_move, unmake_move, Board
 
 # ----------------- EASY AI -----------------
 def easy_ai(board):
@@ -27,22 +27,38 @@ def medium_ai(board):
     return random.choice(empty)
 
 # ----------------- HARD AI (Minimax) -----------------
+# Exact results by Zobrist key; tic-tac-toe has only a few thousand positions,
+# so after the first few games every search is a lookup
+TRANSPOSITIONS = {}
+
 def minimax(board, player):
+    """Best move for player: {'row', 'col', 'score'} (score +1 if O wins, -1 if X wins)"""
+    # Search a keyed copy, so the caller's board is never touched
+    return dict(search(Board(board, player), player))
+
+def search(board, player):
+    key = board.key
+    result = TRANSPOSITIONS.get(key)
+    if result is not None:
+        return result
+
     winner, _ = check_winner(board)
-    if winner == 1: return {'score': -1}
-    if winner == 2: return {'score': 1}
-    if winner == -1: return {'score': 0}
-
-    moves = []
-    for r in range(3):
-        for c in range(3):
-            if board[r][c] == 0:  # FIXED: Changed board[r, c] to board[r][c]
-                board[r][c] = player  # FIXED: Changed board[r, c] to board[r][c]
-                result = minimax(board, 2 if player == 1 else 1)
-                moves.append({'row': r, 'col': c, 'score': result['score']})
-                board[r][c] = 0  # FIXED: Changed board[r, c] to board[r][c]
-
-    return max(moves, key=lambda x: x['score']) if player == 2 else min(moves, key=lambda x: x['score'])
+    if winner == 1: result = {'score': -1}
+    elif winner == 2: result = {'score': 1}
+    elif winner == -1: result = {'score': 0}
+    else:
+        moves = []
+        for r in range(3):
+            for c in range(3):
+                if board[r][c] == 0:
+                    make_move(board, r, c, player)
+                    score = search(board, 2 if player == 1 else 1)['score']
+                    moves.append({'row': r, 'col': c, 'score': score})
+                    unmake_move(board, r, c)
+        result = max(moves, key=lambda x: x['score']) if player == 2 else min(moves, key=lambda x: x['score'])
+
+    TRANSPOSITIONS[key] = result
+    return result
 
 def hard_ai(board):
     # FIXED: Changed board[r, c] to board[r][c]
@@ -0,0 +1,63 @@
+# bench_proof.py
+"""Proof throughput of proof.py's engines on a fixed set of positions.
+
+    python bench_proof.py [--engine dfpn|pn|all] [--budget 1000000]
+
+Each position has a known answer; a wrong one makes the exit status
+non-zero, while running out of budget is only reported. Throughput is
+positions expanded per second, over the whole set.
+"""
+import argparse
+import sys
+
+from proof import DEFAULT_BUDGET, ENGINES, Position, parse_moves, prove
+
+# name, rows, cols, k, moves (X first), can X force a win
+POSITIONS = [
+    ('3x3 k3 empty', 3, 3, 3, '', False),
+    ('4x4 k3 empty', 4, 4, 3, '', True),
+    ('7x7 k4 a', 7, 7, 4, '5,3 4,3 2,2 3,1 4,0 5,4', True),
+    ('7x7 k4 b', 7, 7, 4, '0,2 5,2 3,4 1,2 2,0 4,2', False),
+    ('7x7 k4 c', 7, 7, 4, '4,4 1,2 3,1 4,2 6,2 2,2', False),
+    ('7x7 k4 d', 7, 7, 4, '0,4 1,4 3,2 1,3', True),
+    ('9x9 k5 a', 9, 9, 5, '2,2 0,4 4,1 1,4 3,3 3,5 4,3 6,2', True),
+    ('9x9 k5 b', 9, 9, 5, '6,2 2,3 3,3 3,2 5,4 4,5 4,4 2,4', True),
+    ('9x9 k5 c', 9, 9, 5, '5,3 3,3 3,5 2,3 5,5 4,0 3,4 6,4', True),
+]
+
+def bench(engine, budget):
+    """Run every position; returns the number answered wrongly"""
+    print(f"{engine} (budget {budget:,})")
+    print(f"  {'position':14} {'answer':>7} {'positions':>10} {'seconds':>8} {'per s':>8} {'proof':>7} {'memory':>9}")
+    failures = 0
+    nodes = seconds = 0
+    for name, rows, cols, k, moves, expected in POSITIONS:
+        result = prove(Position.from_moves(rows, cols, k, parse_moves(moves)), engine, budget=budget)
+        nodes += result['nodes']
+        seconds += result['seconds']
+        if result['win'] is None:
+            answer = 'budget'
+        elif result['win'] == expected:
+            answer = 'win' if result['win'] else 'no win'
+        else:
+            answer = 'WRONG'
+            failures += 1
+        print(f"  {name:14} {answer:>7} {result['nodes']:>10,} {result['seconds']:>8.2f} "
+              f"{result['nodes'] / max(result['seconds'], 1e-9):>8,.0f} {result['proof_size'] or 0:>7,} "
+              f"{result['memory']:>9,}")
+    print(f"  total {nodes:,} positions in {seconds:.2f} s: {nodes / max(seconds, 1e-9):,.0f} positions/s")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engine', default='all', choices=sorted(ENGINES) + ['all'])
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET)
+    args = parser.parse_args()
+    engines = sorted(ENGINES) if args.engine == 'all' else [args.engine]
+    failures = sum(bench(engine, args.budget) for engine in engines)
+    if failures:
+        print(f"{failures} wrong answers")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# bench_server.py
+"""Load generator for server.py: moves per second and move latency.
+
+    python bench_server.py [--clients 200] [--games 5] [--difficulty hard]
+                           [--port PORT]
+
+Without --port a server is started on a free port for the run. Each client
+plays whole games with random legal moves; latency is measured from sending
+a move to receiving the AI's reply (or the end of the game).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from game import check_winner
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+async def play(host, port, games, difficulty, latencies):
+    """One client; returns the number of moves played (both sides)"""
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def receive():
+        return json.loads(await reader.readline())
+
+    moves = 0
+    for _ in range(games):
+        writer.write(json.dumps({'op': 'new', 'difficulty': difficulty}).encode() + b'\n')
+        state = await receive()
+        board = state['board']
+        over = False
+        while not over:
+            empty = [(r, c) for r in range(3) for c in range(3) if board[r][c] == 0]
+            row, col = random.choice(empty)
+            start = time.perf_counter()
+            writer.write(json.dumps({'op': 'move', 'row': row, 'col': col}).encode() + b'\n')
+            # Read until it is our turn again or the game is over
+            while True:
+                message = await receive()
+                if message['op'] == 'moved':
+                    board[message['row']][message['col']] = message['player']
+                    moves += 1
+                    # A winning AI move is followed by 'end'
+                    if message['player'] == 2 and check_winner(board)[0] == 0:
+                        break
+                elif message['op'] == 'end':
+                    over = True
+                    break
+                elif message['op'] == 'error':
+                    raise RuntimeError(message['error'])
+            latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+    return moves
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def bench(host, port, clients, games, difficulty):
+    latencies = []
+    start = time.perf_counter()
+    moves = await asyncio.gather(*(play(host, port, games, difficulty, latencies)
+                                   for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    total = sum(moves)
+    print(f"{clients} clients x {games} games ({difficulty}): {total} moves in {elapsed:.2f} s")
+    print(f"  throughput  {total / elapsed:10.0f} moves/s")
+    print(f"  latency     p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms  "
+          f"max {max(latencies) * 1000:7.2f} ms")
+
+def start_server(host):
+    # No archive: benchmark runs should leave nothing behind
+    process = subprocess.Popen([sys.executable, 'server.py', '--host', host, '--port', '0', '--archive', ''],
+                               cwd=HERE, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    match = re.search(r'Listening on .*:(\d+)', line)
+    if not match:
+        process.kill()
+        raise RuntimeError(f"server did not start: {line!r}")
+    return process, int(match.group(1))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--games', type=int, default=5)
+    parser.add_argument('--difficulty', default='hard', choices=['easy', 'medium', 'hard'])
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        process, port = start_server(args.host)
+    try:
+        asyncio.run(bench(args.host, port, args.clients, args.games, args.difficulty))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+if __name__ == '__main__':
+    main()
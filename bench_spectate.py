@@ -0,0 +1,109 @@
+# bench_spectate.py
+"""Fan-out benchmark for spectate.py.
+
+    python bench_spectate.py [--subscribers 10000] [--games 20] [--slow 100]
+
+Publishes whole games (reset, moves, end) to one channel watched by many
+in-process asyncio subscribers, a few of which are deliberately slow.
+Reports the broadcaster's cost per message, how long it
+takes every subscriber to catch up, and how often slow subscribers had
+their backlog merged into a snapshot. Every subscriber's final board is
+checked against the channel's.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from game import check_winner
+from spectate import Broadcaster, apply
+
+async def consume(subscriber, state, delay):
+    while True:
+        batch = await subscriber.get()
+        if not batch:
+            return
+        for line in batch:
+            apply(state, json.loads(line))
+        if delay:
+            await asyncio.sleep(delay)
+
+def random_game():
+    """[(row, col, player), ...] and the winner for a random game"""
+    board = [[0] * 3 for _ in range(3)]
+    moves = []
+    player = 1
+    while True:
+        empty = [(r, c) for r in range(3) for c in range(3) if board[r][c] == 0]
+        row, col = random.choice(empty)
+        board[row][col] = player
+        moves.append((row, col, player))
+        winner, _ = check_winner(board)
+        if winner:
+            return moves, winner
+        player = 3 - player
+
+async def bench(subscribers, games, slow, slow_delay, log_size):
+    broadcaster = Broadcaster(log_size=log_size)
+    channel = broadcaster.open(1)
+    states = []
+    tasks = []
+    for i in range(subscribers):
+        subscriber = broadcaster.subscribe(1)
+        state = {'cells': [0] * 9, 'winner': 0, 'seq': -1}
+        states.append((subscriber, state))
+        delay = slow_delay if i < slow else 0
+        tasks.append(asyncio.create_task(consume(subscriber, state, delay)))
+    await asyncio.sleep(0)
+
+    publish_time = 0.0
+    messages = 0
+    start = time.perf_counter()
+    for _ in range(games):
+        moves, winner = random_game()
+        t = time.perf_counter()
+        broadcaster.reset(1)
+        publish_time += time.perf_counter() - t
+        messages += 1
+        for row, col, player in moves:
+            t = time.perf_counter()
+            broadcaster.move(1, row, col, player)
+            publish_time += time.perf_counter() - t
+            messages += 1
+            # Let the subscribers run between moves, as a live game would
+            await asyncio.sleep(0)
+        t = time.perf_counter()
+        broadcaster.end(1, winner)
+        publish_time += time.perf_counter() - t
+        messages += 1
+        await asyncio.sleep(0)
+    final_seq = channel.seq
+    final_cells = list(channel.cells)
+    broadcaster.close(1)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    wrong = sum(1 for _, state in states if state['cells'] != final_cells or state['seq'] < final_seq)
+    merged = sum(subscriber.merged for subscriber, _ in states)
+    merged_subscribers = sum(1 for subscriber, _ in states if subscriber.merged)
+    deliveries = sum(subscriber.delivered for subscriber, _ in states)
+    print(f"{subscribers} subscribers ({slow} slow), {games} games, {messages} messages")
+    print(f"  publish     {publish_time / messages * 1e6:9.1f} us/message")
+    print(f"  caught up   {elapsed:9.2f} s for {deliveries} deliveries")
+    print(f"  merged      {merged} backlogs into snapshots ({merged_subscribers} subscribers)")
+    print(f"  final state {'OK' if not wrong else f'{wrong} subscribers out of sync'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--slow', type=int, default=100)
+    parser.add_argument('--slow-delay', type=float, default=0.05)
+    parser.add_argument('--log-size', type=int, default=8)
+    args = parser.parse_args()
+    random.seed(1)
+    asyncio.run(bench(args.subscribers, args.games, args.slow, args.slow_delay, args.log_size))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# bench_startup.py
+"""Startup benchmark: import costs and time to first frame.
+
+    python bench_startup.py [runs]
+
+Import costs come from `python -X importtime`, run in a fresh interpreter
+per module so nothing is already cached. Time to first frame runs main.py
+with --exit-after-first-frame under SDL's dummy drivers, so it works without
+a display or audio device.
+"""
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# What a headless tool imports vs what the game window needs
+MODULES = ['game', 'ai', 'layout', 'synth', 'sounds', 'gui']
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+def env():
+    e = dict(os.environ)
+    e.setdefault('SDL_VIDEODRIVER', 'dummy')
+    e.setdefault('SDL_AUDIODRIVER', 'dummy')
+    e['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    return e
+
+def import_breakdown(module, top=5):
+    """Return (cumulative us, [(cumulative us, name), ...] heaviest direct children)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=HERE, env=env(), capture_output=True, text=True)
+    total = 0
+    children = []
+    pending = []
+    # Output is post-order: a module's children are listed just before it
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative, indent, name = match.groups()
+        depth = len(indent) // 2
+        if depth == 1:
+            pending.append((int(cumulative), name))
+        elif depth == 0:
+            if name == module:
+                total = int(cumulative)
+                children = pending
+            pending = []
+    children.sort(reverse=True)
+    return total, children[:top]
+
+def first_frame_ms():
+    """Run main.py until its first frame; return (in-process ms, wall ms)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, 'main.py', '--exit-after-first-frame'],
+                            cwd=HERE, env=env(), capture_output=True, text=True, timeout=60)
+    wall = (time.perf_counter() - start) * 1000
+    match = re.search(r'First frame after (\d+) ms', result.stdout)
+    if not match:
+        raise RuntimeError(f"main.py did not report a first frame:\n{result.stdout}{result.stderr}")
+    return int(match.group(1)), wall
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("Import time (python -X importtime, cumulative)")
+    for module in MODULES:
+        total, children = import_breakdown(module)
+        print(f"  {module:<8} {total / 1000:8.1f} ms")
+        for cumulative, name in children:
+            print(f"      {name:<24} {cumulative / 1000:8.1f} ms")
+
+    print(f"\nTime to first frame ({runs} runs)")
+    in_process = []
+    wall = []
+    for _ in range(runs):
+        frame_ms, wall_ms = first_frame_ms()
+        in_process.append(frame_ms)
+        wall.append(wall_ms)
+    print(f"  since main.py start  median {statistics.median(in_process):7.1f} ms  "
+          f"min {min(in_process):7.1f} ms")
+    print(f"  process wall clock   median {statistics.median(wall):7.1f} ms  "
+          f"min {min(wall):7.1f} ms")
+
+if __name__ == '__main__':
+    main()
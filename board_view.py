@@ -0,0 +1,223 @@
+# board_view.py
+"""Viewport-culled board rendering for boards larger than the window.
+
+The Viewport owns the board <-> screen transform (pan and discrete zoom
+levels). BoardRenderer draws only the cells inside the viewport, using piece
+sprites cached per zoom level. It draws into a surface that keeps its pixels
+between frames: after a pan or zoom it repaints the visible cells, otherwise
+only the cells marked dirty, so an unchanged view costs nothing and a move
+costs one blit whatever the board size.
+"""
+import pygame
+
+# Colors (same palette as gui.py)
+BG_COLOR = (28, 170, 156)
+LINE_COLOR = (23, 145, 135)
+CIRCLE_COLOR = (239, 231, 200)
+CROSS_COLOR = (66, 66, 66)
+
+# Zoom factors applied to the base cell size
+ZOOM_LEVELS = (0.25, 0.35, 0.5, 0.7, 1.0, 1.4, 2.0)
+
+# -------------------- VIEWPORT --------------------
+class Viewport:
+    """Maps board cells to screen pixels for a pannable, zoomable view."""
+    def __init__(self, rows, cols, rect, cell_size, zoom_index=None):
+        self.rows = rows
+        self.cols = cols
+        self.rect = rect  # (x, y, w, h) screen area the board is drawn in
+        self.base_cell = cell_size
+        self.zoom_index = ZOOM_LEVELS.index(1.0) if zoom_index is None else zoom_index
+        # Board-pixel coordinate shown at the top-left of the viewport
+        self.offset_x = 0
+        self.offset_y = 0
+
+    @property
+    def cell_px(self):
+        return max(2, int(round(self.base_cell * ZOOM_LEVELS[self.zoom_index])))
+
+    def _clamp(self):
+        x, y, w, h = self.rect
+        max_x = max(0, self.cols * self.cell_px - w)
+        max_y = max(0, self.rows * self.cell_px - h)
+        self.offset_x = min(max(0, self.offset_x), max_x)
+        self.offset_y = min(max(0, self.offset_y), max_y)
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) screen pixels."""
+        self.offset_x += dx
+        self.offset_y += dy
+        self._clamp()
+
+    def zoom(self, steps, anchor=None):
+        """Change zoom level by steps, keeping the anchor point fixed on screen."""
+        new_index = min(max(0, self.zoom_index + steps), len(ZOOM_LEVELS) - 1)
+        if new_index == self.zoom_index:
+            return False
+        x, y, w, h = self.rect
+        ax, ay = anchor if anchor else (x + w // 2, y + h // 2)
+        old_px = self.cell_px
+        # Board position (in cells) under the anchor before zooming
+        bx = (ax - x + self.offset_x) / old_px
+        by = (ay - y + self.offset_y) / old_px
+        self.zoom_index = new_index
+        self.offset_x = int(bx * self.cell_px) - (ax - x)
+        self.offset_y = int(by * self.cell_px) - (ay - y)
+        self._clamp()
+        return True
+
+    def center_on(self, row, col):
+        x, y, w, h = self.rect
+        self.offset_x = col * self.cell_px + self.cell_px // 2 - w // 2
+        self.offset_y = row * self.cell_px + self.cell_px // 2 - h // 2
+        self._clamp()
+
+    def visible_range(self):
+        """Return (row_start, row_end, col_start, col_end), ends exclusive."""
+        x, y, w, h = self.rect
+        px = self.cell_px
+        r0 = self.offset_y // px
+        c0 = self.offset_x // px
+        r1 = min(self.rows, (self.offset_y + h + px - 1) // px)
+        c1 = min(self.cols, (self.offset_x + w + px - 1) // px)
+        return r0, r1, c0, c1
+
+    def cell_to_screen(self, row, col):
+        """Top-left screen pixel of a cell."""
+        x, y, w, h = self.rect
+        return (x + col * self.cell_px - self.offset_x,
+                y + row * self.cell_px - self.offset_y)
+
+    def screen_to_cell(self, pos):
+        """Return (row, col) under a screen position, or None if off the board."""
+        x, y, w, h = self.rect
+        px, py = pos
+        if not (x <= px < x + w and y <= py < y + h):
+            return None
+        col = (px - x + self.offset_x) // self.cell_px
+        row = (py - y + self.offset_y) // self.cell_px
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def state(self):
+        """Key that changes whenever the visible mapping changes."""
+        return (self.offset_x, self.offset_y, self.zoom_index, self.rect)
+
+# -------------------- RENDERER --------------------
+class BoardRenderer:
+    """Draws the visible part of a board from cached per-zoom sprites."""
+    def __init__(self, viewport, max_zoom_levels=3):
+        self.viewport = viewport
+        self.max_zoom_levels = max_zoom_levels
+        self.sprites = {}  # cell_px -> {cell value: Surface}
+        self.dirty = bytearray(b'\x01' * (viewport.rows * viewport.cols))
+        self.last_state = None
+        self.drag_start = None
+
+    def mark_dirty(self, row, col):
+        self.dirty[row * self.viewport.cols + col] = 1
+
+    def mark_cells(self, cells):
+        """Mark changed (row, col) cells; None marks every cell"""
+        if cells is None:
+            self.mark_all_dirty()
+            return
+        for row, col in cells:
+            self.mark_dirty(row, col)
+
+    def mark_all_dirty(self):
+        self.dirty[:] = b'\x01' * len(self.dirty)
+
+    def get_sprites(self, cell_px):
+        """Return the sprite set for a cell size, building it on first use."""
+        sprites = self.sprites.get(cell_px)
+        if sprites is None:
+            if len(self.sprites) >= self.max_zoom_levels:
+                # Drop the oldest zoom level
+                del self.sprites[next(iter(self.sprites))]
+            sprites = self.sprites[cell_px] = self.build_sprites(cell_px)
+        return sprites
+
+    def build_sprites(self, cell_px):
+        line = max(1, cell_px // 30)
+        empty = pygame.Surface((cell_px, cell_px))
+        empty.fill(BG_COLOR)
+        pygame.draw.rect(empty, LINE_COLOR, empty.get_rect(), line)
+
+        margin = max(1, cell_px // 6)
+        stroke = max(1, cell_px // 9)
+        cross = empty.copy()
+        pygame.draw.line(cross, CROSS_COLOR, (margin, margin),
+                         (cell_px - margin, cell_px - margin), stroke)
+        pygame.draw.line(cross, CROSS_COLOR, (margin, cell_px - margin),
+                         (cell_px - margin, margin), stroke)
+
+        circle = empty.copy()
+        pygame.draw.circle(circle, CIRCLE_COLOR, (cell_px // 2, cell_px // 2),
+                           max(1, cell_px // 3), stroke)
+        return {0: empty, 1: cross, 2: circle}
+
+    def draw(self, surface, board):
+        """Blit visible cells that changed; redraw all visible cells if the view moved.
+
+        surface must still hold what the previous call drew. Returns the
+        number of cells blitted.
+        """
+        view = self.viewport
+        sprites = self.get_sprites(view.cell_px)
+        state = view.state()
+        full = state != self.last_state
+        self.last_state = state
+
+        r0, r1, c0, c1 = view.visible_range()
+        cols = view.cols
+        dirty = self.dirty
+        px = view.cell_px
+        base_x, base_y = view.cell_to_screen(r0, c0)
+
+        old_clip = surface.get_clip()
+        surface.set_clip(pygame.Rect(view.rect))
+        if full:
+            # Zoomed out, the board may not cover the viewport: clear what it used to
+            surface.fill(BG_COLOR)
+        blits = []
+        for r in range(r0, r1):
+            row = board[r]
+            y = base_y + (r - r0) * px
+            i = r * cols + c0
+            for c in range(c0, c1):
+                if full or dirty[i]:
+                    dirty[i] = 0
+                    blits.append((sprites[row[c]], (base_x + (c - c0) * px, y)))
+                i += 1
+        surface.blits(blits, doreturn=False)
+        surface.set_clip(old_clip)
+        return len(blits)
+
+    def handle_event(self, event):
+        """Pan with right-drag or arrow keys, zoom with the mouse wheel.
+
+        Returns True if the event changed the view.
+        """
+        view = self.viewport
+        if event.type == pygame.MOUSEWHEEL:
+            return view.zoom(event.y, pygame.mouse.get_pos())
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+            self.drag_start = event.pos
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            self.drag_start = None
+        elif event.type == pygame.MOUSEMOTION and self.drag_start:
+            dx = self.drag_start[0] - event.pos[0]
+            dy = self.drag_start[1] - event.pos[1]
+            self.drag_start = event.pos
+            view.pan(dx, dy)
+            return True
+        elif event.type == pygame.KEYDOWN:
+            step = view.cell_px
+            moves = {pygame.K_LEFT: (-step, 0), pygame.K_RIGHT: (step, 0),
+                     pygame.K_UP: (0, -step), pygame.K_DOWN: (0, step)}
+            if event.key in moves:
+                view.pan(*moves[event.key])
+                return True
+        return False
@@ -0,0 +1,139 @@
+# eventlog.py
+"""Structured event log with levels, a ring buffer and batched file writes.
+
+Logging an event appends a small tuple to an in-memory batch; a background
+thread writes batches to a JSON-lines file. The game loop never waits on
+stdout or the disk. The most recent events are also kept in a ring buffer
+so they can be inspected (or dumped) without reading the file back.
+
+Events below the current level return before building anything. For calls
+in hot paths, check `log.debug_enabled` first so even the keyword arguments
+are skipped:
+
+    if log.debug_enabled:
+        log.debug('mouse_click', x=mx, y=my)
+"""
+import atexit
+import collections
+import json
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: 'debug', INFO: 'info', WARNING: 'warning', ERROR: 'error'}
+
+class EventLogger:
+    def __init__(self, path='game_log.jsonl', level=INFO, echo_level=WARNING,
+                 capacity=1024, batch_size=256, flush_interval=1.0):
+        self.path = path
+        self.echo_level = echo_level  # events at or above this also go to stderr
+        self.ring = collections.deque(maxlen=capacity)
+        self.batch = []
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.writer = None
+        self.closed = False
+        self.dropped = 0
+        self.set_level(level)
+
+    def set_level(self, level):
+        self.level = level
+        self.debug_enabled = level <= DEBUG
+
+    def log(self, level, event, /, **fields):
+        if level < self.level:
+            return
+        record = (time.time(), level, event, fields)
+        self.ring.append(record)
+        if level >= self.echo_level:
+            print(format_record(record), file=sys.stderr)
+        if self.closed:
+            return
+        with self.lock:
+            self.batch.append(record)
+            full = len(self.batch) >= self.batch_size
+        if self.writer is None:
+            self.start()
+        if full:
+            self.wakeup.set()
+
+    def debug(self, event, /, **fields):
+        if self.debug_enabled:
+            self.log(DEBUG, event, **fields)
+
+    def info(self, event, /, **fields):
+        self.log(INFO, event, **fields)
+
+    def warning(self, event, /, **fields):
+        self.log(WARNING, event, **fields)
+
+    def error(self, event, /, **fields):
+        self.log(ERROR, event, **fields)
+
+    def recent(self, count=None):
+        """The newest events from the ring buffer, oldest first, as dicts"""
+        records = list(self.ring)
+        if count is not None:
+            records = records[-count:]
+        return [record_dict(record) for record in records]
+
+    # ----------------- BACKGROUND WRITER -----------------
+    def start(self):
+        with self.lock:
+            if self.writer is not None:
+                return
+            self.writer = threading.Thread(target=self.run, name='event-log', daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write the pending batch with a single write call"""
+        with self.lock:
+            batch, self.batch = self.batch, []
+        if not batch:
+            return
+        lines = ''.join(json.dumps(record_dict(record), default=str) + '\n' for record in batch)
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+        except OSError:
+            # Never let logging take the game down
+            self.dropped += len(batch)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.wakeup.set()
+        if self.writer is not None and self.writer is not threading.current_thread():
+            self.writer.join(timeout=2)
+        self.flush()
+
+def record_dict(record):
+    timestamp, level, event, fields = record
+    result = {'time': round(timestamp, 3), 'level': LEVEL_NAMES.get(level, level), 'event': event}
+    for key, value in fields.items():
+        # The standard keys win over same-named fields
+        result.setdefault(key, value)
+    return result
+
+def format_record(record):
+    timestamp, level, event, fields = record
+    details = ' '.join(f"{key}={value}" for key, value in fields.items())
+    return f"[{LEVEL_NAMES.get(level, level)}] {event} {details}".rstrip()
+
+# Shared logger for the game
+log = EventLogger()
@@ -1,16 +1,36 @@
 # game.py
+import random
+
+# Seconds per move for each timer mode (None: no limit)
+TIMER_MODES = {
+    'no_timer': None,
+    'relaxed': 15,    # 15 seconds per move
+    'normal': 5,      # 5 seconds per move
+    'speed': 3        # 3 seconds per move
+}
 
 def create_board():
     """Create a new empty 3x3 board."""
-    return [[0]*3 for _ in range(3)]
+    return Board()
 
 def make_move(board, row, col, player):
     """Make a move if the cell is empty. Return True if successful."""
     if board[row][col] == 0:
         board[row][col] = player
+        if isinstance(board, Board):
+            board.toggle(row, col, player)
+            board.turn = 3 - player
         return True
     return False
 
+def unmake_move(board, row, col):
+    """Take back the move in a cell; its player is to move again."""
+    player = board[row][col]
+    board[row][col] = 0
+    if player and isinstance(board, Board):
+        board.toggle(row, col, player)
+        board.turn = player
+
 def check_winner(board):
     """Check the winner and return (winner, winning_cells).
     winner: 0=ongoing, 1=X, 2=O, -1=tie
@@ -33,3 +53,112 @@ def check_winner(board):
         return -1, []
     # Ongoing
     return 0, []
+
+# Every row, column and diagonal
+LINES = ([[(r, 0), (r, 1), (r, 2)] for r in range(3)] +
+         [[(0, c), (1, c), (2, c)] for c in range(3)] +
+         [[(0, 0), (1, 1), (2, 2)], [(0, 2), (1, 1), (2, 0)]])
+
+def count_threats(board, player):
+    """Count lines where player has two marks and the third cell is empty."""
+    threats = 0
+    for line in LINES:
+        values = [board[r][c] for r, c in line]
+        if values.count(player) == 2 and values.count(0) == 1:
+            threats += 1
+    return threats
+
+# ----------------- SYMMETRY -----------------
+# The board has 8 symmetries (4 rotations, each optionally mirrored). Cells
+# are numbered row * 3 + col; CELL_MAPS[s][i] is where cell i ends up under
+# symmetry s, and INVERSE_MAPS[s] undoes it.
+def _symmetry_maps():
+    maps = []
+    for mirror in (False, True):
+        for turns in range(4):
+            cell_map = []
+            for i in range(9):
+                r, c = divmod(i, 3)
+                if mirror:
+                    c = 2 - c
+                for _ in range(turns):
+                    r, c = c, 2 - r
+                cell_map.append(r * 3 + c)
+            maps.append(tuple(cell_map))
+    return maps
+
+CELL_MAPS = _symmetry_maps()
+INVERSE_MAPS = [tuple(cell_map.index(i) for i in range(9)) for cell_map in CELL_MAPS]
+
+def board_cells(board):
+    """The board as a flat tuple of 9 cells."""
+    return tuple(cell for row in board for cell in row)
+
+def transform_cells(cells, symmetry):
+    out = [0] * 9
+    for i, target in enumerate(CELL_MAPS[symmetry]):
+        out[target] = cells[i]
+    return tuple(out)
+
+def canonical(board):
+    """Return (cells, symmetry): the smallest of the 8 symmetric forms and how to reach it."""
+    cells = board_cells(board)
+    return min((transform_cells(cells, s), s) for s in range(len(CELL_MAPS)))
+
+def cells_to_board(cells):
+    return [list(cells[r * 3:r * 3 + 3]) for r in range(3)]
+
+def untransform_cell(row, col, symmetry):
+    """Map a cell of a transformed board back to the original board."""
+    return divmod(INVERSE_MAPS[symmetry][row * 3 + col], 3)
+
+# ----------------- ZOBRIST KEYS -----------------
+# A random 64-bit number per (cell, player), and one more for "O to move".
+# A position's key is the XOR of the numbers of its marks, so a move or its
+# undo updates the key with one XOR. The seed is fixed so keys agree across
+# processes (server workers, anything saved to disk).
+_zobrist_random = random.Random(0x5EED7AC7)
+ZOBRIST = [(_zobrist_random.getrandbits(64), _zobrist_random.getrandbits(64)) for _ in range(9)]
+SIDE_KEY = _zobrist_random.getrandbits(64)
+# SYMMETRIC_ZOBRIST[cell][player - 1][s]: the number of the cell this one lands on
+# under symmetry s, so one XOR per symmetry keeps all 8 symmetric keys current
+SYMMETRIC_ZOBRIST = [tuple(tuple(ZOBRIST[cell_map[i]][p] for cell_map in CELL_MAPS) for p in range(2))
+                     for i in range(9)]
+
+class Board(list):
+    """A 3x3 board (a list of rows) that keeps its Zobrist keys up to date.
+
+    make_move() and unmake_move() update the keys; after writing cells
+    directly, call rehash(). Plain lists of rows still work everywhere.
+    """
+    def __init__(self, rows=None, turn=None):
+        super().__init__([list(row) for row in rows] if rows is not None else [[0] * 3 for _ in range(3)])
+        self.rehash(turn)
+
+    def rehash(self, turn=None):
+        """Recompute the keys from the cells; turn defaults to whoever has fewer marks"""
+        keys = [0] * len(CELL_MAPS)
+        for i, cell in enumerate(board_cells(self)):
+            if cell:
+                keys = [k ^ z for k, z in zip(keys, SYMMETRIC_ZOBRIST[i][cell - 1])]
+        self.keys = keys  # keys[s]: key of the board under symmetry s (0 is the identity)
+        if turn is None:
+            cells = board_cells(self)
+            turn = 1 if cells.count(1) == cells.count(2) else 2
+        self.turn = turn  # player to move
+
+    def toggle(self, row, col, player):
+        """XOR a mark in or out of the keys"""
+        self.keys = [k ^ z for k, z in zip(self.keys, SYMMETRIC_ZOBRIST[row * 3 + col][player - 1])]
+
+    @property
+    def key(self):
+        """64-bit key of the position, side to move included"""
+        return self.keys[0] ^ (SIDE_KEY if self.turn == 2 else 0)
+
+    def canonical_key(self):
+        """Key shared by all 8 symmetric forms of the position"""
+        return min(self.keys) ^ (SIDE_KEY if self.turn == 2 else 0)
+
+    def copy(self):
+        return Board(self, self.turn)
@@ -0,0 +1,534 @@
+# gomoku.py
+"""Gomoku engine: threat-space search over incremental pattern tables.
+
+    python gomoku.py [--size 15] [--time 3] [--moves "7,7 7,8"] [--games N]
+
+Five in a row (or more) on a 15x15 board. GomokuBoard keeps, for every
+empty cell and each of the four line directions, the class of the pattern
+a stone there would make for each player: five, open four, four, open
+three, three, two. A cell's class in one direction depends only on the
+2k-1 cells centred on it along that line, packed two bits a cell into an
+integer code, and each code is classified once and cached. Placing or
+removing a stone only changes the codes of the 2k-1 cells around it in
+each direction, so a move costs O(k) code updates and table lookups; the
+board is never rescanned. The same updates keep the sets of cells where
+each player makes five, a four, an open four or an open three, and a
+running pattern score per player.
+
+GomokuEngine answers in order: take a five, block the opponent's, make an
+open four, then look for a victory by continuous fours (VCF), then by
+continuous threats (VCT: fours and open threes, the defender allowed any
+blocking move or counter-four). Without a forced win it falls back to an
+iterative-deepening alpha-beta over the best pattern-scored cells,
+skipping moves that leave the opponent a VCF. Every stage stops at its
+deadline, so a move fits the Speed timer.
+"""
+import argparse
+import heapq
+import random
+import time
+
+from game import TIMER_MODES
+
+SIZE = 15
+K = 5
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+EMPTY, WALL = 0, 3  # line code values besides the players 1 and 2
+
+# Pattern classes along one line, for a stone placed on the cell
+NONE, TWO, THREE, OPEN_THREE, FOUR, OPEN_FOUR, FIVE = range(7)
+WEIGHTS = (0, 2, 12, 60, 70, 1000, 100000)
+WIN_SCORE = 1 << 30
+
+VCF_DEPTH = 12  # attacker fours
+VCT_DEPTH = 5  # attacker fours and threes
+VCT_WIDTH = 12  # threats tried per attacker move in VCT
+SEARCH_WIDTH = 10  # alpha-beta candidates per node
+SEARCH_DEPTH = 8
+SAFETY_CHECK = 0.05  # seconds of opponent VCF search per alpha-beta root move
+TIME_MARGIN = 0.85  # share of the time limit to use
+ZOBRIST_SEED = 0x60B0C0
+
+# ----------------- PATTERNS -----------------
+_patterns = {}  # k -> {line code: (class for X, class for O)}
+
+def classify(code, k=K):
+    """Classes of an X and of an O stone on the centre of a line code (2 bits a cell, centre empty)"""
+    cache = _patterns.setdefault(k, {})
+    found = cache.get(code)
+    if found is None:
+        line = [(code >> (2 * i)) & 3 for i in range(2 * k - 1)]
+        found = cache[code] = (pattern_class(1, line, k), pattern_class(2, line, k))
+    return found
+
+def completions(player, line, k):
+    """Empty cells that would make five through the centre"""
+    cells = set()
+    for start in range(k):
+        window = line[start:start + k]
+        if window.count(player) == k - 1 and EMPTY in window:
+            cells.add(start + window.index(EMPTY))
+    return cells
+
+def pattern_class(player, line, k):
+    centre = k - 1
+    line = list(line)
+    line[centre] = player
+    best = 0
+    for start in range(k):
+        window = line[start:start + k]
+        if all(cell in (player, EMPTY) for cell in window):
+            best = max(best, window.count(player))
+    if best == k:
+        return FIVE
+    finishing = completions(player, line, k)
+    if len(finishing) >= 2:
+        return OPEN_FOUR
+    if finishing:
+        return FOUR
+    # An open three: one more stone somewhere makes an open four
+    for cell, value in enumerate(line):
+        if value == EMPTY:
+            line[cell] = player
+            open_four = len(completions(player, line, k)) >= 2
+            line[cell] = EMPTY
+            if open_four:
+                return OPEN_THREE
+    if best >= 3:
+        return THREE
+    if best >= 2:
+        return TWO
+    return NONE
+
+# Which threat sets a cell belongs in, from its classes in the four directions
+IN_FIVES, IN_OPEN_FOURS, IN_FOURS, IN_THREES, ACTIVE = 1, 2, 4, 8, 16
+_threats = {}  # (class pair per direction) -> (X flags, O flags)
+
+def threat_flags(pairs):
+    flags = []
+    for player in (1, 2):
+        classes = [pair[player - 1] for pair in pairs]
+        top = max(classes)
+        fours = sum(1 for c in classes if c >= FOUR)
+        found = 0
+        if top == FIVE:
+            found |= IN_FIVES
+        elif fours:
+            found |= IN_FOURS
+            if top == OPEN_FOUR or fours >= 2:
+                found |= IN_OPEN_FOURS
+        if OPEN_THREE in classes:
+            found |= IN_THREES
+        if top > NONE:
+            found |= ACTIVE
+        flags.append(found)
+    found = _threats[pairs] = tuple(flags)
+    return found
+
+# ----------------- BOARD -----------------
+class GomokuBoard:
+    def __init__(self, size=SIZE, k=K):
+        self.size = size
+        self.k = k
+        radius = k - 1
+        n = size * size
+        self.cells = [EMPTY] * n
+        self.moves = []
+        rng = random.Random(ZOBRIST_SEED)
+        self.zobrist = [None] + [[rng.getrandbits(64) for _ in range(n)] for _ in range(2)]
+        self.hash = 0
+
+        # around[cell][d]: (neighbour, shift of cell in the neighbour's code) along direction d
+        self.around = []
+        self.codes = [[0] * n for _ in DIRECTIONS]
+        for cell in range(n):
+            r, c = divmod(cell, size)
+            lines = []
+            for d, (dr, dc) in enumerate(DIRECTIONS):
+                line = []
+                for j in range(-radius, radius + 1):
+                    nr, nc = r + j * dr, c + j * dc
+                    if 0 <= nr < size and 0 <= nc < size:
+                        line.append((nr * size + nc, 2 * (radius - j)))
+                    else:
+                        self.codes[d][cell] |= WALL << (2 * (radius + j))
+                lines.append(line)
+            self.around.append(lines)
+
+        self.patterns = _patterns.setdefault(k, {})
+        self.classes = [[(NONE, NONE)] * n for _ in DIRECTIONS]  # per direction: (X class, O class)
+        self.value = [None, [0] * n, [0] * n]  # WEIGHTS summed over directions
+        self.score = [None, 0, 0]  # value summed over empty cells
+        self.fives = [None, set(), set()]  # cells that make five
+        self.open_fours = [None, set(), set()]  # cells that make an open four or a double four
+        self.fours = [None, set(), set()]  # cells that make any four
+        self.threes = [None, set(), set()]  # cells that make an open three
+        self.active = set()  # empty cells with any pattern for either player
+        self.flags = [(0, 0)] * n  # threat_flags() of each cell, per player
+        self.threat_sets = [None] + [((IN_FIVES, self.fives[p]), (IN_OPEN_FOURS, self.open_fours[p]),
+                                      (IN_FOURS, self.fours[p]), (IN_THREES, self.threes[p])) for p in (1, 2)]
+        for cell in range(n):
+            for d in range(len(DIRECTIONS)):
+                self.refresh(cell, d)
+            self.sort(cell)
+
+    @classmethod
+    def from_rows(cls, board, k=K):
+        """From a square list of rows of 0/1/2"""
+        position = cls(len(board), k)
+        for r, row in enumerate(board):
+            for c, player in enumerate(row):
+                if player:
+                    position.play(r * position.size + c, player)
+        return position
+
+    def play(self, cell, player):
+        self.cells[cell] = player
+        self.moves.append(cell)
+        self.hash ^= self.zobrist[player][cell]
+        self.update(cell, player)
+
+    def undo(self):
+        cell = self.moves.pop()
+        player = self.cells[cell]
+        self.cells[cell] = EMPTY
+        self.hash ^= self.zobrist[player][cell]
+        self.update(cell, -player)
+
+    def update(self, cell, change):
+        """Patch the codes around a cell whose value changed by `change`; O(k) per direction"""
+        changed = {cell}
+        for d, line in enumerate(self.around[cell]):
+            codes = self.codes[d]
+            for neighbour, shift in line:
+                codes[neighbour] += change << shift
+                if self.refresh(neighbour, d):
+                    changed.add(neighbour)
+        for neighbour in changed:
+            self.sort(neighbour)
+
+    def refresh(self, cell, d):
+        """Reclassify a cell along one direction; True if either player's class changed"""
+        if self.cells[cell] == EMPTY:
+            code = self.codes[d][cell]
+            new = self.patterns.get(code) or classify(code, self.k)
+        else:
+            new = (NONE, NONE)
+        old = self.classes[d][cell]
+        if new == old:
+            return False
+        self.classes[d][cell] = new
+        for player in (1, 2):
+            gain = WEIGHTS[new[player - 1]] - WEIGHTS[old[player - 1]]
+            self.value[player][cell] += gain
+            self.score[player] += gain
+        return True
+
+    def sort(self, cell):
+        """File a cell under the threat sets its four directions put it in"""
+        pairs = tuple(classes[cell] for classes in self.classes)
+        new = _threats.get(pairs) or threat_flags(pairs)
+        old = self.flags[cell]
+        if new == old:
+            return
+        self.flags[cell] = new
+        for player in (1, 2):
+            changed = new[player - 1] ^ old[player - 1]
+            for flag, cells in self.threat_sets[player]:
+                if changed & flag:
+                    mark(cells, cell, new[player - 1] & flag)
+        mark(self.active, cell, (new[0] | new[1]) & ACTIVE)
+
+    def stoppers(self, player):
+        """Cells on the lines of player's open-four threats: every move that might stop them"""
+        cells = set()
+        for threat in self.open_fours[player]:
+            for d, line in enumerate(self.around[threat]):
+                if self.classes[d][threat][player - 1] >= FOUR:
+                    cells.update(t for t, _ in line if self.cells[t] == EMPTY)
+        return cells
+
+def mark(cells, cell, member):
+    if member:
+        cells.add(cell)
+    else:
+        cells.discard(cell)
+
+# ----------------- SEARCH -----------------
+class TimeUp(Exception):
+    pass
+
+class GomokuEngine:
+    def __init__(self, board, time_limit=None):
+        self.board = board
+        self.time_limit = TIMER_MODES['speed'] if time_limit is None else time_limit
+        self.deadline = None
+        self.nodes = 0
+        self.memo = {}
+        self.stage = None  # how the last move was found
+
+    def tick(self):
+        self.nodes += 1
+        if self.nodes & 127 == 0 and time.perf_counter() > self.deadline:
+            raise TimeUp
+
+    def best_move(self, player):
+        """Cell to play for player, or None on a full board"""
+        board = self.board
+        opponent = 3 - player
+        start = time.perf_counter()
+        budget = self.time_limit * TIME_MARGIN
+        self.nodes = 0
+        if EMPTY not in board.cells:
+            return None
+        if not board.moves:
+            self.stage = 'opening'
+            return board.size // 2 * board.size + board.size // 2
+        for stage, cells in (('five', board.fives[player]), ('block', board.fives[opponent]),
+                             ('open four', board.open_fours[player])):
+            if cells:
+                self.stage = stage
+                return min(cells)
+        for stage, threes, share in (('vcf', False, 0.25), ('vct', True, 0.5)):
+            cell = self.threat_search(player, threes, start + budget * share)
+            if cell is not None:
+                self.stage = stage
+                return cell
+        self.stage = 'alpha-beta'
+        return self.alpha_beta(player, start + budget)
+
+    # ----------------- THREAT SPACE -----------------
+    def threat_search(self, player, threes, deadline):
+        """First move of a forced win by fours (and open threes if threes), or None"""
+        board = self.board
+        played = len(board.moves)
+        self.deadline = deadline
+        self.memo = {}
+        depths = range(1, VCT_DEPTH + 1) if threes else (VCF_DEPTH,)
+        try:
+            for depth in depths:
+                cell = self.attack(player, depth, threes)
+                if cell is not None:
+                    return cell
+        except TimeUp:
+            while len(board.moves) > played:
+                board.undo()
+        return None
+
+    def attack(self, player, depth, threes):
+        """Attacker to move: a cell that keeps up a winning threat sequence, or None"""
+        self.tick()
+        board = self.board
+        opponent = 3 - player
+        if board.fives[player]:
+            return min(board.fives[player])
+        if board.fives[opponent]:
+            if len(board.fives[opponent]) > 1:
+                return None
+            # Forced to block: the attack goes on only if threats are still pending
+            (block,) = board.fives[opponent]
+            board.play(block, player)
+            won = self.defend(player, depth, threes)
+            board.undo()
+            return block if won else None
+        key = (board.hash, player, depth, threes)
+        if key in self.memo:
+            return self.memo[key]
+        if board.open_fours[player]:
+            candidates = sorted(board.open_fours[player])
+        elif depth <= 0:
+            return None
+        else:
+            threats = board.fours[player] | board.threes[player] if threes else board.fours[player]
+            candidates = sorted(threats, key=lambda c: -board.value[player][c] - board.value[opponent][c])
+            if threes:
+                candidates = candidates[:VCT_WIDTH]
+        found = None
+        for cell in candidates:
+            board.play(cell, player)
+            won = self.defend(player, depth - 1, threes)
+            board.undo()
+            if won:
+                found = cell
+                break
+        self.memo[key] = found
+        return found
+
+    def defend(self, player, depth, threes):
+        """Defender to move against player's threats: True if every defence loses"""
+        self.tick()
+        board = self.board
+        opponent = 3 - player
+        if board.fives[opponent]:
+            return False
+        if len(board.fives[player]) > 1:
+            return True
+        if board.fives[player]:
+            defences = board.fives[player]
+        elif board.open_fours[player]:
+            # Block somewhere on the threat's lines, or counter with a four
+            defences = board.stoppers(player) | board.fours[opponent]
+        else:
+            return False
+        for cell in sorted(defences):
+            board.play(cell, opponent)
+            won = self.attack(player, depth, threes) is not None
+            board.undo()
+            if not won:
+                return False
+        return True
+
+    # ----------------- ALPHA-BETA -----------------
+    def candidates(self, player):
+        """Moves worth searching, best first"""
+        board = self.board
+        opponent = 3 - player
+        if board.fives[player]:
+            return [min(board.fives[player])]
+        if board.fives[opponent]:
+            return sorted(board.fives[opponent])
+        if board.open_fours[player]:
+            return [min(board.open_fours[player])]
+        cells = board.active
+        if board.open_fours[opponent]:
+            # The opponent threatens an open four: stop it or make a four first
+            cells = board.stoppers(opponent) | board.fours[player]
+        mine, theirs = board.value[player], board.value[opponent]
+        return heapq.nlargest(SEARCH_WIDTH, cells, key=lambda c: (mine[c] + theirs[c], -c))
+
+    def evaluate(self, player):
+        return self.board.score[player] - self.board.score[3 - player]
+
+    def negamax(self, player, depth, alpha, beta):
+        self.tick()
+        board = self.board
+        opponent = 3 - player
+        if board.fives[player]:
+            return WIN_SCORE
+        if len(board.fives[opponent]) > 1:
+            return -WIN_SCORE
+        if depth == 0:
+            return self.evaluate(player)
+        moves = self.candidates(player)
+        if not moves:
+            return 0
+        best = -WIN_SCORE - 1
+        for cell in moves:
+            board.play(cell, player)
+            score = -self.negamax(opponent, depth - 1, -beta, -alpha)
+            board.undo()
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+    def alpha_beta(self, player, deadline):
+        """Iterative deepening until the deadline; the best move of the deepest finished search"""
+        board = self.board
+        opponent = 3 - player
+        played = len(board.moves)
+        moves = self.candidates(player) or [cell for cell, value in enumerate(board.cells) if value == EMPTY]
+        # Drop moves the opponent answers with a win by fours, unless all of them are
+        safe = []
+        for cell in moves:
+            board.play(cell, player)
+            lost = self.threat_search(opponent, False, min(deadline, time.perf_counter() + SAFETY_CHECK)) is not None
+            board.undo()
+            if not lost:
+                safe.append(cell)
+        moves = safe or moves
+        best = moves[0]
+        self.deadline = deadline
+        depth = 1
+        try:
+            while depth <= SEARCH_DEPTH and time.perf_counter() < deadline:
+                scores = {}
+                alpha = -WIN_SCORE - 1
+                for cell in moves:
+                    board.play(cell, player)
+                    scores[cell] = -self.negamax(opponent, depth - 1, -WIN_SCORE - 1, -alpha)
+                    board.undo()
+                    alpha = max(alpha, scores[cell])
+                moves.sort(key=lambda c: -scores[c])
+                best = moves[0]
+                if scores[best] >= WIN_SCORE:
+                    break
+                depth += 1
+        except TimeUp:
+            while len(board.moves) > played:
+                board.undo()
+        return best
+
+def gomoku_ai(board, player=2, time_limit=None):
+    """Move for player on a square board of rows of 0/1/2; (None, None) if it is full"""
+    position = GomokuBoard.from_rows(board)
+    cell = GomokuEngine(position, time_limit).best_move(player)
+    if cell is None:
+        return None, None
+    return divmod(cell, position.size)
+
+# ----------------- COMMAND LINE -----------------
+def win_or_block(board, player, rng):
+    """Baseline in the spirit of medium_ai: win, block, else near the stones"""
+    for cells in (board.fives[player], board.fives[3 - player]):
+        if cells:
+            return min(cells)
+    near = sorted(board.active) or [board.size // 2 * board.size + board.size // 2]
+    return rng.choice(near)
+
+def match(games, size, time_limit, seed=0):
+    """The engine against win_or_block, alternating colours; prints results and the slowest move"""
+    rng = random.Random(seed)
+    wins = 0
+    slowest = 0.0
+    for game_number in range(games):
+        board = GomokuBoard(size)
+        engine = GomokuEngine(board, time_limit)
+        engine_player = 1 + game_number % 2
+        player = 1
+        winner = 0
+        while winner == 0 and len(board.moves) < size * size:
+            if player == engine_player:
+                start = time.perf_counter()
+                cell = engine.best_move(player)
+                slowest = max(slowest, time.perf_counter() - start)
+            else:
+                cell = win_or_block(board, player, rng)
+            if cell in board.fives[player]:
+                winner = player
+            board.play(cell, player)
+            player = 3 - player
+        wins += winner == engine_player
+        result = 'engine' if winner == engine_player else 'baseline' if winner else 'draw'
+        print(f"game {game_number + 1}: engine plays {'XO'[engine_player - 1]}, {result} after {len(board.moves)} moves")
+    print(f"engine won {wins}/{games}; slowest move {slowest:.2f} s (limit {time_limit} s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=SIZE)
+    parser.add_argument('--time', type=float, default=TIMER_MODES['speed'], help='seconds per move')
+    parser.add_argument('--moves', default='', help='moves so far, X first: "row,col row,col ..."')
+    parser.add_argument('--games', type=int, help='play this many games against a win-or-block baseline')
+    args = parser.parse_args()
+    if args.games:
+        match(args.games, args.size, args.time)
+        return
+    board = GomokuBoard(args.size)
+    for i, move in enumerate(args.moves.split()):
+        row, col = (int(v) for v in move.split(','))
+        board.play(row * args.size + col, 1 + i % 2)
+    player = 1 + len(board.moves) % 2
+    engine = GomokuEngine(board, args.time)
+    start = time.perf_counter()
+    cell = engine.best_move(player)
+    if cell is None:
+        print('The board is full')
+        return
+    print(f"{'XO'[player - 1]} plays {cell // args.size},{cell % args.size} ({engine.stage}) "
+          f"in {time.perf_counter() - start:.2f} s, {engine.nodes:,} nodes")
+
+if __name__ == '__main__':
+    main()
@@ -3,9 +3,10 @@ import pygame
 import math
 import time
 import random
+import layout
+from layout import WIDTH, HEIGHT
+from board_view import Viewport
 
-# Window size - increased height to accommodate timer buttons
-WIDTH, HEIGHT = 400, 650  # Increased from 600 to 650
 SQUARE_SIZE = 400 // 3
 
 # Colors
@@ -31,13 +32,32 @@ TIMER_BG_COLOR = (50, 50, 50)
 TIMER_TEXT_COLOR = (255, 255, 255)
 TIMER_WARNING_COLOR = (255, 50, 50)
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Tic Tac Toe")
-font = pygame.font.SysFont(None, 30)
-small_font = pygame.font.SysFont(None, 24)  # Smaller font for undo button
-very_small_font = pygame.font.SysFont(None, 20)  # Even smaller for timer buttons
-tiny_font = pygame.font.SysFont(None, 18)  # Even smaller for small undo button
+# Window and fonts are created by init_display(), not at import time
+screen = None
+font = None
+small_font = None
+very_small_font = None
+tiny_font = None
+stats_font = None
+
+def init_display():
+    """Initialize pygame, open the window and load fonts. Returns the screen.
+
+    Only the display and font modules are started: pygame.init() would also
+    open the audio device, which SoundManager's loader thread does later.
+    """
+    global screen, font, small_font, very_small_font, tiny_font, stats_font
+    if screen is None:
+        pygame.display.init()
+        pygame.font.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Tic Tac Toe")
+        font = pygame.font.SysFont(None, 30)
+        small_font = pygame.font.SysFont(None, 24)  # Smaller font for undo button
+        very_small_font = pygame.font.SysFont(None, 20)  # Even smaller for timer buttons
+        tiny_font = pygame.font.SysFont(None, 18)  # Even smaller for small undo button
+        stats_font = pygame.font.SysFont(None, 22)  # Move stats line
+    return screen
 
 # -------------------- ANIMATION CLASS --------------------
 class Animation:
@@ -245,6 +265,9 @@ class Animation:
 # Create global animation manager
 animation_manager = Animation()
 
+# Screen <-> cell transform for the 3x3 board; clicks and hover go through it
+board_viewport = Viewport(3, 3, (0, 0, SQUARE_SIZE * 3, SQUARE_SIZE * 3), SQUARE_SIZE)
+
 # -------------------- DRAW FUNCTIONS --------------------
 def draw_lines():
     screen.fill(BG_COLOR)
@@ -301,11 +324,11 @@ def draw_background_pattern():
 
 def draw_hover_effect(board, mouse_pos, player):
     """Show preview of move on hover"""
-    if mouse_pos[1] < SQUARE_SIZE * 3:  # Only in game board
-        row = mouse_pos[1] // SQUARE_SIZE
-        col = mouse_pos[0] // SQUARE_SIZE
+    cell = board_viewport.screen_to_cell(mouse_pos)
+    if cell:  # Only in game board
+        row, col = cell
         
-        if 0 <= row < 3 and 0 <= col < 3 and board[row][col] == 0:
+        if board[row][col] == 0:
             # Draw glowing hover effect
             center_x = col * SQUARE_SIZE + SQUARE_SIZE // 2
             center_y = row * SQUARE_SIZE + SQUARE_SIZE // 2
@@ -405,8 +428,6 @@ def draw_move_stats(move_history):
         human_moves = sum(1 for _, _, p in move_history if p == 1)
         ai_moves = total_moves - human_moves
         
-        # Use a slightly larger font
-        stats_font = pygame.font.SysFont(None, 22)  # Increased from 18 to 22
         stats_text = f"Moves: {total_moves}  (X:{human_moves}  O:{ai_moves})"
         text = stats_font.render(stats_text, True, (240, 240, 240))  # Brighter white
         
@@ -425,62 +446,47 @@ def draw_move_stats(move_history):
         # Draw text on top of background
         screen.blit(text, (text_x, text_y))
 # -------------------- BUTTONS --------------------
-def draw_difficulty_buttons(selected=None, mouse_pos=None):
-    easy_color = SELECTED_COLOR if selected == 'easy' else BUTTON_COLOR
-    medium_color = SELECTED_COLOR if selected == 'medium' else BUTTON_COLOR
-    hard_color = SELECTED_COLOR if selected == 'hard' else BUTTON_COLOR
+def _hovered_id(mouse_pos):
+    """Return the id of the widget under the mouse, or None."""
+    if not mouse_pos:
+        return None
+    hovered = layout.hit_test(mouse_pos)
+    return hovered['id'] if hovered else None
 
-    if mouse_pos:
-        if pygame.Rect(20, 410, 100, 50).collidepoint(mouse_pos) and selected != 'easy':
-            easy_color = BUTTON_HOVER_COLOR
-        if pygame.Rect(150, 410, 100, 50).collidepoint(mouse_pos) and selected != 'medium':
-            medium_color = BUTTON_HOVER_COLOR
-        if pygame.Rect(280, 410, 100, 50).collidepoint(mouse_pos) and selected != 'hard':
-            hard_color = BUTTON_HOVER_COLOR
-
-    easy_btn = pygame.Rect(20, 410, 100, 50)
-    medium_btn = pygame.Rect(150, 410, 100, 50)
-    hard_btn = pygame.Rect(280, 410, 100, 50)
-
-    pygame.draw.rect(screen, easy_color, easy_btn, border_radius=8)
-    pygame.draw.rect(screen, medium_color, medium_btn, border_radius=8)
-    pygame.draw.rect(screen, hard_color, hard_btn, border_radius=8)
-
-    screen.blit(font.render("Easy", True, BUTTON_TEXT_COLOR), (45, 425))
-    screen.blit(font.render("Medium", True, BUTTON_TEXT_COLOR), (160, 425))
-    screen.blit(font.render("Hard", True, BUTTON_TEXT_COLOR), (300, 425))
+def draw_difficulty_buttons(selected=None, mouse_pos=None):
+    hovered = _hovered_id(mouse_pos)
+    buttons = []
+    for widget in layout.widgets_for('difficulty'):
+        if selected == widget['value']:
+            color = SELECTED_COLOR
+        elif hovered == widget['id']:
+            color = BUTTON_HOVER_COLOR
+        else:
+            color = BUTTON_COLOR
+        btn = pygame.Rect(widget['rect'])
+        pygame.draw.rect(screen, color, btn, border_radius=8)
+        screen.blit(font.render(widget['label'], True, BUTTON_TEXT_COLOR), widget['label_pos'])
+        buttons.append(btn)
 
-    return easy_btn, medium_btn, hard_btn
+    return tuple(buttons)
 
 def draw_game_buttons(mouse_pos=None):
-    restart_color = BUTTON_COLOR
-    quit_color = BUTTON_COLOR
-
-    if mouse_pos:
-        if pygame.Rect(50, 470, 120, 50).collidepoint(mouse_pos):
-            restart_color = BUTTON_HOVER_COLOR
-        if pygame.Rect(230, 470, 120, 50).collidepoint(mouse_pos):
-            quit_color = BUTTON_HOVER_COLOR
-
-    restart_btn = pygame.Rect(50, 470, 120, 50)
-    quit_btn = pygame.Rect(230, 470, 120, 50)
-    pygame.draw.rect(screen, restart_color, restart_btn, border_radius=8)
-    pygame.draw.rect(screen, quit_color, quit_btn, border_radius=8)
-    screen.blit(font.render("Restart", True, BUTTON_TEXT_COLOR), (75, 485))
-    screen.blit(font.render("Quit", True, BUTTON_TEXT_COLOR), (270, 485))
-    return restart_btn, quit_btn
+    hovered = _hovered_id(mouse_pos)
+    buttons = []
+    for widget_id in ('restart', 'quit'):
+        widget = layout.widget(widget_id)
+        color = BUTTON_HOVER_COLOR if hovered == widget_id else BUTTON_COLOR
+        btn = pygame.Rect(widget['rect'])
+        pygame.draw.rect(screen, color, btn, border_radius=8)
+        screen.blit(font.render(widget['label'], True, BUTTON_TEXT_COLOR), widget['label_pos'])
+        buttons.append(btn)
+    return tuple(buttons)
 
 def draw_undo_button(mouse_pos=None):
-    # Position in bottom right corner - smaller button
-    undo_x = WIDTH - 35  # 35px from right edge
-    undo_y = HEIGHT - 90  # 90px from bottom
-    radius = 18  # Smaller radius (was 25)
-    
-    # Calculate distance from mouse to button center for hover detection
-    is_hovering = False
-    if mouse_pos:
-        distance = ((mouse_pos[0] - undo_x) ** 2 + (mouse_pos[1] - undo_y) ** 2) ** 0.5
-        is_hovering = distance <= radius
+    widget = layout.widget('undo')
+    undo_x, undo_y = widget['center']
+    radius = widget['radius']
+    is_hovering = _hovered_id(mouse_pos) == 'undo'
     
     # Draw the circular undo button
     color = UNDO_HOVER_COLOR if is_hovering else UNDO_COLOR
@@ -490,7 +496,7 @@ def draw_undo_button(mouse_pos=None):
     pygame.draw.circle(screen, (255, 255, 255), (undo_x, undo_y), radius, 2)
     
     # Use tiny font for the smaller button
-    text = tiny_font.render("Undo", True, UNDO_TEXT_COLOR)
+    text = tiny_font.render(widget['label'], True, UNDO_TEXT_COLOR)
     text_rect = text.get_rect(center=(undo_x, undo_y))
     screen.blit(text, text_rect)
     
@@ -498,30 +504,24 @@ def draw_undo_button(mouse_pos=None):
     return {'center': (undo_x, undo_y), 'radius': radius}
 
 # -------------------- TIMER FUNCTIONS --------------------
+TIMER_BUTTON_COLORS = {
+    'no_timer': TIMER_NO_COLOR,
+    'relaxed': TIMER_RELAXED_COLOR,
+    'normal': TIMER_NORMAL_COLOR,
+    'speed': TIMER_SPEED_COLOR
+}
+
 def draw_timer_buttons(timer_mode='no_timer', mouse_pos=None):
     """Draw timer mode selection buttons"""
-    timer_modes = [
-        ('no_timer', 'No Timer', TIMER_NO_COLOR),
-        ('relaxed', 'Relaxed', TIMER_RELAXED_COLOR),
-        ('normal', 'Normal', TIMER_NORMAL_COLOR),
-        ('speed', 'Speed', TIMER_SPEED_COLOR)
-    ]
-    
+    hovered = _hovered_id(mouse_pos)
     buttons = {}
-    start_x = 20
-    start_y = 580  # Moved down to make room
-    btn_width = 90
-    btn_height = 30
-    
-    for i, (mode_id, mode_name, color) in enumerate(timer_modes):
-        btn_x = start_x + i * (btn_width + 5)
-        btn_rect = pygame.Rect(btn_x, start_y, btn_width, btn_height)
+    
+    for widget in layout.widgets_for('timer'):
+        mode_id = widget['value']
+        color = TIMER_BUTTON_COLORS[mode_id]
+        btn_rect = pygame.Rect(widget['rect'])
         buttons[mode_id] = btn_rect
-        
-        # Check for hover
-        is_hovering = False
-        if mouse_pos and btn_rect.collidepoint(mouse_pos):
-            is_hovering = True
+        is_hovering = hovered == widget['id']
         
         # Draw button
         if timer_mode == mode_id:
@@ -535,7 +535,7 @@ def draw_timer_buttons(timer_mode='no_timer', mouse_pos=None):
             pygame.draw.rect(screen, (100, 100, 100), btn_rect, 1, border_radius=5)
         
         # Draw button text
-        text = very_small_font.render(mode_name, True, (255, 255, 255))
+        text = very_small_font.render(widget['label'], True, (255, 255, 255))
         text_rect = text.get_rect(center=btn_rect.center)
         screen.blit(text, text_rect)
     
@@ -626,11 +626,11 @@ def draw_difficulty_text(ai_level):
 
 # Export all functions and variables
 __all__ = [
-    'screen', 'draw_lines', 'draw_figures', 'draw_winner_line', 
+    'init_display', 'screen', 'draw_lines', 'draw_figures', 'draw_winner_line', 
     'draw_game_buttons', 'draw_scoreboard', 'draw_difficulty_buttons', 
     'draw_current_turn', 'draw_difficulty_text', 'draw_undo_button',
     'draw_timer_buttons', 'draw_timer_display', 'draw_timer_visual',
     'draw_background_pattern', 'draw_hover_effect', 'draw_highlight_last_move',
     'draw_pulsing_turn_indicator', 'draw_move_stats',
-    'SQUARE_SIZE', 'WIDTH', 'HEIGHT', 'font', 'animation_manager'
+    'SQUARE_SIZE', 'WIDTH', 'HEIGHT', 'font', 'animation_manager', 'board_viewport'
 ]
\ No newline at end of file
@@ -0,0 +1,126 @@
+# layout.py
+"""Declarative widget layout for the main window.
+
+Every clickable thing on screen is described once in WIDGETS. The renderer
+reads positions from here and the input handler asks the HitGrid which widget
+sits under a point, so neither has to draw anything to find out where a button is.
+"""
+
+# Window size - increased height to accommodate timer buttons
+WIDTH, HEIGHT = 400, 650
+
+# Size of a hit-test bucket in pixels
+GRID_CELL = 20
+
+# -------------------- WIDGET TABLE --------------------
+# kind: 'rect' uses 'rect' = (x, y, w, h); 'circle' uses 'center' and 'radius'
+# action: what the input handler does; value: argument for that action
+WIDGETS = [
+    {'id': 'board', 'kind': 'rect', 'rect': (0, 0, 400, 400), 'action': 'board'},
+
+    # Difficulty buttons
+    {'id': 'easy', 'kind': 'rect', 'rect': (20, 410, 100, 50),
+     'action': 'difficulty', 'value': 'easy', 'label': 'Easy', 'label_pos': (45, 425)},
+    {'id': 'medium', 'kind': 'rect', 'rect': (150, 410, 100, 50),
+     'action': 'difficulty', 'value': 'medium', 'label': 'Medium', 'label_pos': (160, 425)},
+    {'id': 'hard', 'kind': 'rect', 'rect': (280, 410, 100, 50),
+     'action': 'difficulty', 'value': 'hard', 'label': 'Hard', 'label_pos': (300, 425)},
+
+    # Game buttons
+    {'id': 'restart', 'kind': 'rect', 'rect': (50, 470, 120, 50),
+     'action': 'restart', 'label': 'Restart', 'label_pos': (75, 485)},
+    {'id': 'quit', 'kind': 'rect', 'rect': (230, 470, 120, 50),
+     'action': 'quit', 'label': 'Quit', 'label_pos': (270, 485)},
+
+    # Undo button in bottom right corner
+    {'id': 'undo', 'kind': 'circle', 'center': (WIDTH - 35, HEIGHT - 90), 'radius': 18,
+     'action': 'undo', 'label': 'Undo'},
+
+    # Timer mode buttons
+    {'id': 'timer_no_timer', 'kind': 'rect', 'rect': (20, 580, 90, 30),
+     'action': 'timer', 'value': 'no_timer', 'label': 'No Timer'},
+    {'id': 'timer_relaxed', 'kind': 'rect', 'rect': (115, 580, 90, 30),
+     'action': 'timer', 'value': 'relaxed', 'label': 'Relaxed'},
+    {'id': 'timer_normal', 'kind': 'rect', 'rect': (210, 580, 90, 30),
+     'action': 'timer', 'value': 'normal', 'label': 'Normal'},
+    {'id': 'timer_speed', 'kind': 'rect', 'rect': (305, 580, 90, 30),
+     'action': 'timer', 'value': 'speed', 'label': 'Speed'},
+]
+
+def bounds(widget):
+    """Return the (x, y, w, h) bounding box of a widget."""
+    if widget['kind'] == 'circle':
+        cx, cy = widget['center']
+        r = widget['radius']
+        return (cx - r, cy - r, 2 * r + 1, 2 * r + 1)
+    return widget['rect']
+
+def contains(widget, pos):
+    """Exact shape test for a point."""
+    px, py = pos
+    if widget['kind'] == 'circle':
+        cx, cy = widget['center']
+        return (px - cx) ** 2 + (py - cy) ** 2 <= widget['radius'] ** 2
+    x, y, w, h = widget['rect']
+    return x <= px < x + w and y <= py < y + h
+
+# -------------------- HIT-TEST INDEX --------------------
+class HitGrid:
+    """Uniform bucket grid mapping a point to the widget under it.
+
+    Each bucket holds the few widgets whose bounding box overlaps it, so a
+    lookup is one bucket fetch plus an exact test on a handful of candidates
+    regardless of how many widgets the layout has.
+    """
+    def __init__(self, widgets, width, height, cell=GRID_CELL):
+        self.cell = cell
+        self.cols = (width + cell - 1) // cell
+        self.rows = (height + cell - 1) // cell
+        self.buckets = [[] for _ in range(self.cols * self.rows)]
+        self.by_id = {}
+        for widget in widgets:
+            self.add(widget)
+
+    def add(self, widget):
+        self.by_id[widget['id']] = widget
+        x, y, w, h = bounds(widget)
+        c0 = max(0, x // self.cell)
+        r0 = max(0, y // self.cell)
+        c1 = min(self.cols - 1, (x + w - 1) // self.cell)
+        r1 = min(self.rows - 1, (y + h - 1) // self.cell)
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                # Later widgets are drawn on top, so they are tested first
+                self.buckets[r * self.cols + c].insert(0, widget)
+
+    def hit_test(self, pos):
+        """Return the topmost widget containing pos, or None."""
+        px, py = pos
+        if px < 0 or py < 0:
+            return None
+        c = px // self.cell
+        r = py // self.cell
+        if c >= self.cols or r >= self.rows:
+            return None
+        for widget in self.buckets[r * self.cols + c]:
+            if contains(widget, pos):
+                return widget
+        return None
+
+    def __getitem__(self, widget_id):
+        return self.by_id[widget_id]
+
+# Hit-test index for the main window
+hit_grid = HitGrid(WIDGETS, WIDTH, HEIGHT)
+
+def hit_test(pos):
+    """Return the widget under pos in the main window, or None."""
+    return hit_grid.hit_test(pos)
+
+def widget(widget_id):
+    """Look up a widget by id."""
+    return hit_grid[widget_id]
+
+def widgets_for(action):
+    """Return all widgets bound to an action, in layout order."""
+    return [w for w in WIDGETS if w['action'] == action]
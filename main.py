@@ -1,221 +1,36 @@
+import time
+startup_time = time.perf_counter()
+
 import pygame
 import sys
-import time
+import concurrent.futures
 from sounds import SoundManager
-from game import create_board, make_move, check_winner
+from game import create_board, make_move, check_winner, TIMER_MODES
 from ai import easy_ai, medium_ai, hard_ai
-from gui import (screen, draw_lines, draw_figures, draw_winner_line, draw_game_buttons,
+from layout import hit_test
+from timers import TimerService, pygame_poster
+from eventlog import log
+from stats_store import StatsStore
+from records import GameArchive
+from move_tree import MoveTree
+from replay import ReplayPlayer, ReplayRenderer
+from achievements import AchievementManager
+from notifications import NotificationRenderer
+import gui
+from gui import (draw_lines, draw_figures, draw_winner_line, draw_game_buttons,
                  draw_scoreboard, draw_difficulty_buttons, draw_current_turn,
                  draw_difficulty_text, draw_undo_button, draw_timer_buttons, 
-                 draw_timer_display, SQUARE_SIZE, WIDTH, HEIGHT, font,
+                 draw_timer_display, SQUARE_SIZE, WIDTH, HEIGHT,
                  draw_background_pattern, draw_hover_effect, draw_highlight_last_move,
                  draw_pulsing_turn_indicator, draw_move_stats, draw_timer_visual,
-                 animation_manager)
+                 animation_manager, board_viewport)
 
 # --------------------- CONSTANTS ---------------------
-TIMER_MODES = {
-    'no_timer': None,
-    'relaxed': 15,    # 15 seconds per move
-    'normal': 5,      # 5 seconds per move
-    'speed': 3        # 3 seconds per move
-}
-
-# --------------------- ACHIEVEMENTS SYSTEM ---------------------
-class AchievementManager:
-    def __init__(self):
-        self.achievements = {
-            'first_win': {
-                'unlocked': False, 'name': 'First Victory', 
-                'description': 'Win your first game', 'icon': '🏆'
-            },
-            'speed_demon': {
-                'unlocked': False, 'name': 'Speed Demon', 
-                'description': 'Win in Speed mode', 'icon': '⚡'
-            },
-            'perfectionist': {
-                'unlocked': False, 'name': 'Perfectionist', 
-                'description': 'Win without AI moving', 'icon': '🎯'
-            },
-            'streak_master': {
-                'unlocked': False, 'name': 'Streak Master', 
-                'description': 'Win 3 games in a row', 'icon': '⭐'
-            },
-            'undo_expert': {
-                'unlocked': False, 'name': 'Second Chance', 
-                'description': 'Use undo and win', 'icon': '↶'
-            },
-            'difficulty_master': {
-                'unlocked': False, 'name': 'Master Player', 
-                'description': 'Win against Hard AI', 'icon': '👑'
-            },
-            'fast_thinker': {
-                'unlocked': False, 'name': 'Fast Thinker', 
-                'description': 'Win with >10s left', 'icon': '⏱️'
-            },
-            'draw_specialist': {
-                'unlocked': False, 'name': 'Draw Specialist', 
-                'description': 'Achieve 3 draws', 'icon': '🤝'
-            },
-            'ai_annihilator': {
-                'unlocked': False, 'name': 'AI Annihilator', 
-                'description': 'Win 10 games total', 'icon': '💥'
-            }
-        }
-        self.current_game_stats = {
-            'moves': 0,
-            'human_moves': 0,
-            'ai_moves': 0,
-            'consecutive_wins': 0,
-            'timer_mode': 'no_timer',
-            'difficulty': None,
-            'used_undo': False
-        }
-        self.active_notifications = []
-    
-    def update_game_stats(self, **kwargs):
-        for key, value in kwargs.items():
-            if key in self.current_game_stats:
-                self.current_game_stats[key] = value
-    
-    def check_achievements(self, winner, score, time_left=None):
-        newly_unlocked = []
-        
-        # Track win streak
-        if winner == 1:
-            self.current_game_stats['consecutive_wins'] += 1
-        else:
-            self.current_game_stats['consecutive_wins'] = 0
-        
-        # Check achievements
-        if winner == 1 and not self.achievements['first_win']['unlocked']:
-            self.unlock_achievement('first_win')
-            newly_unlocked.append('first_win')
-        
-        if (winner == 1 and self.current_game_stats['timer_mode'] == 'speed' and 
-            not self.achievements['speed_demon']['unlocked']):
-            self.unlock_achievement('speed_demon')
-            newly_unlocked.append('speed_demon')
-        
-        if (winner == 1 and self.current_game_stats['ai_moves'] == 0 and 
-            not self.achievements['perfectionist']['unlocked']):
-            self.unlock_achievement('perfectionist')
-            newly_unlocked.append('perfectionist')
-        
-        if (winner == 1 and self.current_game_stats['difficulty'] == 'hard' and 
-            not self.achievements['difficulty_master']['unlocked']):
-            self.unlock_achievement('difficulty_master')
-            newly_unlocked.append('difficulty_master')
-        
-        if (winner == 1 and time_left is not None and time_left > 10 and 
-            self.current_game_stats['timer_mode'] != 'no_timer' and
-            not self.achievements['fast_thinker']['unlocked']):
-            self.unlock_achievement('fast_thinker')
-            newly_unlocked.append('fast_thinker')
-        
-        if self.current_game_stats['consecutive_wins'] >= 3 and not self.achievements['streak_master']['unlocked']:
-            self.unlock_achievement('streak_master')
-            newly_unlocked.append('streak_master')
-        
-        if score[1] >= 10 and not self.achievements['ai_annihilator']['unlocked']:
-            self.unlock_achievement('ai_annihilator')
-            newly_unlocked.append('ai_annihilator')
-        
-        if (winner == 1 and self.current_game_stats['used_undo'] and 
-            not self.achievements['undo_expert']['unlocked']):
-            self.unlock_achievement('undo_expert')
-            newly_unlocked.append('undo_expert')
-        
-        if winner == -1 and score[0] >= 3 and not self.achievements['draw_specialist']['unlocked']:
-            self.unlock_achievement('draw_specialist')
-            newly_unlocked.append('draw_specialist')
-        
-        # Reset for next game
-        self.current_game_stats.update({
-            'moves': 0,
-            'human_moves': 0,
-            'ai_moves': 0,
-            'used_undo': False
-        })
-        
-        return newly_unlocked
-    
-    def unlock_achievement(self, achievement_id):
-        if achievement_id in self.achievements and not self.achievements[achievement_id]['unlocked']:
-            self.achievements[achievement_id]['unlocked'] = True
-            achievement = self.achievements[achievement_id]
-            
-            self.active_notifications.append({
-                'id': achievement_id,
-                'name': achievement['name'],
-                'icon': achievement['icon'],
-                'description': achievement['description'],
-                'time': time.time(),
-                'duration': 5
-            })
-            
-            print(f"\n🎉 ACHIEVEMENT UNLOCKED: {achievement['icon']} {achievement['name']}")
-            print(f"   {achievement['description']}")
-    
-    def update_notifications(self):
-        current_time = time.time()
-        self.active_notifications = [
-            notif for notif in self.active_notifications
-            if current_time - notif['time'] < notif['duration']
-        ]
-
-# --------------------- NOTIFICATION RENDERER ---------------------
-class NotificationRenderer:
-    def __init__(self, screen, font):
-        self.screen = screen
-        self.font = font
-        self.small_font = pygame.font.SysFont(None, 24)
-    
-    def draw_notifications(self, notifications):
-        notification_height = 70
-        start_y = 100
-        
-        for i, notif in enumerate(notifications[:3]):
-            elapsed = time.time() - notif['time']
-            duration = notif['duration']
-            
-            # Calculate fade
-            if elapsed < 0.5:
-                alpha = int(255 * (elapsed / 0.5))
-            elif elapsed > duration - 0.5:
-                alpha = int(255 * ((duration - elapsed) / 0.5))
-            else:
-                alpha = 255
-            
-            y_pos = start_y + i * (notification_height + 10)
-            
-            # Draw background
-            bg_rect = pygame.Rect(20, y_pos, 360, notification_height)
-            pygame.draw.rect(self.screen, (40, 40, 40, alpha), bg_rect, border_radius=10)
-            pygame.draw.rect(self.screen, (100, 100, 100, alpha), bg_rect, 2, border_radius=10)
-            
-            # Add icon
-            if 'icon' in notif:
-                icon_text = self.font.render(notif['icon'], True, (255, 215, 0, alpha))
-                self.screen.blit(icon_text, (40, y_pos + 15))
-            
-            # Draw name
-            if 'name' in notif:
-                name_color = (255, 215, 0, alpha)
-                name_text = self.font.render(notif['name'], True, name_color)
-                self.screen.blit(name_text, (80, y_pos + 15))
-            
-            # Draw description
-            if 'description' in notif:
-                desc_color = (200, 200, 200, alpha)
-                desc_text = self.small_font.render(notif['description'], True, desc_color)
-                self.screen.blit(desc_text, (80, y_pos + 45))
-            
-            # Progress bar
-            progress = elapsed / duration
-            progress_width = 320
-            progress_rect = pygame.Rect(40, y_pos + notification_height - 8, 
-                                      int(progress_width * progress), 4)
-            pygame.draw.rect(self.screen, (100, 200, 100, alpha), progress_rect, border_radius=2)
+WARNING_AT = 5  # seconds left on the move timer when the warning beep plays
+MENU_SCROLL_STEP = 30  # pixels per wheel notch or arrow key in the achievements menu
+TIMER_EVENT = pygame.USEREVENT + 1
+AI_DELAY = 0.4  # seconds before the AI's move is shown, however fast it was found
+AI_PLAYERS = {'easy': easy_ai, 'medium': medium_ai, 'hard': hard_ai}
 
 # --------------------- INITIAL SETUP ---------------------
 board = create_board()
@@ -223,114 +38,259 @@ player = 1
 game_over = False
 score = {0:0, 1:0, 2:0}
 ai_level = None
-move_history = []  # for undo
+move_tree = MoveTree()  # every position played, for undo/redo and branches
+move_history = move_tree.moves  # moves leading to the current position
+ai_search = None  # the AI move being computed: future, tree generation it is for, when to show it
 timer_mode = 'no_timer'
-move_start_time = None
+move_timer = None  # id of the current move's expiry timer
+warning_timer = None
 time_left = None
 timer_expired = False
 game_started = False
+game_start_time = None
 win_animation_played = False
+show_achievements = False  # achievements menu, toggled with A; move timers pause while it is open
+show_replay = False  # replay viewer for archived games, toggled with R; also pauses move timers
 
-# Initialize managers
+# Open the window, then initialize managers
+screen = gui.init_display()
+timer_service = TimerService(pygame_poster(TIMER_EVENT))
+font = gui.font
 sound_manager = SoundManager()
+stats_store = StatsStore()
+game_archive = GameArchive()
 achievement_manager = AchievementManager()
 notification_renderer = NotificationRenderer(screen, font)
+replay_player = ReplayPlayer(game_archive)
+replay_renderer = ReplayRenderer(screen, font)
+ai_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
 
-print("Game started. Move history available for undo.")
+log.info('session_start')
 
 # --------------------- TIMER FUNCTIONS ---------------------
 def start_move_timer():
-    global move_start_time, time_left, timer_expired
+    """(Re)start the per-move timer: an expiry event plus the warning beep"""
+    global move_timer, warning_timer, time_left, timer_expired
+    stop_move_timer()
+    timer_expired = False
     if timer_mode != 'no_timer' and game_started:
-        move_start_time = time.time()
-        time_left = TIMER_MODES[timer_mode]
-        timer_expired = False
-    elif timer_mode == 'no_timer':
-        move_start_time = None
+        limit = TIMER_MODES[timer_mode]
+        move_timer = timer_service.schedule(limit, 'expired')
+        if limit >= WARNING_AT:
+            warning_timer = timer_service.schedule(limit - WARNING_AT, 'warning')
+        time_left = limit
+    else:
         time_left = None
-        timer_expired = False
+
+def stop_move_timer():
+    global move_timer, warning_timer
+    timer_service.cancel_all()
+    move_timer = None
+    warning_timer = None
 
 def update_timer():
-    global time_left, timer_expired
-    if timer_mode != 'no_timer' and move_start_time and not game_over and game_started:
-        elapsed = time.time() - move_start_time
-        time_left = max(0, TIMER_MODES[timer_mode] - elapsed)
-        
-        # Warning sound
-        if time_left is not None and time_left <= 5 and time_left > 4.9:
-            sound_manager.play_timer_warning()
-        
-        if time_left <= 0 and not timer_expired:
-            timer_expired = True
-            return True
-    return False
+    """Deliver due timer events and refresh the countdown shown on screen"""
+    global time_left
+    timer_service.poll()
+    if move_timer is not None:
+        remaining = timer_service.remaining(move_timer)
+        time_left = remaining if remaining is not None else 0
+
+# --------------------- MOVE TREE FUNCTIONS ---------------------
+def restore_position(node):
+    """Resume from a move tree node: board, turn, timer and achievement flags"""
+    global player, game_over, game_started, timer_expired, win_animation_played
+    move_tree.restore(board)
+    board.rehash(node.turn)
+    player = node.turn
+    achievement_manager.restore_game_flags(node.flags)
+    # A finished position was recorded when it was first reached
+    game_over = check_winner(board)[0] != 0
+    win_animation_played = game_over
+    game_started = node.depth > 0
+    timer_expired = False
+    animation_manager.animations.clear()
+    animation_manager.particles.clear()
+    if game_over:
+        stop_move_timer()
+    else:
+        start_move_timer()
+
+def undo_move():
+    """Back to the human's previous turn; False if there is nothing to undo"""
+    node = move_tree.undo()
+    if node is None:
+        return False
+    while node.turn != 1 and node.parent is not None:
+        node = move_tree.undo()
+    restore_position(node)
+    achievement_manager.handle('undo')
+    return True
+
+def redo_move():
+    """Forward to the human's next turn along the last branch visited"""
+    node = move_tree.redo()
+    if node is None:
+        return False
+    while node.turn != 1 and node.redo is not None:
+        node = move_tree.redo()
+    restore_position(node)
+    return True
+
+def switch_branch(step):
+    """Swap the human's last move for another one already tried there; returns its node"""
+    node = move_tree.current
+    human = node if node.turn == 2 else node.parent
+    if (human is None or human.move is None or human.move[2] != 1
+            or len(human.parent.children) < 2):
+        return None
+    if human is not node:
+        move_tree.undo()
+    human = node = move_tree.switch_branch(step)
+    while node.turn != 1 and node.redo is not None:
+        node = move_tree.redo()
+    restore_position(node)
+    return human
+
+# --------------------- REPLAY FUNCTIONS ---------------------
+def open_replay():
+    """Show the most recent archived game; False if nothing has been recorded yet"""
+    global show_replay
+    if not replay_player.load_latest():
+        achievement_manager.add_notification("No recorded games yet")
+        return False
+    show_replay = True
+    timer_service.pause()
+    # The live game's animations would be drawn over the replay board
+    animation_manager.animations.clear()
+    animation_manager.particles.clear()
+    log.info('replay_open', game=replay_player.game_id)
+    return True
+
+def close_replay():
+    global show_replay
+    show_replay = False
+    replay_player.pause()
+    replay_player.scrubbing = False
+    animation_manager.animations.clear()
+    animation_manager.particles.clear()
+    timer_service.resume()
+
+REPLAY_KEYS = {
+    pygame.K_SPACE: lambda: replay_player.toggle(),
+    pygame.K_f: lambda: replay_player.fast_forward(),
+    pygame.K_RIGHT: lambda: replay_player.step(1),
+    pygame.K_LEFT: lambda: replay_player.step(-1),
+    pygame.K_HOME: lambda: replay_player.seek(0),
+    pygame.K_END: lambda: replay_player.seek(len(replay_player.replay)),
+    pygame.K_PAGEUP: lambda: replay_player.switch(-1),
+    pygame.K_PAGEDOWN: lambda: replay_player.switch(1),
+}
 
 # --------------------- MAIN LOOP ---------------------
 clock = pygame.time.Clock()
+first_frame = True
+# Used by bench_startup.py to time startup without a window session
+exit_after_first_frame = '--exit-after-first-frame' in sys.argv
 
 while True:
     mouse_pos = pygame.mouse.get_pos()
     
     # Update timer
-    timer_ran_out = update_timer()
-    if timer_ran_out and not game_over:
-        if player == 1:
-            print("Human ran out of time! Switching to AI...")
-            player = 2
-            timer_expired = False
-            sound_manager.play_timer_warning()
-            start_move_timer()
+    update_timer()
     
     # Update animations and notifications
     animation_manager.update()
     achievement_manager.update_notifications()
+    if show_replay:
+        replay_player.update()
     
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             pygame.quit()
             sys.exit()
 
-        if event.type == pygame.MOUSEBUTTONDOWN:
+        if event.type == TIMER_EVENT:
+            # Ignore events from timers cancelled after they were posted
+            if event.timer_id == warning_timer:
+                sound_manager.play_timer_warning()
+            elif event.timer_id == move_timer and not game_over:
+                timer_expired = True
+                if player == 1:
+                    log.info('timer_expired', player=1)
+                    achievement_manager.handle('timer_expired', player=1)
+                    player = 2
+                    timer_expired = False
+                    sound_manager.play_timer_warning()
+                    start_move_timer()
+
+        if event.type == pygame.KEYDOWN and show_replay:
+            if event.key in (pygame.K_r, pygame.K_ESCAPE):
+                close_replay()
+            elif event.key in REPLAY_KEYS:
+                REPLAY_KEYS[event.key]()
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_r and not show_achievements:
+                open_replay()
+            # Move tree: Left/Right undo and redo, Up/Down switch between tried moves
+            elif not show_achievements and event.key == pygame.K_LEFT:
+                if undo_move():
+                    sound_manager.play_undo()
+                    log.info('undo', player=player, ply=len(move_history))
+            elif not show_achievements and event.key == pygame.K_RIGHT:
+                if redo_move():
+                    sound_manager.play_move()
+                    log.info('redo', player=player, ply=len(move_history))
+            elif not show_achievements and event.key in (pygame.K_UP, pygame.K_DOWN):
+                branch = switch_branch(-1 if event.key == pygame.K_UP else 1)
+                if branch is not None:
+                    sound_manager.play_move()
+                    log.info('branch', row=branch.move[0], col=branch.move[1], ply=len(move_history))
+            elif event.key == pygame.K_a or (event.key == pygame.K_ESCAPE and show_achievements):
+                show_achievements = not show_achievements
+                if show_achievements:
+                    timer_service.pause()
+                else:
+                    timer_service.resume()
+            elif show_achievements and event.key in (pygame.K_UP, pygame.K_DOWN):
+                step = MENU_SCROLL_STEP if event.key == pygame.K_DOWN else -MENU_SCROLL_STEP
+                notification_renderer.scroll_menu(step)
+
+        if event.type == pygame.MOUSEWHEEL and show_achievements:
+            notification_renderer.scroll_menu(-event.y * MENU_SCROLL_STEP)
+
+        if show_replay:
+            replay_renderer.handle_event(replay_player, event)
+
+        elif event.type == pygame.MOUSEBUTTONDOWN and not show_achievements:
             mx, my = event.pos
-            print(f"Mouse clicked at: ({mx}, {my})")
+            if log.debug_enabled:
+                log.debug('mouse_click', x=mx, y=my)
             sound_manager.play_click()
 
-            # Timer Mode Selection
-            timer_buttons = draw_timer_buttons(timer_mode, mouse_pos)
-            for mode_name, btn_rect in timer_buttons.items():
-                if btn_rect.collidepoint((mx, my)):
-                    timer_mode = mode_name
-                    achievement_manager.update_game_stats(timer_mode=timer_mode)
-                    print(f"Timer mode set to: {mode_name}")
-                    if game_started:
-                        start_move_timer()
+            clicked = hit_test((mx, my))
+            action = clicked['action'] if clicked else None
 
-            # Difficulty Selection
-            easy_btn, medium_btn, hard_btn = draw_difficulty_buttons(selected=ai_level, mouse_pos=mouse_pos)
-            if easy_btn.collidepoint((mx, my)):
-                ai_level = 'easy'
-                achievement_manager.update_game_stats(difficulty=ai_level)
-                print(f"Difficulty set to: {ai_level}")
-                if game_started:
-                    start_move_timer()
-            elif medium_btn.collidepoint((mx, my)):
-                ai_level = 'medium'
-                achievement_manager.update_game_stats(difficulty=ai_level)
-                print(f"Difficulty set to: {ai_level}")
+            # Timer Mode Selection
+            if action == 'timer':
+                timer_mode = clicked['value']
+                achievement_manager.update_game_stats(timer_mode=timer_mode)
+                log.info('timer_mode', mode=timer_mode)
                 if game_started:
                     start_move_timer()
-            elif hard_btn.collidepoint((mx, my)):
-                ai_level = 'hard'
+
+            # Difficulty Selection
+            elif action == 'difficulty':
+                ai_level = clicked['value']
                 achievement_manager.update_game_stats(difficulty=ai_level)
-                print(f"Difficulty set to: {ai_level}")
+                log.info('difficulty', difficulty=ai_level)
                 if game_started:
                     start_move_timer()
 
             # Restart / Quit
-            restart_btn, quit_btn = draw_game_buttons(mouse_pos=mouse_pos)
-            if restart_btn.collidepoint((mx, my)):
+            elif action == 'restart':
                 board = create_board()
-                move_history.clear()
+                move_tree.reset()
                 game_over = False
                 player = 1
                 timer_expired = False
@@ -338,70 +298,32 @@ while True:
                 win_animation_played = False
                 animation_manager.animations.clear()
                 animation_manager.particles.clear()
+                achievement_manager.reset_game()
                 start_move_timer()
-                print("Game restarted")
-                continue
-            elif quit_btn.collidepoint((mx, my)):
+                log.info('restart')
+            elif action == 'quit':
                 pygame.quit()
                 sys.exit()
 
             # Undo
-            undo_data = draw_undo_button(mouse_pos=mouse_pos)
-            center_x, center_y = undo_data['center']
-            radius = undo_data['radius']
-            distance = ((mx - center_x) ** 2 + (my - center_y) ** 2) ** 0.5
-            
-            if distance <= radius:
-                if move_history:
-                    if len(move_history) >= 2:
-                        ai_move = move_history.pop()
-                        r_ai, c_ai, p_ai = ai_move
-                        board[r_ai][c_ai] = 0
-                        
-                        human_move = move_history.pop()
-                        r_human, c_human, p_human = human_move
-                        board[r_human][c_human] = 0
-                        
-                        player = 1
-                        game_over = False
-                        timer_expired = False
-                        game_started = len(move_history) > 0
-                        
-                    elif len(move_history) == 1:
-                        last_move = move_history.pop()
-                        r, c, p = last_move
-                        board[r][c] = 0
-                        player = p
-                        game_over = False
-                        timer_expired = False
-                        game_started = False
-                    
-                    achievement_manager.update_game_stats(used_undo=True)
+            elif action == 'undo':
+                if undo_move():
                     sound_manager.play_undo()
-                    win_animation_played = False
-                    animation_manager.animations = [anim for anim in animation_manager.animations 
-                                                   if anim['type'] != 'win_line']
-                    
-                    start_move_timer()
-                    print(f"Undo successful! Player {player}'s turn.")
+                    log.info('undo', player=player, ply=len(move_history))
                 else:
-                    print("No moves to undo!")
+                    log.debug('undo_empty')
 
             # Human Move
-            if not game_over and my < SQUARE_SIZE * 3 and player == 1 and not timer_expired:
-                row = my // SQUARE_SIZE
-                col = mx // SQUARE_SIZE
-                if 0 <= row < 3 and 0 <= col < 3:
+            elif action == 'board' and not game_over and player == 1 and not timer_expired:
+                cell = board_viewport.screen_to_cell((mx, my))
+                if cell:
+                    row, col = cell
                     if make_move(board, row, col, player):
-                        move_history.append((row, col, player))
                         player = 2
                         timer_expired = False
                         
-                        # Update stats
-                        achievement_manager.update_game_stats(
-                            human_moves=achievement_manager.current_game_stats['human_moves'] + 1,
-                            moves=achievement_manager.current_game_stats['moves'] + 1
-                        )
+                        achievement_manager.handle('move', player=1, row=row, col=col, board=board)
+                        move_tree.play(row, col, 1, achievement_manager.game_flags())
                         
                         # Play sound and animation
                         sound_manager.play_move()
@@ -409,48 +331,45 @@ while True:
                         
                         if not game_started:
                             game_started = True
-                            print("Game started! Timer activated (if enabled).")
+                            game_start_time = time.monotonic()
+                            log.info('game_start', timer_mode=timer_mode, difficulty=ai_level)
                         
                         start_move_timer()
-                        print(f"Player 1 moved to ({row}, {col})")
+                        log.info('move', player=1, row=row, col=col)
 
     # AI Move
-    if not game_over and player == 2 and ai_level is not None:
-        pygame.time.delay(400)
-        
-        if ai_level == 'easy':
-            row, col = easy_ai(board)
-        elif ai_level == 'medium':
-            row, col = medium_ai(board)
-        else:
-            row, col = hard_ai(board)
-
-        if row is not None and col is not None:
-            make_move(board, row, col, player)
-            move_history.append((row, col, player))
-            player = 1
-            timer_expired = False
-            
-            # Update stats
-            achievement_manager.update_game_stats(
-                ai_moves=achievement_manager.current_game_stats['ai_moves'] + 1,
-                moves=achievement_manager.current_game_stats['moves'] + 1
-            )
+    # The search runs on a worker thread so the window keeps drawing. Any change of
+    # position (a move, undo, redo, restart) bumps the tree's generation, so an
+    # answer computed for an older position is dropped.
+    if ai_search is not None and ai_search['generation'] != move_tree.generation:
+        ai_search['future'].cancel()
+        ai_search = None
+    # The winner is only settled at the end of the frame, so check the board too
+    if (not game_over and player == 2 and ai_level is not None and not show_achievements
+            and not show_replay and check_winner(board)[0] == 0):
+        if ai_search is None:
+            ai_search = {'future': ai_pool.submit(AI_PLAYERS[ai_level], [row[:] for row in board]),
+                         'generation': move_tree.generation,
+                         'ready_at': time.monotonic() + AI_DELAY}
+        elif ai_search['future'].done() and time.monotonic() >= ai_search['ready_at']:
+            row, col = ai_search['future'].result()
+            ai_search = None
             
-            # Play sound and animation
-            sound_manager.play_move()
-            animation_manager.add_move_animation(row, col, 2)
-            
-            start_move_timer()
-            print(f"AI moved to ({row}, {col})")
+            if row is not None and col is not None:
+                make_move(board, row, col, player)
+                player = 1
+                timer_expired = False
+                
+                achievement_manager.handle('move', player=2, row=row, col=col, board=board)
+                move_tree.play(row, col, 2, achievement_manager.game_flags())
+                
+                # Play sound and animation
+                sound_manager.play_move()
+                animation_manager.add_move_animation(row, col, 2)
+                
+                start_move_timer()
+                log.info('move', player=2, row=row, col=col)
 
-    # ------------------ DRAW EVERYTHING ------------------
-    draw_lines()
-    draw_figures(board)
-    
-    # Draw animations
-    animation_manager.draw_animations(screen, board)
-    
     winner, winning_cells = check_winner(board)
     
     # Add win animation
@@ -460,62 +379,100 @@ while True:
             animation_manager.add_win_animation(winning_cells)
             animation_manager.add_confetti(winning_cells)
     
-    draw_winner_line(winning_cells)
-    
-    # Visual enhancements
-    draw_hover_effect(board, mouse_pos, player)
-    
-    if move_history:
-        last_row, last_col, last_player = move_history[-1]
-        draw_highlight_last_move(last_row, last_col, last_player)
-    
-    draw_pulsing_turn_indicator(player)
-    draw_move_stats(move_history)
-    draw_timer_visual(time_left, timer_mode)
-    draw_scoreboard(score)
-    
-    # Current turn display
-    if game_started:
-        draw_current_turn(player, timer_mode, time_left)
-    else:
-        draw_current_turn(player, 'no_timer', None)
-    
-    draw_difficulty_text(ai_level)
-    draw_difficulty_buttons(selected=ai_level, mouse_pos=mouse_pos)
-    draw_game_buttons(mouse_pos=mouse_pos)
-    draw_undo_button(mouse_pos=mouse_pos)
-    
-    # Timer UI
-    draw_timer_buttons(timer_mode, mouse_pos)
-    
-    if game_started:
-        draw_timer_display(time_left, timer_expired, timer_mode)
+    # ------------------ DRAW EVERYTHING ------------------
+    if show_achievements:
+        notification_renderer.draw_achievements_menu(
+            achievement_manager.achievements, achievement_manager.get_unlocked_count(),
+            achievement_manager.get_total_count(), achievement_manager.version)
+    elif show_replay:
+        replay_renderer.draw(replay_player)
     else:
-        draw_timer_display(None, False, 'no_timer')
+        draw_lines()
+        draw_figures(board)
+        
+        # Draw animations
+        animation_manager.draw_animations(screen, board)
+        
+        draw_winner_line(winning_cells)
+        
+        # Visual enhancements
+        draw_hover_effect(board, mouse_pos, player)
+        
+        if move_history:
+            last_row, last_col, last_player = move_history[-1]
+            draw_highlight_last_move(last_row, last_col, last_player)
+        
+        draw_pulsing_turn_indicator(player)
+        draw_move_stats(move_history)
+        draw_timer_visual(time_left, timer_mode)
+        draw_scoreboard(score)
+        
+        # Current turn display
+        if game_started:
+            draw_current_turn(player, timer_mode, time_left)
+        else:
+            draw_current_turn(player, 'no_timer', None)
+        
+        draw_difficulty_text(ai_level)
+        draw_difficulty_buttons(selected=ai_level, mouse_pos=mouse_pos)
+        draw_game_buttons(mouse_pos=mouse_pos)
+        draw_undo_button(mouse_pos=mouse_pos)
+        
+        # Timer UI
+        draw_timer_buttons(timer_mode, mouse_pos)
+        
+        if game_started:
+            draw_timer_display(time_left, timer_expired, timer_mode)
+        else:
+            draw_timer_display(None, False, 'no_timer')
     
     # Draw notifications
-    notification_renderer.draw_notifications(achievement_manager.active_notifications)
+    notification_renderer.draw_notifications(achievement_manager.notifications)
     
     pygame.display.update()
+    
+    if first_frame:
+        # The window is up: report startup time and load sounds in the background
+        first_frame = False
+        first_frame_ms = (time.perf_counter() - startup_time) * 1000
+        log.info('first_frame', ms=round(first_frame_ms))
+        if exit_after_first_frame:
+            print(f"First frame after {first_frame_ms:.0f} ms")
+            pygame.quit()
+            sys.exit()
+        sound_manager.start_loading()
+        stats_store.open()
+    
     clock.tick(60)
 
     # ------------------ CHECK WINNER ------------------
     if winner != 0 and not game_over:
         game_over = True
+        stop_move_timer()
         
-        # Check achievements
-        newly_unlocked = achievement_manager.check_achievements(winner, score, time_left)
+        # Record the game, then check achievements against the updated totals
+        duration = time.monotonic() - game_start_time if game_start_time is not None else 0.0
+        stats_store.record_game(winner, move_history, ai_level, timer_mode, duration,
+                                achievement_manager.current_game_stats['used_undo'])
+        game_archive.append(move_history, winner, ai_level, timer_mode, time.time() - duration,
+                            duration, achievement_manager.current_game_stats['used_undo'])
+        newly_unlocked = achievement_manager.check_achievements(winner, time_left, stats_store.lifetime())
+        if newly_unlocked:
+            sound_manager.play_achievement(newly_unlocked[0])
         
         # Play sounds
         if winner == -1:
             score[0] += 1
             sound_manager.play_draw()
-            print("Tie!")
+            log.info('game_end', winner=winner, moves=len(move_history))
         elif winner == 1:
             score[winner] += 1
             sound_manager.play_win()
-            print(f"Player {winner} wins!")
+            log.info('game_end', winner=winner, moves=len(move_history))
         else:
             score[winner] += 1
             sound_manager.play_lose()
-            print(f"Player {winner} wins!")
\ No newline at end of file
+            log.info('game_end', winner=winner, moves=len(move_history))
+    
+    # Start the sounds triggered this frame
+    sound_manager.end_frame()
@@ -0,0 +1,295 @@
+# move_service.py
+"""Local HTTP JSON service for AI moves and position evaluation.
+
+    python move_service.py [--port 8766]
+
+Endpoints (localhost only, no pygame needed):
+
+    POST /move      {"board": [[0, 0, 0], ...], "difficulty": "hard", "player": 2}
+                    -> {"row": 1, "col": 1, "player": 2, "score": 0}
+    POST /evaluate  {"board": ..., "player": 2}
+                    -> {"score": 0, "outcome": "draw", "row": 1, "col": 1}
+    POST /batch     {"requests": [{"board": ..., "op": "move" | "evaluate", ...}, ...]}
+                    -> {"results": [...]}   (one result or {"error": ...} per request)
+    GET  /stats     latency histograms per endpoint and cache counters
+
+"player" is the side to move and defaults to whoever's turn it is. Hard
+moves and evaluations are exact (minimax) and are computed on the
+position's canonical symmetric form: a request that is identical or
+symmetric to one already being computed waits for that result instead of
+searching again, and results are kept in a bounded LRU cache. Easy and
+medium moves are random by design, so they are neither shared nor cached.
+"""
+import argparse
+import bisect
+import collections
+import concurrent.futures
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from game import check_winner, canonical, cells_to_board, untransform_cell
+from ai import easy_ai, medium_ai, minimax
+from eventlog import log
+
+OUTCOMES = {1: 'win', 0: 'draw', -1: 'loss'}  # for the side to move
+MAX_BATCH = 1024
+MAX_BODY = 1 << 20
+
+# Latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+class RequestError(Exception):
+    """A request the client got wrong (reported as HTTP 400)"""
+
+# ----------------- POSITIONS -----------------
+def parse_board(board):
+    if (not isinstance(board, list) or len(board) != 3 or
+            not all(isinstance(row, list) and len(row) == 3 for row in board)):
+        raise RequestError('board must be 3 rows of 3 cells')
+    if not all(cell in (0, 1, 2) and not isinstance(cell, bool) for row in board for cell in row):
+        raise RequestError('cells must be 0 (empty), 1 (X) or 2 (O)')
+    board = [list(row) for row in board]
+    x_count = sum(row.count(1) for row in board)
+    o_count = sum(row.count(2) for row in board)
+    if x_count - o_count not in (0, 1):
+        raise RequestError('X moves first, so X has the same number of marks as O or one more')
+    if check_winner(board)[0] != 0:
+        raise RequestError('the game is already over')
+    return board, (1 if x_count == o_count else 2)
+
+def as_mover(board, player):
+    """The board with marks swapped if needed so the side to move is O (2)"""
+    if player == 2:
+        return board
+    return [[{1: 2, 2: 1}.get(cell, 0) for cell in row] for row in board]
+
+def solve(cells):
+    """Exact best move and score for O to move on a canonical position"""
+    result = minimax(cells_to_board(cells), 2)
+    return result['row'], result['col'], result['score']
+
+# ----------------- SERVICE -----------------
+class MoveService:
+    def __init__(self, cache_size=4096):
+        self.cache = collections.OrderedDict()  # canonical cells -> (row, col, score)
+        self.cache_size = cache_size
+        self.inflight = {}  # canonical cells -> Future of the search running for them
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+        self.latency = {}  # endpoint -> histogram dict
+
+    def best(self, board, player):
+        """Exact (row, col, score) for player on board, shared across symmetric requests"""
+        cells, symmetry = canonical(as_mover(board, player))
+        with self.lock:
+            result = self.cache.get(cells)
+            if result is not None:
+                self.cache.move_to_end(cells)
+                self.counters['hits'] += 1
+                future = None
+            else:
+                future = self.inflight.get(cells)
+                owner = future is None
+                if owner:
+                    future = self.inflight[cells] = concurrent.futures.Future()
+                    self.counters['misses'] += 1
+                else:
+                    self.counters['coalesced'] += 1
+        if future is not None:
+            if owner:
+                try:
+                    result = solve(cells)
+                except BaseException as e:
+                    with self.lock:
+                        del self.inflight[cells]
+                    future.set_exception(e)
+                    raise
+                with self.lock:
+                    del self.inflight[cells]
+                    self.cache[cells] = result
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                        self.counters['evictions'] += 1
+                future.set_result(result)
+            else:
+                result = future.result()
+        row, col, score = result
+        row, col = untransform_cell(row, col, symmetry)
+        return row, col, score
+
+    def move(self, request):
+        board, player = self.position(request)
+        difficulty = request.get('difficulty', 'hard')
+        if difficulty == 'hard':
+            row, col, score = self.best(board, player)
+            return {'row': row, 'col': col, 'player': player, 'score': score}
+        if difficulty in ('easy', 'medium'):
+            # Both AIs play O; swap marks so they play whoever is to move
+            row, col = (easy_ai if difficulty == 'easy' else medium_ai)(as_mover(board, player))
+            return {'row': row, 'col': col, 'player': player}
+        raise RequestError(f"unknown difficulty {difficulty!r}")
+
+    def evaluate(self, request):
+        board, player = self.position(request)
+        row, col, score = self.best(board, player)
+        return {'score': score, 'outcome': OUTCOMES[score], 'player': player, 'row': row, 'col': col}
+
+    def batch(self, request):
+        requests = request.get('requests')
+        if not isinstance(requests, list):
+            raise RequestError('requests must be a list')
+        if len(requests) > MAX_BATCH:
+            raise RequestError(f"at most {MAX_BATCH} requests per batch")
+        results = []
+        for item in requests:
+            try:
+                if not isinstance(item, dict):
+                    raise RequestError('each request must be an object')
+                op = item.get('op', 'move')
+                if op == 'move':
+                    results.append(self.move(item))
+                elif op == 'evaluate':
+                    results.append(self.evaluate(item))
+                else:
+                    raise RequestError(f"unknown op {op!r}")
+            except RequestError as e:
+                results.append({'error': str(e)})
+        return {'results': results}
+
+    def position(self, request):
+        board, to_move = parse_board(request.get('board'))
+        player = request.get('player', to_move)
+        if player != to_move:
+            raise RequestError(f"it is player {to_move}'s turn")
+        return board, player
+
+    # ----------------- METRICS -----------------
+    def record(self, endpoint, seconds, error=False):
+        ms = seconds * 1000
+        with self.lock:
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = {
+                    'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'buckets': [0] * (len(LATENCY_BUCKETS) + 1)}
+            histogram['count'] += 1
+            histogram['errors'] += int(error)
+            histogram['total_ms'] += ms
+            histogram['max_ms'] = max(histogram['max_ms'], ms)
+            histogram['buckets'][bisect.bisect_left(LATENCY_BUCKETS, ms)] += 1
+
+    def stats(self):
+        with self.lock:
+            endpoints = {}
+            for endpoint, h in self.latency.items():
+                endpoints[endpoint] = {
+                    'count': h['count'],
+                    'errors': h['errors'],
+                    'mean_ms': round(h['total_ms'] / h['count'], 3),
+                    'max_ms': round(h['max_ms'], 3),
+                    'p50_ms': bucket_percentile(h['buckets'], 0.5),
+                    'p99_ms': bucket_percentile(h['buckets'], 0.99),
+                    'histogram_ms': {bucket_label(i): n for i, n in enumerate(h['buckets']) if n}
+                }
+            lookups = self.counters['hits'] + self.counters['misses'] + self.counters['coalesced']
+            cache = dict(self.counters, size=len(self.cache), capacity=self.cache_size,
+                         inflight=len(self.inflight),
+                         hit_rate=round(self.counters['hits'] / lookups, 4) if lookups else None)
+        return {'endpoints': endpoints, 'cache': cache}
+
+def bucket_label(index):
+    return f"<={LATENCY_BUCKETS[index]}" if index < len(LATENCY_BUCKETS) else f">{LATENCY_BUCKETS[-1]}"
+
+def bucket_percentile(buckets, fraction):
+    """Upper bound (ms) of the bucket holding the given percentile"""
+    total = sum(buckets)
+    if not total:
+        return None
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if seen >= fraction * total:
+            return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else None
+    return None
+
+# ----------------- HTTP -----------------
+class Handler(BaseHTTPRequestHandler):
+    service = None  # set by make_server()
+    routes = {'/move': 'move', '/evaluate': 'evaluate', '/batch': 'batch'}
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.reply(200, self.service.stats())
+        elif self.path == '/health':
+            self.reply(200, {'ok': True})
+        else:
+            self.reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        method = self.routes.get(self.path)
+        if method is None:
+            return self.reply(404, {'error': 'not found'})
+        error = True
+        try:
+            request = self.read_json()
+            body = getattr(self.service, method)(request)
+            error = False
+            self.reply(200, body)
+        except RequestError as e:
+            self.reply(400, {'error': str(e)})
+        except Exception as e:
+            log.error('move_service_failed', path=self.path, error=repr(e))
+            self.reply(500, {'error': 'internal error'})
+        finally:
+            self.service.record(self.path, time.perf_counter() - start, error)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            raise RequestError('request body too large')
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            raise RequestError(f"invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise RequestError('expected a JSON object')
+        return request
+
+    def reply(self, status, body):
+        data = json.dumps(body, separators=(',', ':')).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Per-request access lines would swamp stderr; /stats has the numbers
+        pass
+
+def make_server(host='127.0.0.1', port=8766, service=None):
+    handler = type('MoveServiceHandler', (Handler,), {'service': service or MoveService()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--cache-size', type=int, default=4096)
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, MoveService(args.cache_size))
+    print(f"Serving on http://{args.host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
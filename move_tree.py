@@ -0,0 +1,116 @@
+# move_tree.py
+"""Undo/redo move tree: every position the game has visited, branches included.
+
+Each node is a position after one move and carries everything the window
+needs to resume from it: the board cells, whose turn it is, and the per-game
+flags the achievement rules read. Moving to any node (undo, redo, switching
+to another branch, or jumping straight there) restores that state in one
+step; nothing is replayed from the first move.
+
+Playing a move that was already played from the current position follows
+the existing branch, and playing a different one starts a new branch next
+to it, so earlier lines stay reachable. Every change of position bumps
+`generation`, which lets a search started for an older position notice
+that its answer no longer applies.
+"""
+
+class MoveNode:
+    __slots__ = ('parent', 'children', 'move', 'cells', 'turn', 'flags', 'depth', 'redo')
+
+    def __init__(self, parent, move, cells, turn, flags):
+        self.parent = parent
+        self.children = []
+        self.move = move  # (row, col, player) that led here; None at the root
+        self.cells = cells  # bytes, row * side + col
+        self.turn = turn  # player to move
+        self.flags = flags  # AchievementManager.game_flags() after the move; None at the root
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.redo = None  # child redo() goes to: the one most recently visited
+
+class MoveTree:
+    def __init__(self, side=3):
+        self.side = side
+        self.generation = 0
+        self.moves = []  # moves from the root to the current node (the game's move history)
+        self.reset()
+
+    def reset(self):
+        """Start a new game at an empty board"""
+        self.root = self.current = MoveNode(None, None, bytes(self.side * self.side), 1, None)
+        self.moves.clear()
+        self.generation += 1
+
+    def play(self, row, col, player, flags=None):
+        """Record a move from the current position; returns the new current node"""
+        move = (row, col, player)
+        node = self.current
+        child = next((c for c in node.children if c.move == move), None)
+        if child is None:
+            cells = bytearray(node.cells)
+            cells[row * self.side + col] = player
+            child = MoveNode(node, move, bytes(cells), 3 - player, flags)
+            node.children.append(child)
+        else:
+            # The same move again: follow the existing branch
+            child.flags = flags
+        node.redo = child
+        self.current = child
+        self.moves.append(move)
+        self.generation += 1
+        return child
+
+    # ----------------- NAVIGATION -----------------
+    def undo(self):
+        """Back one move; returns the new current node, or None at the start"""
+        node = self.current
+        if node.parent is None:
+            return None
+        node.parent.redo = node
+        self.current = node.parent
+        self.moves.pop()
+        self.generation += 1
+        return self.current
+
+    def redo(self):
+        """Forward along the most recently visited branch; None if there is nothing to redo"""
+        child = self.current.redo
+        if child is None:
+            return None
+        self.current = child
+        self.moves.append(child.move)
+        self.generation += 1
+        return child
+
+    def switch_branch(self, step):
+        """Swap the last move for the previous (-1) or next (+1) alternative; None if there is none"""
+        parent = self.current.parent
+        if parent is None or len(parent.children) < 2:
+            return None
+        index = (parent.children.index(self.current) + step) % len(parent.children)
+        node = parent.children[index]
+        parent.redo = node
+        self.current = node
+        self.moves[-1] = node.move
+        self.generation += 1
+        return node
+
+    def goto(self, node):
+        """Make any node of this tree current"""
+        path = []
+        walk = node
+        while walk.parent is not None:
+            walk.parent.redo = walk
+            path.append(walk.move)
+            walk = walk.parent
+        self.current = node
+        self.moves[:] = reversed(path)
+        self.generation += 1
+        return node
+
+    def restore(self, board):
+        """Write the current node's cells into board (a list of rows) in place"""
+        cells = self.current.cells
+        side = self.side
+        for r, row in enumerate(board):
+            row[:] = cells[r * side:(r + 1) * side]
+        return self.current
@@ -1,133 +1,259 @@
 # notifications.py
-import pygame
+"""Toast notifications: a bounded, expiry-scheduled queue and its renderer.
+
+The queue shows at most a few notifications at once and holds the rest in a
+bounded waiting line. Each notification gets its fade-in, fade-out and expiry
+times when it is shown, and the queue keeps the earliest expiry, so update()
+is a single comparison on frames where nothing expires.
+"""
+import time
+from collections import deque
+
+from layout import WIDTH, HEIGHT
+
+# pygame is imported by the renderer only: the queue is used headless too
+
+class NotificationQueue:
+    def __init__(self, max_visible=3, capacity=16, fade=0.5, clock=time.monotonic):
+        self.max_visible = max_visible
+        self.fade = fade
+        self.clock = clock
+        self.visible = []  # showing, oldest first
+        self.waiting = deque()
+        self.capacity = capacity  # waiting notifications beyond this are counted, not kept
+        self.dropped = 0
+        self.next_expiry = None
+        self.version = 0  # bumped whenever the visible set changes
+
+    def __len__(self):
+        return len(self.visible) + len(self.waiting)
+
+    def push(self, notification):
+        """Queue a notification dict (with a 'duration' in seconds)"""
+        if len(self.visible) < self.max_visible:
+            self.show(notification, self.clock())
+            self.changed()
+        elif len(self.waiting) < self.capacity:
+            self.waiting.append(notification)
+        else:
+            # Shown later as a single summary notification
+            self.dropped += 1
+
+    def show(self, notification, now):
+        item = dict(notification)
+        duration = item['duration']
+        fade = min(self.fade, duration / 2)
+        item['fade'] = fade
+        item['shown'] = now
+        item['fade_in_end'] = now + fade
+        item['fade_out_start'] = now + duration - fade
+        item['expires'] = now + duration
+        self.visible.append(item)
+
+    def update(self, now=None):
+        """Retire expired notifications and show waiting ones; True if anything changed"""
+        if self.next_expiry is None:
+            return False
+        now = self.clock() if now is None else now
+        if now < self.next_expiry:
+            return False
+        self.visible = [item for item in self.visible if item['expires'] > now]
+        while len(self.visible) < self.max_visible and self.waiting:
+            self.show(self.waiting.popleft(), now)
+        if self.dropped and len(self.visible) < self.max_visible and not self.waiting:
+            self.show({'text': f"+{self.dropped} more", 'duration': 3}, now)
+            self.dropped = 0
+        self.changed()
+        return True
+
+    def changed(self):
+        self.next_expiry = min((item['expires'] for item in self.visible), default=None)
+        self.version += 1
+
+    def clear(self):
+        self.visible.clear()
+        self.waiting.clear()
+        self.dropped = 0
+        self.changed()
+
+    @staticmethod
+    def alpha(item, now):
+        """Opacity 0-255 from the item's precomputed fade phases"""
+        if now >= item['fade_out_start']:
+            return max(0, int(255 * (item['expires'] - now) / item['fade'])) if item['fade'] else 0
+        if now < item['fade_in_end']:
+            return max(0, int(255 * (now - item['shown']) / item['fade']))
+        return 255
+
+    @staticmethod
+    def progress(item, now):
+        """Fraction of the item's display time that has passed"""
+        return min(1.0, (now - item['shown']) / (item['expires'] - item['shown']))
+
+# Toast geometry
+CARD_X, CARD_Y = 20, 100
+CARD_WIDTH, CARD_HEIGHT = 360, 70
+CARD_GAP = 10
+PROGRESS_WIDTH = 320
+
+# Achievements menu geometry
+MENU_TOP = 130  # the list scrolls below the header
+MENU_BOTTOM = HEIGHT - 20
+MENU_ROW = 70
 
 class NotificationRenderer:
+    """Draws toasts and the achievements menu from cached surfaces.
+
+    Each toast is rendered once to an SRCALPHA card when it becomes visible
+    and faded with set_alpha; the menu is rendered once into a header and a
+    tall list surface, rebuilt only when the achievements change, and
+    scrolling just blits a different part of the list.
+    """
     def __init__(self, screen, font):
+        import pygame
         self.screen = screen
         self.font = font
         self.small_font = pygame.font.SysFont(None, 24)
+        self.cards = {}  # id(item) -> (item, surface) for visible toasts
+        self.cards_version = None
+        self.progress_bar = None
+        self.menu_key = None
+        self.menu_header = None
+        self.menu_list = None
+        self.menu_scroll = 0
     
-    def draw_notifications(self, notifications):
-        """Draw achievement notifications on screen"""
-        notification_height = 70
-        start_y = 100
+    # ----------------- TOASTS -----------------
+    def draw_notifications(self, queue, now=None):
+        """Draw the queue's visible notifications"""
+        import pygame
+        if queue.version != self.cards_version:
+            # Drop the cards of notifications that are gone
+            self.cards = {id(item): self.cards[id(item)] for item in queue.visible if id(item) in self.cards}
+            self.cards_version = queue.version
+        if not queue.visible:
+            return
+        if self.progress_bar is None:
+            self.progress_bar = pygame.Surface((PROGRESS_WIDTH, 4), pygame.SRCALPHA)
+            pygame.draw.rect(self.progress_bar, (100, 200, 100), self.progress_bar.get_rect(), border_radius=2)
+        now = queue.clock() if now is None else now
         
-        for i, notif in enumerate(notifications[:3]):  # Show max 3 at once
-            elapsed = time.time() - notif['time']
-            duration = notif['duration']
-            
-            # Calculate fade in/out
-            if elapsed < 0.5:  # Fade in
-                alpha = int(255 * (elapsed / 0.5))
-            elif elapsed > duration - 0.5:  # Fade out
-                alpha = int(255 * ((duration - elapsed) / 0.5))
-            else:
-                alpha = 255
-            
-            y_pos = start_y + i * (notification_height + 10)
-            
-            # Draw notification background
-            bg_rect = pygame.Rect(20, y_pos, 360, notification_height)
-            pygame.draw.rect(self.screen, (40, 40, 40, alpha), bg_rect, border_radius=10)
-            pygame.draw.rect(self.screen, (100, 100, 100, alpha), bg_rect, 2, border_radius=10)
-            
-            # Add achievement icon
-            if 'icon' in notif:
-                icon_text = self.font.render(notif['icon'], True, (255, 215, 0, alpha))
-                self.screen.blit(icon_text, (40, y_pos + 15))
-            
-            # Draw achievement name
-            if 'name' in notif:
-                name_color = (255, 215, 0, alpha)  # Gold color for achievement names
-                name_text = self.font.render(notif['name'], True, name_color)
-                self.screen.blit(name_text, (80, y_pos + 15))
+        for i, notif in enumerate(queue.visible):
+            alpha = queue.alpha(notif, now)
+            y_pos = CARD_Y + i * (CARD_HEIGHT + CARD_GAP)
             
-            # Draw description
-            if 'description' in notif:
-                desc_color = (200, 200, 200, alpha)
-                desc_text = self.small_font.render(notif['description'], True, desc_color)
-                self.screen.blit(desc_text, (80, y_pos + 45))
-            elif 'text' in notif:
-                text_color = (255, 255, 255, alpha)
-                text_display = self.small_font.render(notif['text'], True, text_color)
-                self.screen.blit(text_display, (40, y_pos + 40))
+            entry = self.cards.get(id(notif))
+            if entry is None:
+                entry = self.cards[id(notif)] = (notif, self.render_card(notif))
+            card = entry[1]
+            card.set_alpha(alpha)
+            self.screen.blit(card, (CARD_X, y_pos))
             
-            # Draw progress bar for notification duration
-            progress = elapsed / duration
-            progress_width = 320
-            progress_rect = pygame.Rect(40, y_pos + notification_height - 8, 
-                                      int(progress_width * progress), 4)
-            pygame.draw.rect(self.screen, (100, 200, 100, alpha), progress_rect, border_radius=2)
+            # Progress bar for the notification's remaining time
+            filled = int(PROGRESS_WIDTH * queue.progress(notif, now))
+            if filled > 0:
+                self.progress_bar.set_alpha(alpha)
+                self.screen.blit(self.progress_bar, (CARD_X + 20, y_pos + CARD_HEIGHT - 8),
+                                 area=pygame.Rect(0, 0, filled, 4))
     
-    def draw_achievements_menu(self, achievements, unlocked_count, total_count):
-        """Draw achievements menu screen"""
-        # Draw background
-        self.screen.fill((30, 70, 70))
+    def render_card(self, notif):
+        """Render a toast once, at full opacity"""
+        import pygame
+        card = pygame.Surface((CARD_WIDTH, CARD_HEIGHT), pygame.SRCALPHA)
+        rect = card.get_rect()
+        pygame.draw.rect(card, (40, 40, 40), rect, border_radius=10)
+        pygame.draw.rect(card, (100, 100, 100), rect, 2, border_radius=10)
         
-        # Draw title
-        title_text = self.font.render("ACHIEVEMENTS", True, (255, 255, 255))
-        self.screen.blit(title_text, (WIDTH//2 - 100, 20))
+        if 'icon' in notif:
+            card.blit(self.font.render(notif['icon'], True, (255, 215, 0)), (20, 15))
+        if 'name' in notif:
+            # Gold for achievement names
+            card.blit(self.font.render(notif['name'], True, (255, 215, 0)), (60, 15))
+        if 'description' in notif:
+            card.blit(self.small_font.render(notif['description'], True, (200, 200, 200)), (60, 45))
+        elif 'text' in notif:
+            card.blit(self.small_font.render(notif['text'], True, (255, 255, 255)), (20, 40))
+        return card
+    
+    # ----------------- ACHIEVEMENTS MENU -----------------
+    def draw_achievements_menu(self, achievements, unlocked_count, total_count, version=None):
+        """Draw the achievements menu; pass the manager's version to skip change detection"""
+        import pygame
+        key = version if version is not None else tuple(
+            (achievement_id, a['unlocked'], a.get('unlock_date')) for achievement_id, a in achievements.items())
+        if self.menu_header is None or key != self.menu_key:
+            self.build_menu(achievements, unlocked_count, total_count)
+            self.menu_key = key
+        
+        view_height = MENU_BOTTOM - MENU_TOP
+        max_scroll = max(0, self.menu_list.get_height() - view_height)
+        self.menu_scroll = min(max(self.menu_scroll, 0), max_scroll)
+        
+        self.screen.blit(self.menu_header, (0, 0))
+        self.screen.blit(self.menu_list, (0, MENU_TOP),
+                         area=pygame.Rect(0, self.menu_scroll, WIDTH, view_height))
+        
+        # Scrollbar, only when the list does not fit
+        if max_scroll:
+            thumb = max(20, view_height * view_height // self.menu_list.get_height())
+            thumb_y = MENU_TOP + (view_height - thumb) * self.menu_scroll // max_scroll
+            pygame.draw.rect(self.screen, (100, 200, 100), (WIDTH - 12, thumb_y, 6, thumb), border_radius=3)
+    
+    def scroll_menu(self, dy):
+        """Scroll the menu list by dy pixels (clamped when drawn)"""
+        self.menu_scroll += dy
+    
+    def build_menu(self, achievements, unlocked_count, total_count):
+        import pygame
+        header = pygame.Surface((WIDTH, HEIGHT))
+        header.fill((30, 70, 70))
         
-        # Draw progress
+        # Title and progress
+        title_text = self.font.render("ACHIEVEMENTS", True, (255, 255, 255))
+        header.blit(title_text, (WIDTH//2 - 100, 20))
         progress_text = self.small_font.render(f"Unlocked: {unlocked_count}/{total_count}", 
                                              True, (200, 200, 200))
-        self.screen.blit(progress_text, (WIDTH//2 - 60, 60))
+        header.blit(progress_text, (WIDTH//2 - 60, 60))
         
-        # Draw progress bar
         progress_width = 300
-        progress_filled = int(progress_width * (unlocked_count / total_count))
-        pygame.draw.rect(self.screen, (50, 50, 50), 
+        progress_filled = int(progress_width * (unlocked_count / total_count)) if total_count else 0
+        pygame.draw.rect(header, (50, 50, 50), 
                         (WIDTH//2 - progress_width//2, 90, progress_width, 20),
                         border_radius=10)
-        pygame.draw.rect(self.screen, (100, 200, 100),
+        pygame.draw.rect(header, (100, 200, 100),
                         (WIDTH//2 - progress_width//2, 90, progress_filled, 20),
                         border_radius=10)
         
-        # Draw achievements list
-        y_pos = 130
-        for i, (achievement_id, achievement) in enumerate(achievements.items()):
-            if y_pos > HEIGHT - 100:
-                break
-                
-            achievement_rect = pygame.Rect(30, y_pos, WIDTH - 60, 60)
-            
-            if achievement['unlocked']:
-                # Draw unlocked achievement
-                pygame.draw.rect(self.screen, (60, 120, 60, 200), 
-                               achievement_rect, border_radius=8)
-                pygame.draw.rect(self.screen, (100, 200, 100), 
-                               achievement_rect, 2, border_radius=8)
-                icon_color = (255, 215, 0)
-                text_color = (255, 255, 255)
-            else:
-                # Draw locked achievement
-                pygame.draw.rect(self.screen, (60, 60, 60, 200), 
-                               achievement_rect, border_radius=8)
-                pygame.draw.rect(self.screen, (100, 100, 100), 
-                               achievement_rect, 2, border_radius=8)
-                icon_color = (100, 100, 100)
-                text_color = (150, 150, 150)
-            
-            # Draw icon
-            icon_text = self.font.render(achievement['icon'], True, icon_color)
-            self.screen.blit(icon_text, (50, y_pos + 15))
-            
-            # Draw name
-            name_text = self.font.render(achievement['name'], True, text_color)
-            self.screen.blit(name_text, (90, y_pos + 10))
-            
-            # Draw description
-            desc_text = self.small_font.render(achievement['description'], True, text_color)
-            self.screen.blit(desc_text, (90, y_pos + 35))
-            
-            # Draw lock icon for locked achievements
-            if not achievement['unlocked']:
-                lock_text = self.font.render("🔒", True, (150, 150, 150))
-                self.screen.blit(lock_text, (WIDTH - 70, y_pos + 15))
-            elif achievement.get('unlock_date'):
-                # Show date unlocked
-                date_str = achievement['unlock_date'][:10]  # Just YYYY-MM-DD
-                date_text = self.small_font.render(date_str, True, (200, 200, 200))
-                self.screen.blit(date_text, (WIDTH - 120, y_pos + 20))
-            
-            y_pos += 70
\ No newline at end of file
+        # One card per achievement on a tall transparent list surface
+        rows = pygame.Surface((WIDTH, max(1, len(achievements) * MENU_ROW)), pygame.SRCALPHA)
+        for i, achievement in enumerate(achievements.values()):
+            self.render_menu_card(rows, achievement, i * MENU_ROW)
+        
+        self.menu_header = header
+        self.menu_list = rows
+    
+    def render_menu_card(self, surface, achievement, y_pos):
+        import pygame
+        achievement_rect = pygame.Rect(30, y_pos, WIDTH - 60, 60)
+        
+        if achievement['unlocked']:
+            pygame.draw.rect(surface, (60, 120, 60, 200), achievement_rect, border_radius=8)
+            pygame.draw.rect(surface, (100, 200, 100), achievement_rect, 2, border_radius=8)
+            icon_color = (255, 215, 0)
+            text_color = (255, 255, 255)
+        else:
+            pygame.draw.rect(surface, (60, 60, 60, 200), achievement_rect, border_radius=8)
+            pygame.draw.rect(surface, (100, 100, 100), achievement_rect, 2, border_radius=8)
+            icon_color = (100, 100, 100)
+            text_color = (150, 150, 150)
+        
+        surface.blit(self.font.render(achievement['icon'], True, icon_color), (50, y_pos + 15))
+        surface.blit(self.font.render(achievement['name'], True, text_color), (90, y_pos + 10))
+        surface.blit(self.small_font.render(achievement['description'], True, text_color), (90, y_pos + 35))
+        
+        if not achievement['unlocked']:
+            lock_text = self.font.render("🔒", True, (150, 150, 150))
+            surface.blit(lock_text, (WIDTH - 70, y_pos + 15))
+        elif achievement.get('unlock_date'):
+            # Just YYYY-MM-DD
+            date_text = self.small_font.render(achievement['unlock_date'][:10], True, (200, 200, 200))
+            surface.blit(date_text, (WIDTH - 120, y_pos + 20))
@@ -0,0 +1,457 @@
+# proof.py
+"""Proof-number search: prove or disprove forced wins on m,n,k boards.
+
+    python proof.py --rows 7 --cols 7 --k 4 [--moves "3,3 2,4"] [--engine dfpn]
+                    [--budget 1000000] [--max-nodes N] [--attacker x|o]
+
+Answers "can the attacker (X unless told otherwise) force a win from this
+position?"; a draw counts as no. Two engines:
+
+  pn    best-first proof-number search over an explicit tree. A node's
+        children are created one at a time as the search reaches them, and
+        solved positions go in a transposition table that every path to
+        them shares. Solved subtrees are cut back to the (dis)proof itself,
+        and the tree and table together are capped at `budget` nodes.
+  dfpn  depth-first proof-number search. Only a transposition table is
+        kept, capped at `budget` entries; when it fills up, the half with
+        the least search effort behind it is dropped. Dropped positions
+        are searched again when needed, so a budget of a few times the
+        proof size still finishes, only slower; a budget below the proof
+        size makes the search give up (see DFPN.collect).
+
+Both use phi/delta numbers from the side to move's point of view: phi is
+the cost of proving that the side to move succeeds, delta the cost of
+proving that it fails. Move generation is sound, so answers are exact both
+ways: a side with a move that completes a line wins at once, a side facing
+two such moves loses, and a side facing one must block it; otherwise every
+empty cell is tried, cells next to stones first.
+
+The result also gives the size of the proof: the positions it needs, with
+one winning move where the winner moves and every reply where the loser
+does.
+"""
+import argparse
+import heapq
+import time
+
+WIN, DRAW, LOSS = 1, 0, -1  # for the side to move
+INF = 1 << 40
+UNKNOWN = (1, 1, 0)  # phi, delta, work of a position not searched yet
+DEFAULT_BUDGET = 1_000_000
+MAX_STALLED = 32  # DFPN table collections in a row that keep no more solved positions than before
+
+def windows(rows, cols, k):
+    """Bit masks of every k-in-a-row window (cell = row * cols + col)"""
+    masks = []
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < rows and 0 <= end_c < cols:
+                    masks.append(sum(1 << ((r + dr * i) * cols + c + dc * i) for i in range(k)))
+    return masks
+
+# ----------------- POSITIONS -----------------
+class Position:
+    """An m,n,k position as bit masks of X and O marks, played and unplayed in place"""
+    def __init__(self, rows, cols, k):
+        self.rows, self.cols, self.k = rows, cols, k
+        self.cells = rows * cols
+        self.windows = windows(rows, cols, k)
+        self.full = (1 << self.cells) - 1
+        self.x = self.o = 0
+        self.turn = 1
+        # Centre first; cells next to stones are moved ahead of these in expand()
+        middle_r, middle_c = (rows - 1) / 2, (cols - 1) / 2
+        self.order = sorted(range(self.cells),
+                            key=lambda c: (abs(c // cols - middle_r) + abs(c % cols - middle_c), c))
+        self.neighbours = []
+        for cell in range(self.cells):
+            r, c = divmod(cell, cols)
+            self.neighbours.append(sum(1 << (nr * cols + nc)
+                                       for nr in range(max(0, r - 1), min(rows, r + 2))
+                                       for nc in range(max(0, c - 1), min(cols, c + 2))))
+        # Key change for playing a cell, per player (see key())
+        self.key_deltas = {1: [(1 << c) + (1 << 2 * self.cells) for c in range(self.cells)],
+                           2: [(1 << (c + self.cells)) - (1 << 2 * self.cells) for c in range(self.cells)]}
+
+    @classmethod
+    def from_moves(cls, rows, cols, k, moves):
+        """Position after (row, col) moves played alternately, X first"""
+        position = cls(rows, cols, k)
+        for row, col in moves:
+            cell = row * cols + col
+            if not 0 <= row < rows or not 0 <= col < cols or (position.x | position.o) >> cell & 1:
+                raise ValueError(f"illegal move {row},{col}")
+            position.play(cell)
+        return position
+
+    def play(self, cell):
+        if self.turn == 1:
+            self.x |= 1 << cell
+        else:
+            self.o |= 1 << cell
+        self.turn = 3 - self.turn
+
+    def undo(self, cell):
+        self.turn = 3 - self.turn
+        if self.turn == 1:
+            self.x &= ~(1 << cell)
+        else:
+            self.o &= ~(1 << cell)
+
+    def key(self):
+        """One int for the marks and the side to move"""
+        return self.x | self.o << self.cells | self.turn << 2 * self.cells
+
+    def winner(self):
+        """Player with a complete line, or 0"""
+        for w in self.windows:
+            if self.x & w == w:
+                return 1
+            if self.o & w == w:
+                return 2
+        return 0
+
+    def expand(self):
+        """(outcome, ()) if the side to move's result is already settled, else (None, moves)"""
+        mine, theirs = (self.x, self.o) if self.turn == 1 else (self.o, self.x)
+        need = self.k - 1
+        blocks = 0
+        for w in self.windows:
+            if not theirs & w:
+                if (mine & w).bit_count() == need:
+                    return WIN, ()
+            elif not mine & w and (theirs & w).bit_count() == need:
+                blocks |= w & ~theirs
+        if blocks:
+            if blocks & (blocks - 1):
+                return LOSS, ()
+            return None, (blocks.bit_length() - 1,)
+        occupied = mine | theirs
+        empty = self.full & ~occupied
+        if not empty:
+            return DRAW, ()
+        near = 0
+        while occupied:
+            low = occupied & -occupied
+            near |= self.neighbours[low.bit_length() - 1]
+            occupied ^= low
+        near &= empty
+        return None, ([c for c in self.order if near >> c & 1] +
+                      [c for c in self.order if (empty & ~near) >> c & 1])
+
+def settled(outcome, turn, attacker):
+    """(phi, delta) of a settled position: a draw is a success for the defender"""
+    if outcome == WIN or (outcome == DRAW and turn != attacker):
+        return 0, INF
+    return INF, 0
+
+# ----------------- DEPTH-FIRST PN -----------------
+class DFPN:
+    def __init__(self, position, attacker=1, budget=DEFAULT_BUDGET):
+        self.position = position
+        self.attacker = attacker
+        self.budget = budget
+        self.table = {}  # key -> (phi, delta, work)
+        self.nodes = 0  # positions expanded
+        self.max_nodes = None
+        self.collections = 0
+        self.most_solved = 0  # most solved entries kept by a collection so far
+        self.stalled = 0  # collections since that count last went up
+        self.gave_up = False
+
+    def solve(self, max_nodes=None):
+        """True if the attacker wins, False if not, None if max_nodes or the table ran out first"""
+        self.max_nodes = max_nodes
+        key = self.position.key()
+        self.mid(key, INF, INF)
+        return self.answer(self.table.get(key, UNKNOWN), self.position.turn)
+
+    def answer(self, entry, turn):
+        phi, delta, _ = entry
+        if phi and delta:
+            return None
+        return (phi == 0) == (turn == self.attacker)
+
+    def mid(self, key, th_phi, th_delta):
+        """Search until this position's phi or delta reaches its threshold"""
+        phi, delta, _ = self.table.get(key, UNKNOWN)
+        if phi >= th_phi or delta >= th_delta:
+            return
+        position = self.position
+        self.nodes += 1
+        start = self.nodes
+        outcome, moves = position.expand()
+        if outcome is not None:
+            phi, delta = settled(outcome, position.turn, self.attacker)
+            self.store(key, phi, delta, 1)
+            return
+        deltas = position.key_deltas[position.turn]
+        children = [key + deltas[cell] for cell in moves]
+        while True:
+            # phi: the child that is cheapest to refute; delta: all children must succeed
+            phi, delta, second = INF, 0, INF
+            best = best_phi = 0
+            for i, child in enumerate(children):
+                child_phi, child_delta, _ = self.table.get(child, UNKNOWN)
+                delta += child_phi
+                if child_delta < phi:
+                    second, phi, best, best_phi = phi, child_delta, i, child_phi
+                elif child_delta < second:
+                    second = child_delta
+            delta = min(delta, INF)
+            if phi >= th_phi or delta >= th_delta:
+                break
+            if self.gave_up or (self.max_nodes is not None and self.nodes >= self.max_nodes):
+                break
+            position.play(moves[best])
+            self.mid(children[best], min(INF, th_delta - delta + best_phi), min(th_phi, second + 1))
+            position.undo(moves[best])
+        self.store(key, phi, delta, self.nodes - start + 1)
+
+    def store(self, key, phi, delta, work):
+        # Work adds up over every search of the position, so re-searched ones count in full
+        self.table[key] = (phi, delta, self.table.get(key, UNKNOWN)[2] + work)
+        if len(self.table) > self.budget:
+            self.collect(key)
+
+    def collect(self, latest):
+        """Keep the entries with the most search behind them, down to half the budget
+
+        A table smaller than the proof keeps dropping positions it needs
+        again; once MAX_STALLED collections in a row keep no more solved
+        positions than an earlier one, the search gives up.
+        """
+        entry = self.table[latest]
+        keep = heapq.nlargest(self.budget // 2, self.table.items(), key=lambda item: item[1][2])
+        self.table.clear()
+        self.table.update(keep)
+        # The entry just stored is the one the caller's loop reads next
+        self.table[latest] = entry
+        self.collections += 1
+        solved = sum(1 for phi, delta, _ in self.table.values() if not (phi and delta))
+        if solved > self.most_solved:
+            self.most_solved = solved
+            self.stalled = 0
+        else:
+            self.stalled += 1
+            self.gave_up = self.stalled >= MAX_STALLED
+
+    def proof_size(self):
+        """Positions in the root's proof or disproof (re-searching any that were collected)
+
+        None if the table is too small to hold the positions re-searched.
+        """
+        self.max_nodes = None
+        self.most_solved = self.stalled = 0
+        self.gave_up = False
+        seen = set()
+        self.walk(self.position.key(), seen)
+        return None if self.gave_up else len(seen)
+
+    def solved(self, key):
+        entry = self.table.get(key, UNKNOWN)
+        if entry[0] and entry[1]:
+            self.mid(key, INF, INF)
+            entry = self.table[key]
+        return entry
+
+    def walk(self, key, seen):
+        if key in seen:
+            return
+        seen.add(key)
+        position = self.position
+        outcome, moves = position.expand()
+        if outcome is not None:
+            return
+        phi, _, _ = self.solved(key)
+        if self.gave_up:
+            return
+        deltas = position.key_deltas[position.turn]
+        if phi:
+            # The side to move fails: every reply is part of the proof
+            for cell in moves:
+                position.play(cell)
+                self.walk(key + deltas[cell], seen)
+                position.undo(cell)
+            return
+        # The side to move succeeds: one refuted reply is enough. If the table
+        # lost track of which, search this position again until it names one.
+        while True:
+            cell = next((cell for cell in moves if self.table.get(key + deltas[cell], UNKNOWN)[1] == 0), None)
+            if cell is not None:
+                break
+            self.table.pop(key, None)
+            self.mid(key, INF, INF)
+            if self.gave_up:
+                return
+        position.play(cell)
+        self.walk(key + deltas[cell], seen)
+        position.undo(cell)
+
+# ----------------- BEST-FIRST PN -----------------
+class PNNode:
+    __slots__ = ('moves', 'children', 'phi', 'delta')
+
+    def __init__(self):
+        self.moves = None  # cells to try, in order; None until expanded
+        self.children = []  # nodes for moves[:len(children)], created as they are reached
+        self.phi, self.delta = UNKNOWN[:2]
+
+class PNSearch:
+    def __init__(self, position, attacker=1, budget=DEFAULT_BUDGET):
+        self.position = position
+        self.attacker = attacker
+        self.budget = budget
+        self.root = PNNode()
+        self.solved = {}  # key -> solved node, shared by every path to the position
+        self.size = 1  # nodes kept: unsolved ones in the tree plus the solved table
+        self.nodes = 0  # positions expanded
+
+    def solve(self, max_nodes=None):
+        """True if the attacker wins, False if not, None if the node budget or max_nodes ran out first"""
+        root = self.root
+        position = self.position
+        while root.phi and root.delta:
+            if self.size >= self.budget or (max_nodes is not None and self.nodes >= max_nodes):
+                return None
+            # Most-proving node: always follow the child that sets this node's phi
+            node = root
+            path = []
+            while node.moves is not None and node.phi and node.delta:
+                cell, child = self.select(node)
+                path.append((cell, node))
+                node = child
+            if node.moves is None:
+                self.develop(node)
+            self.update(node)
+            for cell, parent in reversed(path):
+                position.undo(cell)
+                self.update(parent)
+        return (root.phi == 0) == (position.turn == self.attacker)
+
+    def select(self, node):
+        """Play the move to the child with the smallest delta, creating it if it is next"""
+        children = node.children
+        best = min(range(len(children)), key=lambda i: children[i].delta, default=None)
+        # Untried moves count as delta 1, and come after every tried one
+        if len(children) < len(node.moves) and (best is None or children[best].delta > 1):
+            cell = node.moves[len(children)]
+            self.position.play(cell)
+            child = self.solved.get(self.position.key())
+            if child is None:
+                child = PNNode()
+                self.size += 1
+            children.append(child)
+            return cell, child
+        cell = node.moves[best]
+        self.position.play(cell)
+        return cell, children[best]
+
+    def develop(self, node):
+        self.nodes += 1
+        outcome, moves = self.position.expand()
+        if outcome is not None:
+            node.phi, node.delta = settled(outcome, self.position.turn, self.attacker)
+            node.moves = ()
+            self.solved[self.position.key()] = node
+            return
+        node.moves = moves
+
+    def update(self, node):
+        moves, children = node.moves, node.children
+        if not moves or not (node.phi and node.delta):
+            return  # settled at expansion, or already solved
+        untried = len(moves) - len(children)
+        node.phi = min(min((child.delta for child in children), default=INF), 1 if untried else INF)
+        node.delta = min(INF, sum(child.phi for child in children) + untried)
+        if node.phi and node.delta:
+            return
+        # A solved node keeps only its (dis)proof: one refuted child, or every child if it fails
+        if node.phi == 0 and len(children) > 1:
+            i = next(i for i, child in enumerate(children) if child.delta == 0)
+            self.size -= sum(self.count(child) for child in children if child is not children[i])
+            node.moves, node.children = (moves[i],), [children[i]]
+        self.solved[self.position.key()] = node
+
+    def count(self, node):
+        """Unsolved nodes under and including node (solved ones stay in the table)"""
+        total = 0
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.phi and node.delta:
+                total += 1
+                stack.extend(node.children)
+        return total
+
+    def proof_size(self):
+        """Positions in the root's proof or disproof"""
+        seen = set()
+        position = self.position
+
+        def walk(node):
+            key = position.key()
+            if key in seen:
+                return
+            seen.add(key)
+            for cell, child in zip(node.moves, node.children):
+                position.play(cell)
+                walk(child)
+                position.undo(cell)
+
+        walk(self.root)
+        return len(seen)
+
+ENGINES = {'dfpn': DFPN, 'pn': PNSearch}
+
+def prove(position, engine='dfpn', attacker=1, budget=DEFAULT_BUDGET, max_nodes=None):
+    """Search a position; returns {'win', 'proof_size', 'nodes', 'memory', 'seconds'}
+
+    'win' is True or False for solved positions and None if the search ran out
+    of nodes or memory; 'memory' is the tree size or table entries at the end.
+    """
+    start = time.perf_counter()
+    winner = position.winner()
+    if winner:
+        return {'win': winner == attacker, 'proof_size': 1, 'nodes': 0, 'memory': 0, 'seconds': 0.0}
+    search = ENGINES[engine](position, attacker, budget)
+    win = search.solve(max_nodes)
+    seconds = time.perf_counter() - start
+    return {
+        'win': win,
+        'proof_size': search.proof_size() if win is not None else None,
+        'nodes': search.nodes,
+        'memory': search.size if engine == 'pn' else len(search.table),
+        'seconds': seconds
+    }
+
+def parse_moves(text):
+    """'3,3 2,4' -> [(3, 3), (2, 4)]"""
+    return [tuple(int(v) for v in move.split(',')) for move in text.split()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=7)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--moves', default='', help='moves so far, X first: "row,col row,col ..."')
+    parser.add_argument('--engine', default='dfpn', choices=sorted(ENGINES))
+    parser.add_argument('--attacker', default='x', choices=['x', 'o'])
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET,
+                        help='tree nodes (pn) or table entries (dfpn) to keep at most')
+    parser.add_argument('--max-nodes', type=int, help='positions to expand before giving up')
+    args = parser.parse_args()
+    position = Position.from_moves(args.rows, args.cols, args.k, parse_moves(args.moves))
+    attacker = 1 if args.attacker == 'x' else 2
+    result = prove(position, args.engine, attacker, args.budget, args.max_nodes)
+    answer = {True: 'forced win', False: 'no forced win', None: 'unknown (budget exhausted)'}[result['win']]
+    print(f"{args.attacker.upper()}: {answer}")
+    print(f"  {result['nodes']:,} positions in {result['seconds']:.2f} s "
+          f"({result['nodes'] / max(result['seconds'], 1e-9):,.0f}/s), memory {result['memory']:,}")
+    if result['proof_size'] is not None:
+        print(f"  proof size {result['proof_size']:,} positions")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+# records.py
+"""Compact binary game records in an append-only, indexed archive.
+
+A record is a 16-byte header followed by one byte per ply: the cell index
+(row * side + col) with the top bit set for O. Boards with more than 128
+cells use two bytes per ply (cell | player bit 15). A finished 3x3 game
+takes 21-25 bytes.
+
+The archive is two files:
+
+    games.rec   b'TTTREC01' then records back to back (append-only)
+    games.idx   one little-endian uint64 offset per game; game id = position
+
+Any game is read back by id with one index lookup and no scanning. Readers
+memory-map both files, and iter_records() streams the data file front to
+back without touching the index. A record is written before its index
+entry, so after a crash the archive ends at the last indexed game and any
+torn tail is cut off when the archive is next opened.
+"""
+import mmap
+import os
+import struct
+import time
+
+from game import TIMER_MODES
+
+MAGIC = b'TTTREC01'
+# side, flags, result, difficulty, timer mode, reserved, plies, start time (s), duration (ms)
+RECORD_HEADER = struct.Struct('<BBbBBBHII')
+INDEX_ENTRY = struct.Struct('<Q')
+
+FLAG_USED_UNDO = 1
+FLAG_WIDE = 2  # two bytes per ply
+
+DIFFICULTIES = [None, 'easy', 'medium', 'hard']
+TIMER_MODE_NAMES = list(TIMER_MODES)
+
+# ----------------- ENCODING -----------------
+def encode_record(moves, result, difficulty=None, timer_mode='no_timer', started=0.0,
+                  duration=0.0, used_undo=False, side=3):
+    """Bytes for one game; moves are (row, col, player) with player 1 (X) or 2 (O)"""
+    wide = side * side > 128
+    flags = (FLAG_USED_UNDO if used_undo else 0) | (FLAG_WIDE if wide else 0)
+    header = RECORD_HEADER.pack(side, flags, result, DIFFICULTIES.index(difficulty),
+                                TIMER_MODE_NAMES.index(timer_mode), 0, len(moves),
+                                int(started), min(int(duration * 1000), 0xFFFFFFFF))
+    if wide:
+        plies = struct.pack(f'<{len(moves)}H', *((row * side + col) | ((player - 1) << 15)
+                                                 for row, col, player in moves))
+    else:
+        plies = bytes((row * side + col) | ((player - 1) << 7) for row, col, player in moves)
+    return header + plies
+
+def record_size(buffer, offset):
+    """Total size of the record starting at offset"""
+    fields = RECORD_HEADER.unpack_from(buffer, offset)
+    return RECORD_HEADER.size + fields[6] * (2 if fields[1] & FLAG_WIDE else 1)
+
+def decode_plies(buffer, offset, side, plies, wide):
+    """[(row, col, player), ...] from packed plies"""
+    if wide:
+        packed = struct.unpack_from(f'<{plies}H', buffer, offset)
+        return [((value & 0x7FFF) // side, (value & 0x7FFF) % side, 1 + (value >> 15)) for value in packed]
+    packed = bytes(buffer[offset:offset + plies])
+    return [((value & 0x7F) // side, (value & 0x7F) % side, 1 + (value >> 7)) for value in packed]
+
+def decode_record(buffer, offset=0):
+    """The record at offset as a dict"""
+    side, flags, result, difficulty, timer_mode, _, plies, started, duration_ms = \
+        RECORD_HEADER.unpack_from(buffer, offset)
+    return {
+        'side': side,
+        'result': result,
+        'difficulty': DIFFICULTIES[difficulty],
+        'timer_mode': TIMER_MODE_NAMES[timer_mode],
+        'used_undo': bool(flags & FLAG_USED_UNDO),
+        'started': started,
+        'duration': duration_ms / 1000,
+        'moves': decode_plies(buffer, offset + RECORD_HEADER.size, side, plies, bool(flags & FLAG_WIDE))
+    }
+
+# ----------------- ARCHIVE -----------------
+class GameArchive:
+    def __init__(self, path='games.rec', index_path=None):
+        self.path = path
+        self.index_path = index_path or os.path.splitext(path)[0] + '.idx'
+        self.data = None  # append handles, opened on first use
+        self.index = None
+        self.count = 0
+        self.end = 0  # end of the last indexed record
+        self.maps = None  # (data mmap, index mmap, count) for readers
+
+    def open(self):
+        """Open for appending, creating the files or repairing a torn tail (once)"""
+        if self.data is not None:
+            return self
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) < len(MAGIC)
+        self.data = open(self.path, 'w+b' if new else 'r+b')
+        self.index = open(self.index_path, 'w+b' if new else 'a+b')
+        if new:
+            self.data.write(MAGIC)
+            self.end = len(MAGIC)
+        else:
+            self.data.seek(0)
+            if self.data.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a game archive")
+            self.recover()
+        self.data.seek(self.end)
+        return self
+
+    def recover(self):
+        """Drop a partial index entry and any record written after the last indexed one"""
+        index_size = os.fstat(self.index.fileno()).st_size
+        self.count = index_size // INDEX_ENTRY.size
+        if index_size % INDEX_ENTRY.size:
+            self.index.truncate(self.count * INDEX_ENTRY.size)
+        self.end = len(MAGIC)
+        data_size = os.fstat(self.data.fileno()).st_size
+        while self.count:
+            self.index.seek((self.count - 1) * INDEX_ENTRY.size)
+            (offset,) = INDEX_ENTRY.unpack(self.index.read(INDEX_ENTRY.size))
+            if offset + RECORD_HEADER.size <= data_size:
+                self.data.seek(offset)
+                header = self.data.read(RECORD_HEADER.size)
+                end = offset + record_size(header, 0)
+                if end <= data_size:
+                    self.end = end
+                    break
+            # The index got ahead of the data; forget that entry
+            self.count -= 1
+            self.index.truncate(self.count * INDEX_ENTRY.size)
+        if data_size > self.end:
+            self.data.truncate(self.end)
+
+    def append(self, moves, result, difficulty=None, timer_mode='no_timer', started=None,
+               duration=0.0, used_undo=False, side=3):
+        """Store a finished game; returns its id"""
+        self.open()
+        record = encode_record(moves, result, difficulty, timer_mode,
+                               time.time() if started is None else started,
+                               duration, used_undo, side)
+        offset = self.end
+        # Data first, then the index entry that makes it visible
+        self.data.write(record)
+        self.data.flush()
+        self.index.write(INDEX_ENTRY.pack(offset))
+        self.index.flush()
+        self.end += len(record)
+        self.count += 1
+        return self.count - 1
+
+    def __len__(self):
+        if self.data is None:
+            return os.path.getsize(self.index_path) // INDEX_ENTRY.size if os.path.exists(self.index_path) else 0
+        return self.count
+
+    # ----------------- READING -----------------
+    def mapped(self):
+        """(data, index, count) memory maps, remapped when the archive has grown"""
+        count = len(self)
+        if self.maps is None or self.maps[2] != count:
+            self.close_maps()
+            if not count:
+                return None, None, 0
+            with open(self.path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(self.index_path, 'rb') as f:
+                index = mmap.mmap(f.fileno(), count * INDEX_ENTRY.size, access=mmap.ACCESS_READ)
+            self.maps = (data, index, count)
+        return self.maps
+
+    def get(self, game_id):
+        """The game with this id, as a dict"""
+        data, index, count = self.mapped()
+        if not 0 <= game_id < count:
+            raise IndexError(f"no game {game_id} (archive has {count})")
+        (offset,) = INDEX_ENTRY.unpack_from(index, game_id * INDEX_ENTRY.size)
+        record = decode_record(data, offset)
+        record['id'] = game_id
+        return record
+
+    def iter_records(self, start=0):
+        """Stream games from id start onwards, reading the data file sequentially"""
+        data, index, count = self.mapped()
+        if start >= count:
+            return
+        (offset,) = INDEX_ENTRY.unpack_from(index, start * INDEX_ENTRY.size)
+        for game_id in range(start, count):
+            record = decode_record(data, offset)
+            record['id'] = game_id
+            yield record
+            offset += record_size(data, offset)
+
+    def close_maps(self):
+        if self.maps is not None:
+            for m in self.maps[:2]:
+                m.close()
+            self.maps = None
+
+    def close(self):
+        self.close_maps()
+        for f in (self.data, self.index):
+            if f is not None:
+                f.close()
+        self.data = None
+        self.index = None
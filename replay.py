@@ -0,0 +1,334 @@
+# replay.py
+"""Replay viewer for archived games: step, play, fast-forward and seek.
+
+Replay holds one game's moves and the board at the current ply. It keeps a
+snapshot of the board every few plies, so seeking anywhere restores the
+nearest snapshot at or before the target and applies at most one interval
+of moves; short hops (stepping, playback) just apply or undo moves one at a
+time. The cost of a seek depends on the snapshot interval, not on how long
+the game is.
+
+ReplayPlayer adds playback timing on top and loads games from a GameArchive
+(records.py); ReplayRenderer draws it in the window, reusing the board
+drawing and animations from gui.py.
+"""
+import time
+
+from game import check_winner
+
+SNAPSHOT_EVERY = 16  # plies between snapshots (at least one board side on big boards)
+PLY_INTERVAL = 0.6  # seconds per ply at 1x
+SPEEDS = (1, 2, 4, 8)
+RESULTS = {1: 'X won', 2: 'O won', -1: 'Draw', 0: 'Unfinished'}
+
+# pygame is imported by the renderer only: Replay and ReplayPlayer work headless
+
+class Replay:
+    def __init__(self, moves, side=3, snapshot_every=None):
+        self.moves = moves  # [(row, col, player), ...]
+        self.side = side
+        self.board = [[0] * side for _ in range(side)]
+        self.ply = 0  # moves applied to board
+        self.changes = []  # cells changed since take_changes(), None if all may have
+        self.interval = snapshot_every or max(SNAPSHOT_EVERY, side)
+        # snapshots[i]: flat cells after i * interval plies
+        cells = bytearray(side * side)
+        self.snapshots = [bytes(cells)]
+        for ply, (row, col, player) in enumerate(moves, 1):
+            cells[row * side + col] = player
+            if ply % self.interval == 0:
+                self.snapshots.append(bytes(cells))
+
+    def __len__(self):
+        return len(self.moves)
+
+    def seek(self, target):
+        """Move the board to ply target; returns the cells changed, or None if all may have"""
+        target = min(max(0, target), len(self.moves))
+        if abs(target - self.ply) <= self.interval:
+            changed = []
+            while self.ply < target:
+                row, col, player = self.moves[self.ply]
+                self.board[row][col] = player
+                changed.append((row, col))
+                self.ply += 1
+            while self.ply > target:
+                self.ply -= 1
+                row, col, _ = self.moves[self.ply]
+                self.board[row][col] = 0
+                changed.append((row, col))
+            if self.changes is not None:
+                self.changes.extend(changed)
+                if len(self.changes) > self.side * self.side:
+                    self.changes = None  # nobody is draining them; cheaper to redraw all
+            return changed
+        index = target // self.interval
+        self.restore(self.snapshots[index])
+        self.ply = index * self.interval
+        self.seek(target)
+        self.changes = None
+        return None
+
+    def take_changes(self):
+        """Cells changed since the last call, or None if all may have (for a renderer)"""
+        changes, self.changes = self.changes, []
+        return changes
+
+    def restore(self, cells):
+        side = self.side
+        for r, row in enumerate(self.board):
+            row[:] = cells[r * side:(r + 1) * side]
+
+    def step(self, plies=1):
+        return self.seek(self.ply + plies)
+
+    def last_move(self):
+        return self.moves[self.ply - 1] if self.ply else None
+
+    def at_end(self):
+        return self.ply == len(self.moves)
+
+class ReplayPlayer:
+    def __init__(self, archive, clock=time.monotonic):
+        self.archive = archive
+        self.clock = clock
+        self.game_id = None
+        self.record = None
+        self.replay = None
+        self.playing = False
+        self.speed = 0  # index into SPEEDS
+        self.next_ply_at = None
+        self.scrubbing = False  # dragging the progress bar
+
+    def load(self, game_id):
+        """Open an archived game at its first ply; False if there is no such game"""
+        if not 0 <= game_id < len(self.archive):
+            return False
+        self.record = self.archive.get(game_id)
+        self.replay = Replay(self.record['moves'], self.record['side'])
+        self.game_id = game_id
+        self.pause()
+        return True
+
+    def load_latest(self):
+        return self.load(len(self.archive) - 1)
+
+    def switch(self, step):
+        """Load the previous (-1) or next (+1) game in the archive"""
+        return self.game_id is not None and self.load(self.game_id + step)
+
+    # ----------------- PLAYBACK -----------------
+    def play(self):
+        if self.replay.at_end():
+            self.replay.seek(0)
+        self.playing = True
+        self.next_ply_at = self.clock() + self.ply_interval()
+
+    def pause(self):
+        self.playing = False
+        self.next_ply_at = None
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def fast_forward(self):
+        """Cycle through the playback speeds, and play"""
+        self.speed = (self.speed + 1) % len(SPEEDS)
+        if self.playing:
+            self.next_ply_at = min(self.next_ply_at, self.clock() + self.ply_interval())
+        else:
+            self.play()
+
+    def ply_interval(self):
+        return PLY_INTERVAL / SPEEDS[self.speed]
+
+    def step(self, plies):
+        self.pause()
+        return self.replay.step(plies)
+
+    def seek(self, ply):
+        self.pause()
+        return self.replay.seek(ply)
+
+    def update(self, now=None):
+        """Advance playback to now; returns the cells changed (see Replay.seek)"""
+        if not self.playing or self.scrubbing:
+            return []
+        now = self.clock() if now is None else now
+        if now < self.next_ply_at:
+            return []
+        interval = self.ply_interval()
+        # Catch up on every ply that fell due since the last frame
+        due = 1 + int((now - self.next_ply_at) / interval)
+        self.next_ply_at += due * interval
+        changed = self.replay.step(due)
+        if self.replay.at_end():
+            self.pause()
+        return changed
+
+    def winning_cells(self):
+        """Winning line at the current ply (3x3 boards only)"""
+        if self.replay.side != 3:
+            return []
+        return check_winner(self.replay.board)[1]
+
+# Replay panel geometry (below the board)
+PANEL_Y = 400
+BAR_RECT = (20, 490, 360, 14)
+
+class ReplayRenderer:
+    """Draws the replay board and its control panel.
+
+    3x3 games are drawn with gui's board functions and animated with the
+    shared animation manager; a single forward ply animates, anything else
+    (seeks, scrubbing, jumping several plies) clears the animations so the
+    board shows the position at once. Larger boards are drawn through a
+    culled BoardRenderer into a layer kept between frames, repainting only
+    the cells each seek changed. The panel is rendered once per position.
+    """
+    def __init__(self, screen, font):
+        import pygame
+        self.screen = screen
+        self.font = font
+        self.small_font = pygame.font.SysFont(None, 22)
+        self.panel = None
+        self.panel_key = None
+        self.shown = None  # (game id, ply) last drawn
+        self.board_renderer = None  # for boards other than 3x3
+        self.board_renderer_replay = None
+        self.board_layer = None
+
+    # ----------------- INPUT -----------------
+    def bar_ply(self, player, pos):
+        """Ply under a point on the progress bar, or None"""
+        x, y, w, h = BAR_RECT
+        px, py = pos
+        if not (x - 6 <= px < x + w + 6 and y - 8 <= py < y + h + 8):
+            return None
+        return round(min(max(0, px - x), w) / w * len(player.replay))
+
+    def handle_event(self, player, event):
+        """Progress bar scrubbing and big-board pan/zoom; True if the event was used"""
+        import pygame
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            ply = self.bar_ply(player, event.pos)
+            if ply is not None:
+                player.seek(ply)
+                player.scrubbing = True
+                return True
+        elif event.type == pygame.MOUSEMOTION and player.scrubbing:
+            x, y, w, h = BAR_RECT
+            player.seek(round(min(max(0, event.pos[0] - x), w) / w * len(player.replay)))
+            return True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and player.scrubbing:
+            player.scrubbing = False
+            return True
+        if self.board_renderer is not None and player.replay.side != 3 and event.type != pygame.KEYDOWN:
+            return self.board_renderer.handle_event(event)
+        return False
+
+    # ----------------- DRAWING -----------------
+    def draw(self, player):
+        import gui
+        replay = player.replay
+        if replay.side == 3:
+            self.sync_animations(player)
+            gui.draw_lines()
+            gui.draw_figures(replay.board)
+            gui.animation_manager.draw_animations(self.screen, replay.board)
+            if not gui.animation_manager.animations:
+                gui.draw_winner_line(player.winning_cells())
+            last = replay.last_move()
+            if last:
+                gui.draw_highlight_last_move(*last)
+        else:
+            self.screen.fill(gui.BG_COLOR)
+            self.draw_big_board(player)
+        self.shown = (player.game_id, replay.ply)
+        self.draw_panel(player)
+
+    def sync_animations(self, player):
+        """Animate a single forward ply; otherwise show the position without animations"""
+        from gui import animation_manager
+        replay = player.replay
+        if self.shown == (player.game_id, replay.ply):
+            return
+        stepped = (self.shown == (player.game_id, replay.ply - 1) and not player.scrubbing)
+        animation_manager.animations.clear()
+        animation_manager.particles.clear()
+        if stepped:
+            row, col, mark = replay.last_move()
+            animation_manager.add_move_animation(row, col, mark)
+            if replay.at_end():
+                cells = player.winning_cells()
+                if cells:
+                    animation_manager.add_win_animation(cells)
+                    animation_manager.add_confetti(cells)
+
+    def draw_big_board(self, player):
+        import pygame
+        from board_view import Viewport, BoardRenderer
+        from gui import SQUARE_SIZE
+        replay = player.replay
+        side = replay.side
+        if self.board_renderer is None or self.board_renderer_replay is not replay:
+            viewport = Viewport(side, side, (0, 0, SQUARE_SIZE * 3, SQUARE_SIZE * 3),
+                                max(8, SQUARE_SIZE * 3 // side))
+            self.board_renderer = BoardRenderer(viewport)
+            self.board_renderer_replay = replay
+            self.board_layer = pygame.Surface((SQUARE_SIZE * 3, SQUARE_SIZE * 3))
+            replay.take_changes()  # a new renderer draws every cell anyway
+        # The screen is repainted every frame; the layer keeps the board between frames
+        self.board_renderer.mark_cells(replay.take_changes())
+        self.board_renderer.draw(self.board_layer, replay.board)
+        self.screen.blit(self.board_layer, (0, 0))
+
+    def draw_panel(self, player):
+        replay = player.replay
+        key = (player.game_id, replay.ply, player.playing, player.speed)
+        if self.panel is None or key != self.panel_key:
+            self.panel = self.render_panel(player)
+            self.panel_key = key
+        self.screen.blit(self.panel, (0, PANEL_Y))
+
+    def render_panel(self, player):
+        import pygame
+        from layout import WIDTH, HEIGHT
+        replay = player.replay
+        record = player.record
+        panel = pygame.Surface((WIDTH, HEIGHT - PANEL_Y))
+        panel.fill((30, 70, 70))
+        white = (255, 255, 255)
+        grey = (200, 200, 200)
+
+        title = f"Replay: game {player.game_id + 1} of {len(player.archive)}"
+        panel.blit(self.font.render(title, True, white), (20, 15))
+        details = [RESULTS.get(record['result'], '?')]
+        if record['difficulty']:
+            details.append(record['difficulty'].capitalize())
+        if replay.side != 3:
+            details.append(f"{replay.side}x{replay.side}")
+        details.append(time.strftime('%Y-%m-%d %H:%M', time.localtime(record['started'])))
+        panel.blit(self.small_font.render('  ·  '.join(details), True, grey), (20, 45))
+
+        # Progress bar, with a knob at the current ply
+        x, y, w, h = BAR_RECT
+        y -= PANEL_Y
+        filled = int(w * replay.ply / len(replay)) if len(replay) else 0
+        pygame.draw.rect(panel, (50, 50, 50), (x, y, w, h), border_radius=7)
+        pygame.draw.rect(panel, (100, 200, 100), (x, y, filled, h), border_radius=7)
+        pygame.draw.circle(panel, white, (x + filled, y + h // 2), h // 2 + 3)
+
+        state = f"{'Playing' if player.playing else 'Paused'}  {SPEEDS[player.speed]}x"
+        panel.blit(self.small_font.render(f"Ply {replay.ply}/{len(replay)}", True, white), (20, 115))
+        panel.blit(self.small_font.render(state, True, white), (WIDTH - 130, 115))
+
+        hints = ["Space play/pause   Left/Right step   F faster",
+                 "Home/End first/last   PgUp/PgDn other game",
+                 "Drag the bar to seek   R or Esc to leave"]
+        for i, hint in enumerate(hints):
+            panel.blit(self.small_font.render(hint, True, grey), (20, 150 + i * 24))
+        return panel
@@ -0,0 +1,334 @@
+# retrograde.py
+"""Retrograde solver: complete outcome tables for small m,n,k games.
+
+    python retrograde.py --rows 4 --cols 4 --k 3 [--workers N] [--out PATH]
+
+An m,n,k game is tic-tac-toe on an m x n board won by k in a row (the game
+in the window is 3,3,3). The solver values every position with the side to
+move's outcome (win, loss or draw) and its distance to the end of the game
+under perfect play: the quickest win, the slowest loss.
+
+Positions are grouped into layers by piece count. A move only ever adds a
+piece, so every position in layer p leads into layer p + 1: the solver
+starts at the full board and works back to the empty one, and each layer
+is computed from the finished layer above it alone. Within a layer, a
+position's index is the rank of its set of occupied cells times the number
+of ways to place the X's among them, plus the rank of the X placement.
+Indexes are dense, so a table is one byte per position with legal piece
+counts (outcome in the top two bits, distance in the low six), and a
+move's successor index is a few array lookups away.
+
+Layers are split into chunks solved in parallel by worker processes, which
+read the layer above from its checkpoint file. Finished layers stay in a
+checkpoint directory next to the output, so an interrupted run resumes at
+the first unfinished layer. At the end the layers are joined into one
+table file, which RetrogradeTable memory-maps to answer lookups and best
+moves instantly.
+"""
+import argparse
+import concurrent.futures
+import functools
+import mmap
+import os
+import shutil
+import struct
+import time
+
+WIN, DRAW, LOSS = 1, 2, 3  # for the side to move; 0 marks an unsolved entry
+OUTCOMES = {WIN: 'win', DRAW: 'draw', LOSS: 'loss'}
+MAX_CELLS = 20  # 5x4 and up would need billions of positions anyway
+CHUNK = 1 << 18  # positions per worker task
+
+TABLE_MAGIC = b'TTTRTB01'
+TABLE_HEADER = struct.Struct('<8sBBBB')  # magic, rows, cols, k, reserved; then a uint64 size per layer
+LAYER_SIZE = struct.Struct('<Q')
+
+# numpy is imported where it is used, as in synth.py
+
+# ----------------- GEOMETRY -----------------
+@functools.lru_cache(maxsize=4)
+def geometry(rows, cols, k):
+    """Lines and ranking tables for a board; built once per process"""
+    import numpy
+    cells = rows * cols
+    if not 0 < k <= max(rows, cols) or cells > MAX_CELLS:
+        raise ValueError(f"unsupported board {rows}x{cols} with k={k}")
+    lines = []
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                if 0 <= end_r < rows and 0 <= end_c < cols:
+                    lines.append(sum(1 << ((r + dr * i) * cols + c + dc * i) for i in range(k)))
+
+    masks = numpy.arange(1 << cells, dtype=numpy.int64)
+    popcount = numpy.zeros(1 << cells, dtype=numpy.int64)
+    for cell in range(cells):
+        popcount += (masks >> cell) & 1
+
+    # occupied[p]: sets of p occupied cells in increasing order; occupied_rank maps a set to its rank
+    occupied = [numpy.flatnonzero(popcount == p) for p in range(cells + 1)]
+    occupied_rank = numpy.zeros(1 << cells, dtype=numpy.int64)
+    for sets in occupied:
+        occupied_rank[sets] = numpy.arange(len(sets))
+    # patterns[p]: which of the p occupied cells hold X (bit j: the j-th occupied cell, low to high)
+    patterns, pattern_rank = [], []
+    for p in range(cells + 1):
+        found = numpy.flatnonzero(popcount[:1 << p] == x_count(p))
+        ranks = numpy.zeros(1 << p, dtype=numpy.int64)
+        ranks[found] = numpy.arange(len(found))
+        patterns.append(found)
+        pattern_rank.append(ranks)
+    return {
+        'rows': rows, 'cols': cols, 'k': k, 'cells': cells,
+        'lines': lines,
+        'popcount': popcount,
+        'occupied': occupied,
+        'occupied_rank': occupied_rank,
+        'patterns': patterns,
+        'pattern_rank': pattern_rank,
+        'layer_sizes': [len(occupied[p]) * len(patterns[p]) for p in range(cells + 1)]
+    }
+
+def x_count(pieces):
+    """X moves first, so with p pieces down X has (p + 1) // 2 of them"""
+    return (pieces + 1) // 2
+
+def successor_scores():
+    """Score (higher is better) of a move for the mover, by the value byte of the position it leads to"""
+    import numpy
+    scores = numpy.full(256, -1, dtype=numpy.int64)
+    for value in range(256):
+        outcome, distance = value >> 6, value & 63
+        if outcome == LOSS:  # the opponent loses: a win, sooner is better
+            scores[value] = 200 - (distance + 1)
+        elif outcome == DRAW:
+            scores[value] = 100
+        elif outcome == WIN:  # the opponent wins: a loss, later is better
+            scores[value] = distance + 1
+    return scores
+
+def encode(scores, draw_distance):
+    """Value bytes for the best successor scores"""
+    import numpy
+    return numpy.where(scores > 100, (WIN << 6) | (200 - scores),
+                       numpy.where(scores < 100, (LOSS << 6) | scores,
+                                   (DRAW << 6) | draw_distance)).astype(numpy.uint8)
+
+def completes_line(marks, lines):
+    import numpy
+    done = numpy.zeros(len(marks), dtype=bool)
+    for line in lines:
+        done |= (marks & line) == line
+    return done
+
+# ----------------- SOLVING -----------------
+def solve_chunk(rows, cols, k, pieces, start, stop, next_path):
+    """Value bytes for the positions of layer `pieces` whose occupied sets rank in [start, stop)"""
+    import numpy
+    g = geometry(rows, cols, k)
+    cells = g['cells']
+    occupied = g['occupied'][pieces][start:stop]
+    patterns = g['patterns'][pieces]
+
+    # Cell number of each occupied set's j-th occupied cell
+    positions = numpy.zeros((len(occupied), pieces), dtype=numpy.int64)
+    seen = numpy.zeros(len(occupied), dtype=numpy.int64)
+    for cell in range(cells):
+        has = ((occupied >> cell) & 1).astype(bool)
+        positions[has, seen[has]] = cell
+        seen += has
+    x_marks = numpy.zeros((len(occupied), len(patterns)), dtype=numpy.int64)
+    for j in range(pieces):
+        x_marks |= ((patterns[None, :] >> j) & 1) << positions[:, j:j + 1]
+    # One row per position, in index order
+    occupied = numpy.repeat(occupied, len(patterns))
+    pattern = numpy.tile(patterns, stop - start)
+    x_marks = x_marks.ravel()
+    o_marks = occupied ^ x_marks
+
+    x_to_move = pieces % 2 == 0
+    mover, last = (x_marks, o_marks) if x_to_move else (o_marks, x_marks)
+    values = numpy.zeros(len(occupied), dtype=numpy.uint8)
+    lost = completes_line(last, g['lines'])
+    values[lost] = LOSS << 6
+    # Both sides with a line cannot happen in play; value it as already won
+    won = ~lost & completes_line(mover, g['lines'])
+    values[won] = WIN << 6
+    open_ = ~(lost | won)
+    if pieces == cells:
+        values[open_] = DRAW << 6
+        return values.tobytes()
+
+    next_values = numpy.memmap(next_path, dtype=numpy.uint8, mode='r')
+    next_patterns = len(g['patterns'][pieces + 1])
+    next_rank = g['pattern_rank'][pieces + 1]
+    scores = successor_scores()
+    best = numpy.full(len(occupied), -1, dtype=numpy.int64)
+    for cell in range(cells):
+        free = open_ & (((occupied >> cell) & 1) == 0)
+        if not free.any():
+            continue
+        occ = occupied[free]
+        pat = pattern[free]
+        # The new piece becomes occupied cell number `below`; shift the X bits above it up one
+        below = g['popcount'][occ & ((1 << cell) - 1)]
+        new_pattern = (pat & ((1 << below) - 1)) | ((pat >> below) << (below + 1)) | (int(x_to_move) << below)
+        successor = g['occupied_rank'][occ | (1 << cell)] * next_patterns + next_rank[new_pattern]
+        best[free] = numpy.maximum(best[free], scores[next_values[successor]])
+    values[open_] = encode(best[open_], cells - pieces)
+    return values.tobytes()
+
+def default_path(rows, cols, k):
+    return f"retro_{rows}x{cols}_k{k}.tbl"
+
+def layer_path(checkpoints, pieces):
+    return os.path.join(checkpoints, f"layer_{pieces:02d}.bin")
+
+def solve(rows, cols, k, path=None, workers=None, chunk=CHUNK, progress=print):
+    """Build the table for an m,n,k game at path, resuming from checkpoints; returns the path"""
+    g = geometry(rows, cols, k)
+    cells = g['cells']
+    path = path or default_path(rows, cols, k)
+    checkpoints = path + '.layers'
+    os.makedirs(checkpoints, exist_ok=True)
+    # Layers only resume into the same game
+    board = os.path.join(checkpoints, 'board')
+    if os.path.exists(board):
+        with open(board) as f:
+            if f.read().split() != [str(rows), str(cols), str(k)]:
+                raise ValueError(f"{checkpoints} holds layers of another game")
+    else:
+        with open(board, 'w') as f:
+            f.write(f"{rows} {cols} {k}\n")
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        for pieces in range(cells, -1, -1):
+            target = layer_path(checkpoints, pieces)
+            size = g['layer_sizes'][pieces]
+            if os.path.exists(target) and os.path.getsize(target) == size:
+                progress(f"layer {pieces:2d}: {size:>10,} positions (checkpoint)")
+                continue
+            start = time.perf_counter()
+            next_path = layer_path(checkpoints, pieces + 1) if pieces < cells else None
+            sets = len(g['occupied'][pieces])
+            step = max(1, chunk // len(g['patterns'][pieces]))
+            futures = [pool.submit(solve_chunk, rows, cols, k, pieces, first, min(first + step, sets), next_path)
+                       for first in range(0, sets, step)]
+            # Write under a temporary name: a layer file only exists once it is complete
+            partial = target + '.tmp'
+            with open(partial, 'wb') as f:
+                for future in futures:
+                    f.write(future.result())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(partial, target)
+            progress(f"layer {pieces:2d}: {size:>10,} positions in {time.perf_counter() - start:6.2f} s")
+
+    partial = path + '.tmp'
+    with open(partial, 'wb') as out:
+        out.write(TABLE_HEADER.pack(TABLE_MAGIC, rows, cols, k, 0))
+        for size in g['layer_sizes']:
+            out.write(LAYER_SIZE.pack(size))
+        for pieces in range(cells + 1):
+            with open(layer_path(checkpoints, pieces), 'rb') as layer:
+                shutil.copyfileobj(layer, out)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(partial, path)
+    shutil.rmtree(checkpoints)
+    return path
+
+# ----------------- TABLES -----------------
+class RetrogradeTable:
+    """A solved table: value and best move of any position, read from a memory map"""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.rows, self.cols, self.k, _ = TABLE_HEADER.unpack_from(self.data, 0)
+        if magic != TABLE_MAGIC:
+            raise ValueError(f"{path} is not a retrograde table")
+        self.geometry = geometry(self.rows, self.cols, self.k)
+        cells = self.geometry['cells']
+        offset = TABLE_HEADER.size + LAYER_SIZE.size * (cells + 1)
+        self.offsets = []
+        for pieces in range(cells + 1):
+            (size,) = LAYER_SIZE.unpack_from(self.data, TABLE_HEADER.size + LAYER_SIZE.size * pieces)
+            if size != self.geometry['layer_sizes'][pieces]:
+                raise ValueError(f"{path}: layer {pieces} has {size} entries, expected "
+                                 f"{self.geometry['layer_sizes'][pieces]}")
+            self.offsets.append(offset)
+            offset += size
+        if offset != len(self.data):
+            raise ValueError(f"{path} is truncated")
+        self.scores = successor_scores()
+
+    def masks(self, board):
+        x_marks = o_marks = 0
+        for r, row in enumerate(board):
+            for c, cell in enumerate(row):
+                if cell == 1:
+                    x_marks |= 1 << (r * self.cols + c)
+                elif cell == 2:
+                    o_marks |= 1 << (r * self.cols + c)
+        return x_marks, o_marks
+
+    def lookup(self, x_marks, o_marks):
+        """Value byte of a position given as bit masks"""
+        g = self.geometry
+        occupied = x_marks | o_marks
+        pieces = bin(occupied).count('1')
+        if bin(x_marks).count('1') != x_count(pieces):
+            raise ValueError('X moves first: X has as many marks as O, or one more')
+        pattern = j = 0
+        for cell in range(g['cells']):
+            if occupied >> cell & 1:
+                pattern |= (x_marks >> cell & 1) << j
+                j += 1
+        index = (int(g['occupied_rank'][occupied]) * len(g['patterns'][pieces])
+                 + int(g['pattern_rank'][pieces][pattern]))
+        return self.data[self.offsets[pieces] + index]
+
+    def value(self, board):
+        """(outcome, distance) for the side to move; outcome is WIN, DRAW or LOSS"""
+        value = self.lookup(*self.masks(board))
+        return value >> 6, value & 63
+
+    def best_move(self, board):
+        """(row, col) of a perfect move for the side to move, or None if the game is over"""
+        x_marks, o_marks = self.masks(board)
+        if self.lookup(x_marks, o_marks) & 63 == 0:
+            return None
+        x_to_move = bin(x_marks).count('1') == bin(o_marks).count('1')
+        best = None
+        for cell in range(self.geometry['cells']):
+            bit = 1 << cell
+            if (x_marks | o_marks) & bit:
+                continue
+            after = self.lookup(x_marks | bit, o_marks) if x_to_move else self.lookup(x_marks, o_marks | bit)
+            score = self.scores[after]
+            if best is None or score > best[0]:
+                best = (score, cell)
+        return divmod(best[1], self.cols)
+
+    def close(self):
+        self.data.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3)
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', help='table file (default retro_<rows>x<cols>_k<k>.tbl)')
+    args = parser.parse_args()
+    start = time.perf_counter()
+    path = solve(args.rows, args.cols, args.k, args.out, args.workers)
+    table = RetrogradeTable(path)
+    outcome, distance = table.value([[0] * args.cols for _ in range(args.rows)])
+    print(f"{path}: {os.path.getsize(path):,} bytes in {time.perf_counter() - start:.1f} s; "
+          f"the first player's result is a {OUTCOMES[outcome]} in {distance} plies")
+    table.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+# server.py
+"""Asyncio game server: many human-vs-AI games in one process.
+
+    python server.py [--host 127.0.0.1] [--port 8765] [--workers N] [--archive PATH]
+
+Clients talk JSON lines over TCP. Each connection holds one session (a board
+from game.py plus its settings); sending "new" starts another game on the
+same connection.
+
+    -> {"op": "new", "difficulty": "hard", "timer_mode": "normal"}
+    <- {"op": "state", "board": [[0, 0, 0], ...], "turn": 1, ...}
+    -> {"op": "move", "row": 1, "col": 1}
+    <- {"op": "moved", "player": 1, "row": 1, "col": 1}
+    <- {"op": "moved", "player": 2, "row": 0, "col": 0}
+    <- {"op": "end", "winner": 1}              (1, 2, or -1 for a draw)
+    <- {"op": "timeout"}                       (the move timer ran out)
+    <- {"op": "error", "error": "..."}
+
+A connection can also watch another session instead of playing: after
+{"op": "sessions"} lists the session ids, {"op": "watch", "session": 7}
+switches the connection to that session's spectator stream (see
+spectate.py for the message format).
+
+Moves are validated with make_move(). The hard AI runs in a process pool so
+a minimax search never blocks the event loop; easy and medium answer in
+microseconds and run inline. Move timers follow TIMER_MODES: as in the
+window, the clock only runs once the human has moved, and when it expires
+the turn passes to the AI. Finished games are appended to a GameArchive
+(records.py).
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import itertools
+import json
+import os
+import signal
+import time
+
+from game import create_board, make_move, check_winner, TIMER_MODES
+from ai import easy_ai, medium_ai, hard_ai
+from eventlog import log
+from spectate import Broadcaster
+from records import GameArchive
+
+AI_PLAYERS = {'easy': easy_ai, 'medium': medium_ai, 'hard': hard_ai}
+INLINE_AI = {'easy', 'medium'}  # too cheap to be worth a round-trip to a worker
+
+# ----------------- AI WORKERS -----------------
+@functools.lru_cache(maxsize=8192)
+def cached_hard_move(board_key):
+    # Tic-tac-toe has only a few thousand positions, so each worker soon
+    # answers every hard move from its cache
+    return hard_ai([list(row) for row in board_key])
+
+def worker_move(difficulty, board_key):
+    """Runs in a worker process"""
+    if difficulty == 'hard':
+        return cached_hard_move(board_key)
+    return AI_PLAYERS[difficulty]([list(row) for row in board_key])
+
+def board_key(board):
+    return tuple(tuple(row) for row in board)
+
+# ----------------- SESSIONS -----------------
+def new_session(session_id, difficulty='medium', timer_mode='no_timer'):
+    return {
+        'id': session_id,
+        'board': create_board(),
+        'player': 1,
+        'difficulty': difficulty,
+        'timer_mode': timer_mode,
+        'moves': [],
+        'started': time.time(),
+        'over': False,
+        'timer': None,  # asyncio TimerHandle for the human's move
+        'watching': None,  # task streaming another session to this connection
+        'generation': 0  # bumped on every new game; stale AI replies are dropped
+    }
+
+class GameServer:
+    def __init__(self, workers=None, archive=None):
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        self.archive = archive  # GameArchive for finished games, or None
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.spectators = Broadcaster()
+        self.tasks = set()  # running AI moves; held here so they are not collected mid-move
+        self.stats = {'connections': 0, 'games': 0, 'moves': 0, 'ai_moves': 0, 'timeouts': 0, 'errors': 0}
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        log.info('server_start', host=host, port=port)
+        return server
+
+    def close(self):
+        for session in self.sessions.values():
+            self.stop_timer(session)
+        for task in self.tasks:
+            task.cancel()
+        self.pool.shutdown(cancel_futures=True)
+        if self.archive is not None:
+            self.archive.close()
+
+    # ----------------- CONNECTIONS -----------------
+    async def handle_client(self, reader, writer):
+        session = new_session(next(self.ids))
+        session['writer'] = writer
+        self.sessions[session['id']] = session
+        self.spectators.open(session['id'])
+        self.stats['connections'] += 1
+        if log.debug_enabled:
+            log.debug('session_open', session=session['id'])
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError('expected a JSON object')
+                except ValueError as e:
+                    self.send_error(session, f"bad message: {e}")
+                else:
+                    self.dispatch(session, message)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.stop_timer(session)
+            self.stop_watching(session)
+            session['generation'] += 1
+            del self.sessions[session['id']]
+            self.spectators.close(session['id'])
+            writer.close()
+            if log.debug_enabled:
+                log.debug('session_close', session=session['id'])
+
+    def send(self, session, message):
+        writer = session['writer']
+        if not writer.is_closing():
+            writer.write(json.dumps(message, separators=(',', ':')).encode() + b'\n')
+
+    def send_error(self, session, error):
+        self.stats['errors'] += 1
+        self.send(session, {'op': 'error', 'error': error})
+
+    # ----------------- GAME FLOW -----------------
+    def dispatch(self, session, message):
+        op = message.get('op')
+        if op == 'new':
+            self.start_game(session, message)
+        elif op == 'move':
+            self.human_move(session, message)
+        elif op == 'state':
+            self.send_state(session)
+        elif op == 'sessions':
+            self.send(session, {'op': 'sessions', 'sessions': sorted(self.sessions)})
+        elif op == 'watch':
+            self.watch(session, message.get('session'))
+        else:
+            self.send_error(session, f"unknown op {op!r}")
+
+    def start_game(self, session, message):
+        difficulty = message.get('difficulty', session['difficulty'])
+        timer_mode = message.get('timer_mode', session['timer_mode'])
+        if difficulty not in AI_PLAYERS:
+            return self.send_error(session, f"unknown difficulty {difficulty!r}")
+        if timer_mode not in TIMER_MODES:
+            return self.send_error(session, f"unknown timer mode {timer_mode!r}")
+        self.stop_timer(session)
+        session.update(board=create_board(), player=1, moves=[], over=False,
+                       difficulty=difficulty, timer_mode=timer_mode, started=time.time())
+        session['generation'] += 1
+        self.stats['games'] += 1
+        self.spectators.reset(session['id'])
+        self.send_state(session)
+
+    def send_state(self, session):
+        self.send(session, {'op': 'state', 'session': session['id'], 'board': session['board'],
+                            'turn': session['player'], 'over': session['over'],
+                            'difficulty': session['difficulty'], 'timer_mode': session['timer_mode'],
+                            'time_limit': TIMER_MODES[session['timer_mode']]})
+
+    def human_move(self, session, message):
+        if session['over']:
+            return self.send_error(session, 'game over')
+        if session['player'] != 1:
+            return self.send_error(session, 'not your turn')
+        row, col = message.get('row'), message.get('col')
+        if not (isinstance(row, int) and isinstance(col, int) and 0 <= row < 3 and 0 <= col < 3):
+            return self.send_error(session, 'row and col must be 0-2')
+        if not make_move(session['board'], row, col, 1):
+            return self.send_error(session, 'cell is taken')
+        self.stop_timer(session)
+        self.after_move(session, row, col, 1)
+
+    def after_move(self, session, row, col, player):
+        session['moves'].append((row, col, player))
+        self.stats['moves'] += 1
+        self.send(session, {'op': 'moved', 'player': player, 'row': row, 'col': col})
+        self.spectators.move(session['id'], row, col, player)
+        winner, _ = check_winner(session['board'])
+        if winner != 0:
+            session['over'] = True
+            self.send(session, {'op': 'end', 'winner': winner})
+            self.spectators.end(session['id'], winner)
+            if self.archive is not None:
+                self.archive.append(session['moves'], winner, session['difficulty'], session['timer_mode'],
+                                    session['started'], time.time() - session['started'])
+            return
+        if player == 1:
+            session['player'] = 2
+            self.start_ai_move(session)
+        else:
+            session['player'] = 1
+            self.start_timer(session)
+
+    def start_ai_move(self, session):
+        task = asyncio.create_task(self.ai_move(session))
+        self.tasks.add(task)
+        task.add_done_callback(functools.partial(self.ai_move_done, session))
+
+    def ai_move_done(self, session, task):
+        self.tasks.discard(task)
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        log.error('ai_move_failed', session=session['id'], error=repr(error))
+        if session['id'] in self.sessions:
+            self.send_error(session, f"AI move failed: {type(error).__name__}")
+
+    async def ai_move(self, session):
+        generation = session['generation']
+        difficulty = session['difficulty']
+        key = board_key(session['board'])
+        if difficulty in INLINE_AI:
+            row, col = worker_move(difficulty, key)
+        else:
+            loop = asyncio.get_running_loop()
+            row, col = await loop.run_in_executor(self.pool, worker_move, difficulty, key)
+        if session['generation'] != generation or session['over']:
+            return  # the game was restarted or the client left
+        if row is None or not make_move(session['board'], row, col, 2):
+            log.error('ai_bad_move', session=session['id'], row=row, col=col)
+            return
+        self.stats['ai_moves'] += 1
+        self.after_move(session, row, col, 2)
+        writer = session['writer']
+        if not writer.is_closing():
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    # ----------------- SPECTATING -----------------
+    def watch(self, session, target_id):
+        if target_id == session['id']:
+            return self.send_error(session, 'cannot watch your own session')
+        subscriber = self.spectators.subscribe(target_id)
+        if subscriber is None:
+            return self.send_error(session, f"no session {target_id!r}")
+        self.stop_watching(session)
+        session['watching'] = (subscriber, asyncio.create_task(self.stream(session, subscriber)))
+
+    async def stream(self, session, subscriber):
+        try:
+            await subscriber.stream(session['writer'])
+        except ConnectionError:
+            pass
+
+    def stop_watching(self, session):
+        if session['watching'] is not None:
+            subscriber, task = session['watching']
+            self.spectators.unsubscribe(subscriber)
+            task.cancel()
+            session['watching'] = None
+
+    # ----------------- MOVE TIMERS -----------------
+    def start_timer(self, session):
+        limit = TIMER_MODES[session['timer_mode']]
+        if limit is None or not session['moves']:
+            return
+        loop = asyncio.get_running_loop()
+        # The event loop already keeps its timers in a heap; one handle per session
+        session['timer'] = loop.call_later(limit, self.expire, session, session['generation'])
+
+    def stop_timer(self, session):
+        if session['timer'] is not None:
+            session['timer'].cancel()
+            session['timer'] = None
+
+    def expire(self, session, generation):
+        session['timer'] = None
+        if session['generation'] != generation or session['over'] or session['player'] != 1:
+            return
+        self.stats['timeouts'] += 1
+        self.send(session, {'op': 'timeout'})
+        session['player'] = 2
+        self.start_ai_move(session)
+
+async def run(host, port, workers, archive_path):
+    archive = GameArchive(archive_path) if archive_path else None
+    game_server = GameServer(workers, archive)
+    server = await game_server.serve(host, port)
+    # Used by bench_server.py to know when to connect
+    print(f"Listening on {host}:{server.sockets[0].getsockname()[1]}", flush=True)
+    # Stop cleanly on SIGTERM too, so the worker processes are shut down with us
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, server.close)
+    except NotImplementedError:  # Windows event loops have no signal handlers
+        signal.signal(signal.SIGTERM, lambda signum, frame: loop.call_soon_threadsafe(server.close))
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        game_server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--archive', default='server_games.rec',
+                        help="record finished games here ('' to disable)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.host, args.port, args.workers, args.archive))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# sound_cache.py
+"""Persistent cache of synthesized sound buffers.
+
+All buffers live in one file: a small JSON index followed by the raw int16
+sample data. The file is memory-mapped on load, so a warm start hands slices
+of the map straight to pygame.mixer.Sound(buffer=...) without synthesizing or
+copying anything in Python.
+
+Layout:
+    8 bytes   magic
+    4 bytes   index length (little endian)
+    n bytes   JSON index {key: [offset, nbytes]}
+    padding   to a 16 byte boundary, then sample data
+"""
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b'TTTSND01'
+HEADER = struct.Struct('<8sI')
+ALIGN = 16
+
+class SoundCache:
+    def __init__(self, path='sound_cache.bin'):
+        self.path = path
+        self.index = {}
+        self.map = None
+        self.file = None
+        self.pending = {}  # key -> bytes synthesized this session
+        self.used = set()
+        self.load()
+
+    def load(self):
+        """Map the cache file; a missing or corrupt file means an empty cache."""
+        try:
+            self.file = open(self.path, 'rb')
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_len = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC:
+                raise ValueError("not a sound cache file")
+            index = json.loads(self.map[HEADER.size:HEADER.size + index_len])
+            for offset, nbytes in index.values():
+                if offset + nbytes > len(self.map):
+                    raise ValueError("truncated sound cache")
+            self.index = index
+        except (OSError, ValueError, struct.error):
+            self.close()
+            self.index = {}
+
+    def get(self, key):
+        """Return a zero-copy view of a cached buffer, or None on a miss.
+
+        Release the view once it has been consumed so the map can be closed.
+        """
+        self.used.add(key)
+        if key in self.pending:
+            return memoryview(self.pending[key])
+        entry = self.index.get(key)
+        if entry is None or self.map is None:
+            return None
+        offset, nbytes = entry
+        return memoryview(self.map)[offset:offset + nbytes]
+
+    def retain(self, keys):
+        """Mark keys as current so save() keeps them even if not loaded yet."""
+        self.used.update(keys)
+
+    def put(self, key, samples):
+        """Remember a freshly synthesized buffer (numpy array or bytes)."""
+        self.used.add(key)
+        self.pending[key] = bytes(samples)
+
+    @property
+    def dirty(self):
+        # New entries, or stale entries that should be pruned
+        return bool(self.pending) or bool(set(self.index) - self.used)
+
+    def save(self):
+        """Rewrite the cache atomically with the entries used this session.
+
+        Entries whose key no longer matches any sound (changed parameters,
+        sample rate or mixer format) are dropped here.
+        """
+        if not self.dirty:
+            return
+        blobs = {}
+        for key in sorted(self.used):
+            data = self.pending.get(key)
+            if data is None and key in self.index and self.map is not None:
+                offset, nbytes = self.index[key]
+                data = self.map[offset:offset + nbytes]
+            if data is not None:
+                blobs[key] = data
+
+        # Offsets depend on the index size, which depends on the offsets;
+        # repeat the layout until it stops moving, then pad the index to fit
+        index = {}
+        data_start = 0
+        while True:
+            offset = data_start
+            for key, data in blobs.items():
+                index[key] = [offset, len(data)]
+                offset += len(data) + (-len(data)) % ALIGN
+            index_bytes = json.dumps(index, sort_keys=True).encode()
+            needed = HEADER.size + len(index_bytes)
+            needed += (-needed) % ALIGN
+            if needed == data_start:
+                break
+            data_start = needed
+        index_bytes = index_bytes.ljust(data_start - HEADER.size)
+
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, len(index_bytes)))
+                f.write(index_bytes)
+                for data in blobs.values():
+                    f.write(data)
+                    f.write(b'\0' * ((-len(data)) % ALIGN))
+            self.close()
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # A read-only directory just means no cache next time
+            return
+        self.pending.clear()
+        self.load()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
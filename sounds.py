@@ -1,168 +1,163 @@
 # sounds.py
+import queue
+import threading
+import time
 import pygame
-import numpy  # ADD THIS LINE
+from sound_cache import SoundCache
+from synth import (SAMPLE_RATE, Fade, LinearChirp, Steps, arpeggio, render, tone)
+from voices import VoiceManager
+
+# Bump when the synth engine changes so cached buffers are re-rendered
+SYNTH_VERSION = 2
+
+# Mixer buffer in samples: small enough for clicks to feel immediate
+MIXER_BUFFER = 512
+
+# How long a play() of a sound that is still loading may start late
+LATE_START = 0.15
+
+# name -> recipe. The old per-sample generators swept twice their nominal
+# range (freq(t) * t rather than an integrated phase); the chirps below keep
+# that sound.
+SOUND_RECIPES = {
+    'click': tone(800, 0.1),  # Click sound (short high beep)
+    'move': tone(600, 0.15),  # Move sound (mid beep)
+    'win': tone(LinearChirp(300, 1300), 0.8, Fade(0.1, 0.2), 0.7),  # Win sound (rising tone)
+    'lose': tone(LinearChirp(600, -200), 0.6, Fade(0.1, 0.1), 0.7),  # Lose sound (falling tone)
+    'draw': tone(Steps((400, 500)), 0.5, Fade(0.1, 0.1), 0.7),  # Draw sound (two tones)
+    'undo': tone(400, 0.2),  # Undo sound (rewind sound)
+    'timer_warning': tone(1000, 0.08),  # Timer warning (urgent beep)
+}
+
+# Background prefetch order: sounds needed early in a game come first
+PREFETCH_ORDER = ['click', 'move', 'undo', 'timer_warning', 'win', 'draw', 'lose']
+
+# Major pentatonic notes (Hz) used for achievement jingles
+PENTATONIC = [523.25, 587.33, 659.25, 783.99, 880.0, 1046.5]
+
+def achievement_jingle(achievement_id):
+    """A short rising arpeggio, different for each achievement"""
+    seed = sum(ord(ch) * (i + 1) for i, ch in enumerate(achievement_id))
+    start = seed % 3
+    freqs = [PENTATONIC[start + step] for step in (0, 1 + seed % 2, 3)]
+    return arpeggio(freqs, 0.09)
 
 class SoundManager:
-    def __init__(self):
-        pygame.mixer.init()
+    """Plays the game's sound effects.
+
+    Nothing audio-related happens in the constructor: the mixer is opened and
+    sounds are loaded on a background thread, either all at once via
+    start_loading() or one at a time the first time play() asks for them.
+    Until a sound is ready, playing it does not block; if it becomes ready
+    within LATE_START seconds it still starts, otherwise the play is dropped.
+    
+    play() only queues a sound; end_frame() hands the frame's sounds to the
+    VoiceManager, which starts them on pooled channels.
+    """
+    def __init__(self, cache_path='sound_cache.bin'):
         self.sounds = {}
-        self.load_sounds()
+        self.recipes = dict(SOUND_RECIPES)
+        self.waiting = {}  # sound -> (volume, deadline) for plays made while loading
+        self.cache_path = cache_path
+        self.cache = None
+        self.mixer_ready = False
+        self.voices = None
+        self.loader = None
+        self.requests = queue.Queue()
+        self.requested = set()
+        self.created = time.perf_counter()
+        self.timings = {}  # step -> seconds, filled in by the loader thread
     
-    def load_sounds(self):
-        # Create simple sounds programmatically (no external files needed)
-        self.create_beep_sounds()
+    def start_loading(self, prefetch=True):
+        """Start the loader thread; with prefetch, queue every sound"""
+        if self.loader is None:
+            self.loader = threading.Thread(target=self.load_sounds, name='sound-loader', daemon=True)
+            self.loader.start()
+        if prefetch:
+            for name in PREFETCH_ORDER:
+                self.request(name)
     
-    def create_beep_sounds(self):
-        # Create simple beep sounds using pygame's generate function
-        
-        # Click sound (short high beep)
-        click_sound = pygame.mixer.Sound(buffer=self.generate_beep(800, 0.1))
-        self.sounds['click'] = click_sound
-        
-        # Move sound (mid beep)
-        move_sound = pygame.mixer.Sound(buffer=self.generate_beep(600, 0.15))
-        self.sounds['move'] = move_sound
-        
-        # Win sound (rising tone)
-        win_sound = pygame.mixer.Sound(buffer=self.generate_win_sound())
-        self.sounds['win'] = win_sound
-        
-        # Lose sound (falling tone)
-        lose_sound = pygame.mixer.Sound(buffer=self.generate_lose_sound())
-        self.sounds['lose'] = lose_sound
-        
-        # Draw sound (two tones)
-        draw_sound = pygame.mixer.Sound(buffer=self.generate_draw_sound())
-        self.sounds['draw'] = draw_sound
-        
-        # Undo sound (rewind sound)
-        undo_sound = pygame.mixer.Sound(buffer=self.generate_beep(400, 0.2))
-        self.sounds['undo'] = undo_sound
-        
-        # Timer warning (urgent beep)
-        timer_sound = pygame.mixer.Sound(buffer=self.generate_beep(1000, 0.08))
-        self.sounds['timer_warning'] = timer_sound
-    
-    def generate_beep(self, frequency, duration):
-        """Generate a simple sine wave beep"""
-        sample_rate = 22050
-        n_samples = int(sample_rate * duration)
-        
-        # Create the sine wave
-        buf = numpy.zeros((n_samples, 2), dtype=numpy.int16)
-        max_sample = 2**(16 - 1) - 1
-        
-        for s in range(n_samples):
-            t = float(s) / sample_rate
-            sine_value = numpy.sin(2 * numpy.pi * frequency * t)
-            
-            # Apply fade in/out
-            fade = 1.0
-            if s < sample_rate * 0.05:  # Fade in
-                fade = s / (sample_rate * 0.05)
-            elif s > n_samples - sample_rate * 0.05:  # Fade out
-                fade = (n_samples - s) / (sample_rate * 0.05)
-            
-            val = int(max_sample * fade * sine_value)
-            buf[s][0] = val  # Left channel
-            buf[s][1] = val  # Right channel
-        
-        return buf
+    def request(self, name):
+        """Ask the loader thread for a sound (once)"""
+        if name in self.requested or name not in self.recipes:
+            return
+        self.requested.add(name)
+        if self.loader is None:
+            self.start_loading(prefetch=False)
+        self.requests.put(name)
     
-    def generate_win_sound(self):
-        """Generate rising victory sound"""
-        sample_rate = 22050
-        duration = 0.8
-        n_samples = int(sample_rate * duration)
-        
-        buf = numpy.zeros((n_samples, 2), dtype=numpy.int16)
-        max_sample = 2**(16 - 1) - 1
-        
-        for s in range(n_samples):
-            t = float(s) / sample_rate
-            # Rising frequency from 300 to 800 Hz
-            freq = 300 + (500 * (t / duration))
-            sine_value = numpy.sin(2 * numpy.pi * freq * t)
-            
-            # Volume envelope
-            fade = 1.0
-            if s < sample_rate * 0.1:
-                fade = s / (sample_rate * 0.1)
-            elif s > n_samples - sample_rate * 0.2:
-                fade = (n_samples - s) / (sample_rate * 0.2)
-            
-            val = int(max_sample * fade * sine_value * 0.7)
-            buf[s][0] = val
-            buf[s][1] = val
-        
-        return buf
+    def load_sounds(self):
+        """Loader thread: open the mixer, then load sounds as they are requested"""
+        start = time.perf_counter()
+        try:
+            pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=2, buffer=MIXER_BUFFER)
+        except pygame.error:
+            # No audio device: every play() stays a no-op
+            self.timings['mixer_init'] = None
+            return
+        self.timings['mixer_init'] = time.perf_counter() - start
+        self.voices = VoiceManager()
+        
+        self.cache = SoundCache(self.cache_path)
+        self.cache.retain(self.cache_key(name, recipe) for name, recipe in SOUND_RECIPES.items())
+        self.mixer_ready = True
+        
+        while True:
+            name = self.requests.get()
+            if name not in self.sounds:
+                self.load_sound(name)
+            if self.requests.empty():
+                self.cache.save()
+            if 'all_loaded' not in self.timings and all(n in self.sounds for n in PREFETCH_ORDER):
+                self.timings['all_loaded'] = time.perf_counter() - self.created
     
-    def generate_lose_sound(self):
-        """Generate falling defeat sound"""
-        sample_rate = 22050
-        duration = 0.6
-        n_samples = int(sample_rate * duration)
-        
-        buf = numpy.zeros((n_samples, 2), dtype=numpy.int16)
-        max_sample = 2**(16 - 1) - 1
-        
-        for s in range(n_samples):
-            t = float(s) / sample_rate
-            # Falling frequency from 600 to 200 Hz
-            freq = 600 - (400 * (t / duration))
-            sine_value = numpy.sin(2 * numpy.pi * freq * t)
-            
-            # Volume envelope
-            fade = 1.0
-            if s < sample_rate * 0.1:
-                fade = s / (sample_rate * 0.1)
-            elif s > n_samples - sample_rate * 0.1:
-                fade = (n_samples - s) / (sample_rate * 0.1)
-            
-            val = int(max_sample * fade * sine_value * 0.7)
-            buf[s][0] = val
-            buf[s][1] = val
-        
-        return buf
+    def cache_key(self, name, recipe):
+        """Key covering everything that changes the rendered samples"""
+        return f"{name}|{recipe!r}|v{SYNTH_VERSION}|{SAMPLE_RATE}|{pygame.mixer.get_init()!r}"
     
-    def generate_draw_sound(self):
-        """Generate two-tone draw sound"""
-        sample_rate = 22050
-        duration = 0.5
-        n_samples = int(sample_rate * duration)
-        
-        buf = numpy.zeros((n_samples, 2), dtype=numpy.int16)
-        max_sample = 2**(16 - 1) - 1
-        
-        for s in range(n_samples):
-            t = float(s) / sample_rate
-            
-            # First half: 400Hz, second half: 500Hz
-            if t < duration / 2:
-                freq = 400
-            else:
-                freq = 500
-            
-            sine_value = numpy.sin(2 * numpy.pi * freq * t)
-            
-            # Volume envelope
-            fade = 1.0
-            if s < sample_rate * 0.1:
-                fade = s / (sample_rate * 0.1)
-            elif s > n_samples - sample_rate * 0.1:
-                fade = (n_samples - s) / (sample_rate * 0.1)
-            
-            val = int(max_sample * fade * sine_value * 0.7)
-            buf[s][0] = val
-            buf[s][1] = val
-        
-        return buf
+    def register(self, name, recipe):
+        """Add a sound; it is rendered the first time it is played"""
+        self.recipes.setdefault(name, recipe)
+    
+    def load_sound(self, name):
+        """Load one sound from the on-disk cache, rendering only on a miss"""
+        start = time.perf_counter()
+        recipe = self.recipes[name]
+        key = self.cache_key(name, recipe)
+        view = self.cache.get(key)
+        source = 'cache'
+        if view is None:
+            self.cache.put(key, render(recipe))
+            view = self.cache.get(key)
+            source = 'synth'
+        sound = pygame.mixer.Sound(buffer=view)
+        view.release()
+        self.sounds[name] = sound
+        self.timings['load:' + name] = time.perf_counter() - start
+        self.timings['source:' + name] = source
     
     def play(self, sound_name, volume=0.5):
-        """Play a sound by name"""
-        if sound_name in self.sounds:
-            self.sounds[sound_name].set_volume(volume)
-            self.sounds[sound_name].play()
+        """Queue a sound by name"""
+        sound = self.sounds.get(sound_name)
+        if sound is None:
+            if sound_name in self.recipes:
+                self.waiting[sound_name] = (volume, time.monotonic() + LATE_START)
+                self.request(sound_name)
+            return
+        self.voices.trigger(sound_name, sound, volume)
+    
+    def end_frame(self):
+        """Start the sounds triggered since the last call (once per frame)"""
+        if self.waiting:
+            now = time.monotonic()
+            for name, (volume, deadline) in list(self.waiting.items()):
+                if now > deadline:
+                    del self.waiting[name]
+                elif name in self.sounds:
+                    del self.waiting[name]
+                    self.voices.trigger(name, self.sounds[name], volume)
+        if self.voices is not None:
+            self.voices.flush()
     
     def play_click(self):
         self.play('click', 0.3)
@@ -183,4 +178,9 @@ class SoundManager:
         self.play('undo', 0.4)
     
     def play_timer_warning(self):
-        self.play('timer_warning', 0.5)
\ No newline at end of file
+        self.play('timer_warning', 0.5)
+    
+    def play_achievement(self, achievement_id):
+        name = 'achievement:' + achievement_id
+        self.register(name, achievement_jingle(achievement_id))
+        self.play(name, 0.5)
@@ -0,0 +1,185 @@
+# spectate.py
+"""Spectator broadcast: per-session delta streams for any number of watchers.
+
+Every game session has a channel. The game publishes each move as a small
+delta (cell and player, plus a sequence number), encoded once and shared by
+all subscribers. A subscriber that joins late gets a snapshot of the board
+first and deltas after that.
+
+Publishing never waits on a subscriber. Each channel keeps a bounded log of
+its most recent encoded messages, and each subscriber only keeps a cursor
+into it: publishing appends once and wakes whoever is waiting, however many
+subscribers there are. A subscriber that falls further behind than the log
+reaches gets a single snapshot instead, taken when it next reads. A
+snapshot is the merge of every delta it replaces, so a laggard skips ahead
+instead of stalling the broadcaster or making anyone buffer for it.
+
+Messages are compact JSON lines:
+
+    {"t":"s","g":7,"n":3,"b":"100020000","w":0}   snapshot (board as 9 digits, winner)
+    {"t":"m","g":7,"n":4,"c":2,"p":1}             move: cell (row * 3 + col), player
+    {"t":"r","g":7,"n":5}                         new game on the session
+    {"t":"e","g":7,"n":6,"w":-1}                  game over: winner (-1 draw)
+    {"t":"x","g":7,"n":7}                         session closed
+"""
+import asyncio
+import itertools
+import json
+from collections import deque
+
+DEFAULT_LOG_SIZE = 64
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+class Channel:
+    def __init__(self, session_id, log_size=DEFAULT_LOG_SIZE):
+        self.session_id = session_id
+        self.cells = [0] * 9
+        self.winner = 0
+        self.seq = 0
+        self.log = deque(maxlen=log_size)  # encoded messages seq - len(log) + 1 .. seq
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+        self.closed = False
+        self.snapshot_cache = None  # (seq, bytes)
+
+    def append(self, data):
+        self.seq += 1
+        self.log.append(data)
+        # Wake everyone waiting on this message; later waiters get a fresh event
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def since(self, cursor):
+        """Messages after cursor, or None if they have left the log"""
+        missing = self.seq - cursor
+        if missing > len(self.log):
+            return None
+        return list(itertools.islice(self.log, len(self.log) - missing, None))
+
+    def snapshot(self):
+        """Encoded snapshot of the current state (cached per sequence number)"""
+        if self.snapshot_cache is None or self.snapshot_cache[0] != self.seq:
+            board = ''.join(str(cell) for cell in self.cells)
+            self.snapshot_cache = (self.seq, encode({'t': 's', 'g': self.session_id, 'n': self.seq,
+                                                     'b': board, 'w': self.winner}))
+        return self.snapshot_cache[1]
+
+class Subscriber:
+    def __init__(self, channel):
+        self.channel = channel
+        self.cursor = None  # last sequence number delivered; None: start with a snapshot
+        self.done = False
+        self.merged = 0  # times a backlog was replaced by a snapshot
+        self.delivered = 0
+
+    async def get(self):
+        """Wait for the next messages; returns a list of encoded lines, [] when finished"""
+        channel = self.channel
+        while not self.done:
+            if self.cursor is not None and self.cursor == channel.seq:
+                if channel.closed:
+                    break
+                await channel.changed.wait()
+                continue
+            batch = None if self.cursor is None else channel.since(self.cursor)
+            if batch is None:
+                # First read, or fell behind the log: merge everything into the current state
+                if self.cursor is not None:
+                    self.merged += 1
+                batch = [channel.snapshot()]
+                if channel.closed:
+                    batch.append(channel.log[-1])
+            self.cursor = channel.seq
+            self.delivered += len(batch)
+            return batch
+        return []
+
+    async def stream(self, writer):
+        """Forward messages to a stream writer until the channel closes"""
+        while True:
+            batch = await self.get()
+            if not batch:
+                return
+            writer.write(b''.join(batch))
+            # Waiting here only delays this subscriber; the log keeps moving
+            await writer.drain()
+
+class Broadcaster:
+    def __init__(self, log_size=DEFAULT_LOG_SIZE):
+        self.channels = {}
+        self.log_size = log_size
+        self.stats = {'published': 0}
+
+    def open(self, session_id):
+        channel = self.channels.get(session_id)
+        if channel is None:
+            channel = self.channels[session_id] = Channel(session_id, self.log_size)
+        return channel
+
+    def close(self, session_id):
+        channel = self.channels.pop(session_id, None)
+        if channel is None:
+            return
+        channel.closed = True
+        self.publish(channel, {'t': 'x'})
+
+    def subscribe(self, session_id):
+        """New subscriber for a session, starting from a snapshot; None if there is no such session"""
+        channel = self.channels.get(session_id)
+        if channel is None:
+            return None
+        channel.subscribers += 1
+        return Subscriber(channel)
+
+    def unsubscribe(self, subscriber):
+        if not subscriber.done:
+            subscriber.done = True
+            subscriber.channel.subscribers -= 1
+
+    # ----------------- PUBLISHING -----------------
+    def publish(self, channel, message):
+        message['g'] = channel.session_id
+        message['n'] = channel.seq + 1
+        channel.append(encode(message))  # once, shared by every subscriber
+        self.stats['published'] += 1
+
+    def move(self, session_id, row, col, player):
+        channel = self.channels.get(session_id)
+        if channel is None:
+            return
+        cell = row * 3 + col
+        channel.cells[cell] = player
+        self.publish(channel, {'t': 'm', 'c': cell, 'p': player})
+
+    def reset(self, session_id):
+        channel = self.channels.get(session_id)
+        if channel is None:
+            return
+        channel.cells = [0] * 9
+        channel.winner = 0
+        self.publish(channel, {'t': 'r'})
+
+    def end(self, session_id, winner):
+        channel = self.channels.get(session_id)
+        if channel is None:
+            return
+        channel.winner = winner
+        self.publish(channel, {'t': 'e', 'w': winner})
+
+def apply(state, message):
+    """Update a spectator's {'cells', 'winner', 'seq'} from a decoded message"""
+    kind = message['t']
+    if kind == 's':
+        state['cells'] = [int(cell) for cell in message['b']]
+        state['winner'] = message['w']
+    elif kind == 'm':
+        state['cells'][message['c']] = message['p']
+    elif kind == 'r':
+        state['cells'] = [0] * 9
+        state['winner'] = 0
+    elif kind == 'e':
+        state['winner'] = message['w']
+    state['seq'] = message['n']
+    return state
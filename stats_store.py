@@ -0,0 +1,274 @@
+# stats_store.py
+"""SQLite store for players, finished games and their moves.
+
+Games are queued in memory and written by a background thread, many per
+transaction. Besides the raw games and moves, a player_stats table keeps
+running totals per (player, difficulty, timer mode), updated in the same
+transaction as each game, so lifetime stats and leaderboards read a handful
+of aggregate rows instead of scanning the game history. The current player's
+lifetime totals are also kept in memory, so the game can check them at game
+end without waiting for the disk.
+"""
+import atexit
+import sqlite3
+import threading
+import time
+
+from eventlog import log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    ended REAL NOT NULL,
+    duration REAL NOT NULL,
+    difficulty TEXT NOT NULL,
+    timer_mode TEXT NOT NULL,
+    result TEXT NOT NULL,
+    moves INTEGER NOT NULL,
+    used_undo INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    ply INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    player INTEGER NOT NULL,
+    PRIMARY KEY (game_id, ply)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS player_stats (
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    difficulty TEXT NOT NULL,
+    timer_mode TEXT NOT NULL,
+    games INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    moves INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (player_id, difficulty, timer_mode)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS games_by_player ON games (player_id, ended);
+CREATE INDEX IF NOT EXISTS games_by_difficulty ON games (difficulty, result);
+CREATE INDEX IF NOT EXISTS games_by_timer_mode ON games (timer_mode, result);
+CREATE INDEX IF NOT EXISTS player_stats_by_difficulty ON player_stats (difficulty, wins);
+"""
+
+# check_winner() result -> game result from the human's (X's) side
+RESULTS = {1: 'win', 2: 'loss', -1: 'draw'}
+RESULT_COLUMNS = {'win': 'wins', 'loss': 'losses', 'draw': 'draws'}
+
+UPDATE_STATS = """
+INSERT INTO player_stats (player_id, difficulty, timer_mode, games, wins, losses, draws, moves)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (player_id, difficulty, timer_mode) DO UPDATE SET
+    games = games + 1,
+    wins = wins + excluded.wins,
+    losses = losses + excluded.losses,
+    draws = draws + excluded.draws,
+    moves = moves + excluded.moves
+"""
+
+def empty_totals():
+    return {'games': 0, 'wins': 0, 'losses': 0, 'draws': 0, 'moves': 0}
+
+class StatsStore:
+    def __init__(self, path='stats.db', player='Player', flush_interval=1.0, batch_size=64):
+        self.path = path
+        self.player = player
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.conn = None
+        self.player_id = None
+        self.totals = empty_totals()
+        self.pending = []
+        self.lock = threading.Lock()  # pending list and totals
+        self.db_lock = threading.Lock()  # the connection
+        self.wakeup = threading.Event()
+        self.writer = None
+        self.closed = False
+
+    # ----------------- SETUP -----------------
+    def open(self):
+        """Connect, create the schema and load the player's totals (once)"""
+        if self.conn is not None:
+            return self
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        with conn:
+            conn.executescript(SCHEMA)
+        self.conn = conn
+        self.player_id = self.ensure_player(self.player)
+        self.totals = self.lifetime_from_db(self.player_id)
+        return self
+
+    def ensure_player(self, name):
+        with self.db_lock, self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO players (name, created) VALUES (?, ?)',
+                              (name, time.time()))
+            row = self.conn.execute('SELECT id FROM players WHERE name = ?', (name,)).fetchone()
+        return row[0]
+
+    # ----------------- WRITING -----------------
+    def record_game(self, winner, move_history, difficulty, timer_mode, duration, used_undo=False):
+        """Queue a finished game; updates the in-memory totals immediately"""
+        self.open()
+        result = RESULTS[winner]
+        game = {
+            'ended': time.time(),
+            'duration': duration,
+            'difficulty': difficulty or 'none',
+            'timer_mode': timer_mode,
+            'result': result,
+            'moves': list(move_history),
+            'used_undo': bool(used_undo)
+        }
+        with self.lock:
+            self.pending.append(game)
+            self.totals['games'] += 1
+            self.totals[RESULT_COLUMNS[result]] += 1
+            self.totals['moves'] += len(game['moves'])
+            full = len(self.pending) >= self.batch_size
+        if self.writer is None:
+            self.start()
+        if full:
+            self.wakeup.set()
+
+    def start(self):
+        with self.lock:
+            if self.writer is not None:
+                return
+            self.writer = threading.Thread(target=self.run, name='stats-store', daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def run(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Write every pending game in one transaction"""
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch:
+            return
+        try:
+            with self.db_lock, self.conn:
+                for game in batch:
+                    self.insert_game(game)
+        except sqlite3.Error as e:
+            # The transaction rolled back; try the whole batch again next time
+            log.error('stats_write_failed', games=len(batch), error=str(e))
+            with self.lock:
+                self.pending[:0] = batch
+
+    def insert_game(self, game):
+        cursor = self.conn.execute(
+            'INSERT INTO games (player_id, ended, duration, difficulty, timer_mode, result, moves, used_undo) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (self.player_id, game['ended'], game['duration'], game['difficulty'], game['timer_mode'],
+             game['result'], len(game['moves']), int(game['used_undo'])))
+        game_id = cursor.lastrowid
+        self.conn.executemany(
+            'INSERT INTO moves (game_id, ply, row, col, player) VALUES (?, ?, ?, ?, ?)',
+            [(game_id, ply, row, col, player) for ply, (row, col, player) in enumerate(game['moves'])])
+        result = game['result']
+        self.conn.execute(UPDATE_STATS, (self.player_id, game['difficulty'], game['timer_mode'],
+                                         int(result == 'win'), int(result == 'loss'),
+                                         int(result == 'draw'), len(game['moves'])))
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.wakeup.set()
+        if self.writer is not None and self.writer is not threading.current_thread():
+            self.writer.join(timeout=2)
+        if self.conn is not None:
+            self.flush()
+            with self.db_lock:
+                self.conn.close()
+                self.conn = None
+
+    # ----------------- QUERIES -----------------
+    def lifetime(self):
+        """The current player's lifetime totals, including games not yet written"""
+        self.open()
+        with self.lock:
+            return dict(self.totals)
+
+    def lifetime_from_db(self, player_id):
+        row = self.query_one('SELECT COALESCE(SUM(games), 0), COALESCE(SUM(wins), 0), '
+                             'COALESCE(SUM(losses), 0), COALESCE(SUM(draws), 0), '
+                             'COALESCE(SUM(moves), 0) FROM player_stats WHERE player_id = ?',
+                             (player_id,))
+        return dict(zip(empty_totals(), row))
+
+    def stats(self, difficulty=None, timer_mode=None, player=None):
+        """Totals for one player, optionally narrowed to a difficulty and/or timer mode"""
+        self.open()
+        self.flush()
+        sql = ('SELECT COALESCE(SUM(s.games), 0), COALESCE(SUM(s.wins), 0), COALESCE(SUM(s.losses), 0), '
+               'COALESCE(SUM(s.draws), 0), COALESCE(SUM(s.moves), 0) '
+               'FROM player_stats s JOIN players p ON p.id = s.player_id WHERE p.name = ?')
+        params = [player or self.player]
+        if difficulty is not None:
+            sql += ' AND s.difficulty = ?'
+            params.append(difficulty)
+        if timer_mode is not None:
+            sql += ' AND s.timer_mode = ?'
+            params.append(timer_mode)
+        return dict(zip(empty_totals(), self.query_one(sql, params)))
+
+    def leaderboard(self, limit=10, difficulty=None, timer_mode=None):
+        """[(name, wins, games), ...] ordered by wins"""
+        self.open()
+        self.flush()
+        sql = ('SELECT p.name, SUM(s.wins) AS wins, SUM(s.games) '
+               'FROM player_stats s JOIN players p ON p.id = s.player_id')
+        conditions = []
+        params = []
+        if difficulty is not None:
+            conditions.append('s.difficulty = ?')
+            params.append(difficulty)
+        if timer_mode is not None:
+            conditions.append('s.timer_mode = ?')
+            params.append(timer_mode)
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' GROUP BY s.player_id ORDER BY wins DESC, p.name LIMIT ?'
+        params.append(limit)
+        return self.query_all(sql, params)
+
+    def recent_games(self, limit=10, player=None):
+        """The player's latest games as dicts, newest first"""
+        self.open()
+        self.flush()
+        rows = self.query_all(
+            'SELECT g.id, g.ended, g.duration, g.difficulty, g.timer_mode, g.result, g.moves, g.used_undo '
+            'FROM games g JOIN players p ON p.id = g.player_id WHERE p.name = ? '
+            'ORDER BY g.ended DESC LIMIT ?', (player or self.player, limit))
+        keys = ('id', 'ended', 'duration', 'difficulty', 'timer_mode', 'result', 'moves', 'used_undo')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def game_moves(self, game_id):
+        """[(row, col, player), ...] for a stored game, in order"""
+        self.open()
+        return self.query_all('SELECT row, col, player FROM moves WHERE game_id = ? ORDER BY ply',
+                              (game_id,))
+
+    def query_one(self, sql, params=()):
+        with self.db_lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def query_all(self, sql, params=()):
+        with self.db_lock:
+            return self.conn.execute(sql, params).fetchall()
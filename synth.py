@@ -0,0 +1,127 @@
+# synth.py
+"""Small vectorized synth engine for the game's sound effects.
+
+A sound is declared as a Recipe: a list of Notes, each an oscillator shaped
+by an envelope, mixed at their start offsets. Recipes are plain namedtuples,
+so they are hashable and double as cache keys: render() keeps the most
+recently used buffers in a bounded LRU cache, and the disk cache in
+sound_cache.py keys on repr(recipe).
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+# numpy is imported inside the rendering functions: declaring recipes (and a
+# warm disk cache) never needs it, and it is the slowest import on startup
+
+SAMPLE_RATE = 22050
+MAX_SAMPLE = 2**(16 - 1) - 1
+
+# ----------------- OSCILLATORS -----------------
+# Each oscillator computes its phase (in cycles) analytically from time
+Sine = namedtuple('Sine', 'freq')
+LinearChirp = namedtuple('LinearChirp', 'start_freq end_freq')
+ExpChirp = namedtuple('ExpChirp', 'start_freq end_freq')
+Steps = namedtuple('Steps', 'freqs')  # equal-length segments, phase-continuous
+
+# ----------------- ENVELOPES -----------------
+Fade = namedtuple('Fade', 'fade_in fade_out')  # linear fade in/out (seconds)
+ADSR = namedtuple('ADSR', 'attack decay sustain release')  # times in seconds, sustain level 0-1
+
+# ----------------- RECIPES -----------------
+Note = namedtuple('Note', 'osc envelope duration gain start', defaults=(1.0, 0.0))
+Recipe = namedtuple('Recipe', 'notes')
+
+def tone(freq, duration, envelope=Fade(0.05, 0.05), gain=1.0):
+    """Recipe for a single note"""
+    return Recipe((Note(osc_for(freq), envelope, duration, gain),))
+
+def osc_for(freq):
+    return freq if isinstance(freq, tuple) else Sine(freq)
+
+def arpeggio(freqs, note_length, gap=0.0, envelope=ADSR(0.01, 0.04, 0.7, 0.06), gain=0.6):
+    """Recipe for a sequence of short notes"""
+    notes = tuple(Note(Sine(freq), envelope, note_length, gain, i * (note_length + gap))
+                  for i, freq in enumerate(freqs))
+    return Recipe(notes)
+
+# ----------------- RENDERING -----------------
+def time_axis(duration):
+    """Return (sample indices, times in seconds) as float arrays"""
+    import numpy
+    n_samples = int(SAMPLE_RATE * duration)
+    s = numpy.arange(n_samples, dtype=numpy.float64)
+    return s, s / SAMPLE_RATE
+
+def phase(osc, t, duration):
+    """Phase in cycles for an oscillator over times t"""
+    import numpy
+    if isinstance(osc, Sine):
+        return osc.freq * t
+    if isinstance(osc, LinearChirp):
+        slope = (osc.end_freq - osc.start_freq) / duration
+        return osc.start_freq * t + slope * t * t / 2
+    if isinstance(osc, ExpChirp):
+        ratio = osc.end_freq / osc.start_freq
+        if ratio == 1:
+            return osc.start_freq * t
+        k = numpy.log(ratio) / duration
+        return osc.start_freq * numpy.expm1(k * t) / k
+    if isinstance(osc, Steps):
+        segment = duration / len(osc.freqs)
+        index = numpy.minimum((t // segment).astype(int), len(osc.freqs) - 1)
+        freqs = numpy.asarray(osc.freqs, dtype=numpy.float64)
+        # Phase accumulated at the start of each segment
+        offsets = numpy.concatenate(([0.0], numpy.cumsum(freqs[:-1] * segment)))
+        return offsets[index] + freqs[index] * (t - index * segment)
+    raise TypeError(f"unknown oscillator {osc!r}")
+
+def envelope_curve(env, s, duration):
+    """Envelope gain per sample for sample indices s"""
+    import numpy
+    n_samples = len(s)
+    if isinstance(env, Fade):
+        fade_in_len = SAMPLE_RATE * env.fade_in
+        fade_out_len = SAMPLE_RATE * env.fade_out
+        fade = numpy.ones(n_samples)
+        # Fade in wins where the two overlap
+        fade_out_mask = s > n_samples - fade_out_len
+        fade[fade_out_mask] = (n_samples - s[fade_out_mask]) / fade_out_len
+        fade_in_mask = s < fade_in_len
+        fade[fade_in_mask] = s[fade_in_mask] / fade_in_len
+        return fade
+    if isinstance(env, ADSR):
+        attack_end = min(env.attack, duration)
+        decay_end = min(attack_end + env.decay, duration)
+        release_start = max(decay_end, duration - env.release)
+        times = [0.0, attack_end, decay_end, release_start, duration]
+        levels = [0.0, 1.0, env.sustain, env.sustain, 0.0]
+        return numpy.interp(s / SAMPLE_RATE, times, levels)
+    raise TypeError(f"unknown envelope {env!r}")
+
+def render_note(note):
+    """Mono float samples (full scale) for one note"""
+    import numpy
+    s, t = time_axis(note.duration)
+    wave = numpy.sin(2 * numpy.pi * phase(note.osc, t, note.duration))
+    return MAX_SAMPLE * envelope_curve(note.envelope, s, note.duration) * wave * note.gain
+
+def mix(recipe):
+    """Sum a recipe's notes at their start offsets into one mono float buffer"""
+    import numpy
+    length = max(int(SAMPLE_RATE * note.start) + int(SAMPLE_RATE * note.duration)
+                 for note in recipe.notes)
+    out = numpy.zeros(length)
+    for note in recipe.notes:
+        samples = render_note(note)
+        offset = int(SAMPLE_RATE * note.start)
+        out[offset:offset + len(samples)] += samples
+    return out
+
+@lru_cache(maxsize=32)
+def render(recipe):
+    """Stereo int16 buffer for a recipe (cached; do not modify the result)"""
+    import numpy
+    mono = numpy.clip(mix(recipe), -MAX_SAMPLE, MAX_SAMPLE).astype(numpy.int16)
+    stereo = numpy.column_stack((mono, mono))
+    stereo.flags.writeable = False
+    return stereo
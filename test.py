@@ -25,3 +25,152 @@ elif winner == -1:
     print("Tie!")
 else:
     print(f"Player {winner} wins!")
+
+# Move timers: pausing stops the clock for every timer, resuming shifts the deadlines
+from timers import TimerService
+
+now = [100.0]
+fired = []
+timers = TimerService(deliver=lambda kind, payload: fired.append((kind, now[0])), clock=lambda: now[0])
+timer_id = timers.schedule(10, 'move_timeout', player=1)
+timers.schedule(4, 'warning')
+now[0] = 103.0
+timers.pause()
+now[0] = 150.0
+assert timers.poll() == 0 and timers.remaining(timer_id) == 7.0
+timers.resume()
+now[0] = 150.5
+assert timers.poll() == 0
+now[0] = 151.0
+assert timers.poll() == 1 and fired == [('warning', 151.0)]
+now[0] = 157.0
+assert timers.poll() == 1 and fired[-1] == ('move_timeout', 157.0) and not timers.active(timer_id)
+print("Timer pause and resume OK")
+
+# Achievement journal: a torn last line (crash mid-write) is dropped and cut off
+import os
+import tempfile
+from achievement_store import AchievementStore
+
+with tempfile.TemporaryDirectory() as folder:
+    snapshot_path = os.path.join(folder, 'achievements.json')
+    journal_path = os.path.join(folder, 'achievements.journal')
+    definitions = {'first_win': {'name': 'First Win'}, 'speed_demon': {'name': 'Speed Demon'},
+                   'comeback': {'name': 'Comeback'}}
+    with open(journal_path, 'w') as f:
+        f.write('{"id": "first_win", "date": "2024-01-01"}\n{"id": "speed_de')
+    store = AchievementStore(snapshot_path, journal_path)
+    achievements = store.load(definitions)
+    assert achievements['first_win']['unlocked'] and achievements['first_win']['unlock_date'] == '2024-01-01'
+    assert not achievements['speed_demon']['unlocked']
+    assert os.path.getsize(journal_path) == len('{"id": "first_win", "date": "2024-01-01"}\n')
+    store.record_unlock('comeback', '2024-01-02')
+    store.close()
+    achievements = AchievementStore(snapshot_path, journal_path).load(definitions)
+    assert [a for a in achievements if achievements[a]['unlocked']] == ['first_win', 'comeback']
+print("Achievement journal recovery OK")
+
+# Game archive: records and index round-trip, and a torn tail is cut off on reopen
+from records import GameArchive
+
+with tempfile.TemporaryDirectory() as folder:
+    path = os.path.join(folder, 'games.rec')
+    small = [(1, 1, 1), (0, 0, 2), (2, 2, 1), (0, 2, 2), (0, 1, 1), (2, 1, 2), (1, 0, 1), (1, 2, 2), (2, 0, 1)]
+    big = [(7, 7, 1), (7, 8, 2), (14, 14, 1), (0, 13, 2)]  # 225 cells: two bytes a ply
+    archive = GameArchive(path)
+    assert archive.append(small, -1, 'hard', 'no_timer', 1700000000, 12.5, True) == 0
+    assert archive.append(big, 0, None, 'no_timer', 1700000100, 3.0, side=15) == 1
+    first = archive.get(0)
+    assert first['moves'] == small and first['result'] == -1 and first['difficulty'] == 'hard'
+    assert first['used_undo'] and first['started'] == 1700000000 and first['duration'] == 12.5
+    assert archive.get(1)['moves'] == big and archive.get(1)['side'] == 15
+    assert [record['moves'] for record in archive.iter_records()] == [small, big]
+    archive.close()
+    with open(path, 'ab') as f:
+        f.write(b'\x03\x00\x01')  # a record cut off mid-header
+    with open(os.path.splitext(path)[0] + '.idx', 'ab') as f:
+        f.write(b'\x10\x00\x00')  # and half an index entry
+    archive = GameArchive(path).open()
+    assert len(archive) == 2
+    assert archive.append(small[:5], 1, 'easy') == 2
+    assert [record['moves'] for record in archive.iter_records(1)] == [big, small[:5]]
+    archive.close()
+print("Game archive round trip OK")
+
+# Move tree: undo and redo restore whole positions, and a new move starts a branch
+from move_tree import MoveTree
+
+tree = MoveTree()
+tree.play(1, 1, 1)
+tree.play(0, 0, 2)
+tree.play(2, 2, 1)
+assert tree.undo() and tree.undo()
+board = create_board()
+tree.restore(board)
+assert board == [[0, 0, 0], [0, 1, 0], [0, 0, 0]] and tree.current.turn == 2 and tree.moves == [(1, 1, 1)]
+assert tree.redo().move == (0, 0, 2) and tree.redo().move == (2, 2, 1) and tree.redo() is None
+tree.undo()
+tree.play(0, 2, 1)  # a new branch next to 2,2
+assert len(tree.current.parent.children) == 2 and tree.moves[-1] == (0, 2, 1)
+assert tree.switch_branch(-1).move == (2, 2, 1) and tree.moves == [(1, 1, 1), (0, 0, 2), (2, 2, 1)]
+tree.restore(board)
+assert board == [[2, 0, 0], [0, 1, 0], [0, 0, 1]]
+tree.undo()
+assert tree.redo().move == (2, 2, 1)  # redo follows the branch visited last
+assert tree.undo() and tree.undo() and tree.undo() and tree.undo() is None
+print("Move tree undo, redo and branches OK")
+
+# Retrograde table: every reachable 3x3 position agrees with the hard AI's minimax
+import retrograde
+from ai import minimax
+
+with tempfile.TemporaryDirectory() as folder:
+    table = retrograde.RetrogradeTable(retrograde.solve(3, 3, 3, os.path.join(folder, 'retro.tbl'), workers=1,
+                                                        progress=lambda message: None))
+    scores = {retrograde.WIN: 1, retrograde.DRAW: 0, retrograde.LOSS: -1}  # for the side to move
+    checked = mismatches = 0
+    seen = set()
+    stack = [create_board()]
+    while stack:
+        board = stack.pop()
+        key = str(board)
+        if key in seen or check_winner(board)[0] != 0:
+            continue
+        seen.add(key)
+        player = 1 if sum(row.count(1) for row in board) == sum(row.count(2) for row in board) else 2
+        outcome, _ = table.value(board)
+        # minimax scores +1 for an O win whoever moves
+        expected = minimax(board, player)['score'] * (1 if player == 2 else -1)
+        checked += 1
+        mismatches += scores[outcome] != expected
+        for r in range(3):
+            for c in range(3):
+                if board[r][c] == 0:
+                    after = [row[:] for row in board]
+                    after[r][c] = player
+                    stack.append(after)
+    table.close()
+    assert checked == 4520 and mismatches == 0, (checked, mismatches)
+print(f"Retrograde table matches minimax on {checked} positions")
+
+# Gomoku: pattern tables kept up move by move match a board rebuilt from scratch
+import random
+from gomoku import GomokuBoard
+
+rng = random.Random(5)
+gomoku_board = GomokuBoard()
+mismatches = 0
+for step in range(120):
+    empty = [cell for cell, value in enumerate(gomoku_board.cells) if value == 0]
+    if gomoku_board.moves and rng.random() < 0.3:
+        gomoku_board.undo()
+    else:
+        gomoku_board.play(rng.choice(empty), 1 + len(gomoku_board.moves) % 2)
+    if step % 10 == 9:
+        size = gomoku_board.size
+        rebuilt = GomokuBoard.from_rows([gomoku_board.cells[r * size:(r + 1) * size] for r in range(size)])
+        for name in ('codes', 'classes', 'value', 'score', 'fives', 'open_fours', 'fours', 'threes',
+                     'active', 'flags', 'hash'):
+            mismatches += getattr(gomoku_board, name) != getattr(rebuilt, name)
+assert mismatches == 0
+print("Gomoku incremental pattern tables OK")
@@ -0,0 +1,117 @@
+# timers.py
+"""Timer service on the monotonic clock.
+
+Timers are kept in a heap ordered by deadline. poll() delivers every timer
+that has come due exactly once, no matter how often (or how rarely) it is
+called, so move timers no longer depend on the frame rate. Delivery goes
+through a callback: pygame_poster() turns timers into pygame events for the
+window, while headless code can pass its own callback and drive the service
+with run() instead of a render loop.
+"""
+import heapq
+import itertools
+import time
+
+class TimerService:
+    def __init__(self, deliver=None, clock=time.monotonic):
+        self.deliver = deliver if deliver is not None else (lambda kind, payload: None)
+        self.clock = clock
+        self.heap = []  # (deadline, timer_id); ids increase, so ties fire in order
+        self.timers = {}  # timer_id -> (deadline, kind, payload)
+        self.ids = itertools.count(1)
+        self.paused_at = None
+
+    def now(self):
+        # While paused, time stands still for every timer
+        return self.paused_at if self.paused_at is not None else self.clock()
+
+    def schedule(self, delay, kind, **payload):
+        """Fire `kind` after delay seconds; returns the timer id"""
+        timer_id = next(self.ids)
+        deadline = self.now() + delay
+        self.timers[timer_id] = (deadline, kind, payload)
+        heapq.heappush(self.heap, (deadline, timer_id))
+        return timer_id
+
+    def cancel(self, timer_id):
+        # The heap entry is skipped when it surfaces
+        self.timers.pop(timer_id, None)
+
+    def cancel_all(self):
+        self.timers.clear()
+        self.heap.clear()
+
+    def active(self, timer_id):
+        return timer_id in self.timers
+
+    def remaining(self, timer_id):
+        """Seconds until a timer fires, or None if it is not scheduled"""
+        entry = self.timers.get(timer_id)
+        if entry is None:
+            return None
+        return max(0.0, entry[0] - self.now())
+
+    def pause(self):
+        if self.paused_at is None:
+            self.paused_at = self.clock()
+
+    def resume(self):
+        """Continue after pause(); every deadline moves by the paused time"""
+        if self.paused_at is None:
+            return
+        shift = self.clock() - self.paused_at
+        self.paused_at = None
+        # A uniform shift keeps the heap ordered
+        self.heap = [(deadline + shift, timer_id) for deadline, timer_id in self.heap]
+        for timer_id, (deadline, kind, payload) in self.timers.items():
+            self.timers[timer_id] = (deadline + shift, kind, payload)
+
+    @property
+    def paused(self):
+        return self.paused_at is not None
+
+    def poll(self, now=None):
+        """Deliver every timer that is due; returns how many fired"""
+        if self.paused:
+            return 0
+        now = self.clock() if now is None else now
+        fired = 0
+        while self.heap and self.heap[0][0] <= now:
+            deadline, timer_id = heapq.heappop(self.heap)
+            entry = self.timers.pop(timer_id, None)
+            if entry is None:
+                continue  # cancelled
+            kind, payload = entry[1], entry[2]
+            self.deliver(kind, dict(payload, timer_id=timer_id))
+            fired += 1
+        return fired
+
+    def next_delay(self):
+        """Seconds until the next timer fires, or None if nothing is pending"""
+        while self.heap and self.heap[0][1] not in self.timers:
+            heapq.heappop(self.heap)
+        if not self.heap or self.paused:
+            return None
+        return max(0.0, self.heap[0][0] - self.clock())
+
+    def run(self, timeout=None, sleep=time.sleep):
+        """Deliver timers as they come due until none are left (headless use)"""
+        end = None if timeout is None else self.clock() + timeout
+        while True:
+            delay = self.next_delay()
+            if delay is None:
+                return
+            if end is not None:
+                if self.clock() >= end:
+                    return
+                delay = min(delay, end - self.clock())
+            sleep(max(0.0, delay))
+            self.poll()
+
+def pygame_poster(event_type):
+    """Delivery callback that posts timers to the pygame event queue"""
+    import pygame
+
+    def deliver(kind, payload):
+        pygame.event.post(pygame.event.Event(event_type, kind=kind, **payload))
+    return deliver
@@ -0,0 +1,122 @@
+# voices.py
+"""Voice management for sound effects.
+
+Each sound category gets its own reserved mixer channels, so a burst of
+clicks can never take the channel a win jingle needs. Triggers are
+collected during a frame and flushed once: duplicates of the same sound
+collapse into one voice, each sound is rate limited, and when a category
+is full the lowest-priority voice is stolen if the new sound outranks it.
+"""
+import time
+import pygame
+
+# category -> number of reserved channels
+CATEGORIES = {
+    'ui': 2,
+    'game': 2,
+    'alert': 1,
+    'result': 1,
+    'jingle': 1
+}
+
+# sound -> (category, priority, minimum seconds between plays)
+SOUND_VOICES = {
+    'click': ('ui', 1, 0.05),
+    'undo': ('ui', 2, 0.1),
+    'move': ('game', 2, 0.05),
+    'timer_warning': ('alert', 3, 0.5),
+    'win': ('result', 4, 0.5),
+    'lose': ('result', 4, 0.5),
+    'draw': ('result', 4, 0.5),
+    'achievement': ('jingle', 3, 0.3)  # any 'achievement:<id>' sound
+}
+
+DEFAULT_VOICE = ('ui', 1, 0.05)
+
+def voice_for(sound_name):
+    """(category, priority, interval) for a sound, matching 'family:variant' names by family"""
+    voice = SOUND_VOICES.get(sound_name)
+    if voice is None:
+        voice = SOUND_VOICES.get(sound_name.split(':', 1)[0], DEFAULT_VOICE)
+    return voice
+
+class Voice:
+    """A reserved channel and what it is currently playing"""
+    def __init__(self, channel):
+        self.channel = channel
+        self.sound_name = None
+        self.priority = 0
+        self.started = 0.0
+
+    def busy(self):
+        return self.channel.get_busy()
+
+class VoiceManager:
+    def __init__(self):
+        total = sum(CATEGORIES.values())
+        if pygame.mixer.get_num_channels() < total + 2:
+            pygame.mixer.set_num_channels(total + 2)
+        # Reserved channels are never picked by Sound.play()
+        pygame.mixer.set_reserved(total)
+
+        self.voices = {}
+        index = 0
+        for category, count in CATEGORIES.items():
+            self.voices[category] = [Voice(pygame.mixer.Channel(index + i)) for i in range(count)]
+            index += count
+
+        self.last_played = {}  # sound -> monotonic time it last started
+        self.pending = {}  # sound -> (Sound, volume) triggered this frame
+        self.stats = {'played': 0, 'collapsed': 0, 'rate_limited': 0, 'stolen': 0, 'dropped': 0}
+
+    def trigger(self, sound_name, sound, volume):
+        """Queue a sound for this frame; repeats within the frame collapse"""
+        previous = self.pending.get(sound_name)
+        if previous is not None:
+            self.stats['collapsed'] += 1
+            if previous[1] >= volume:
+                return
+        self.pending[sound_name] = (sound, volume)
+
+    def flush(self, now=None):
+        """Start this frame's sounds, highest priority first"""
+        if not self.pending:
+            return
+        now = time.monotonic() if now is None else now
+        pending = sorted(self.pending.items(),
+                         key=lambda item: -voice_for(item[0])[1])
+        self.pending = {}
+        for sound_name, (sound, volume) in pending:
+            category, priority, interval = voice_for(sound_name)
+
+            last = self.last_played.get(sound_name)
+            if last is not None and now - last < interval:
+                self.stats['rate_limited'] += 1
+                continue
+
+            voice = self.allocate(category, priority)
+            if voice is None:
+                self.stats['dropped'] += 1
+                continue
+
+            voice.channel.set_volume(volume)
+            voice.channel.play(sound)
+            voice.sound_name = sound_name
+            voice.priority = priority
+            voice.started = now
+            self.last_played[sound_name] = now
+            self.stats['played'] += 1
+
+    def allocate(self, category, priority):
+        """Return a free voice, or steal the weakest one the new sound outranks"""
+        voices = self.voices[category]
+        for voice in voices:
+            if not voice.busy():
+                return voice
+        # Lowest priority first, then oldest
+        victim = min(voices, key=lambda v: (v.priority, v.started))
+        if victim.priority > priority:
+            return None
+        victim.channel.stop()
+        self.stats['stolen'] += 1
+        return victim